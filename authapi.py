@@ -3,15 +3,23 @@ from pydantic import BaseModel
 import os
 import psycopg2
 import psycopg2.extras
-from db import get_conn, init_db
+from db import connection, init_db
+import asyncio
 import hashlib
 import hmac
+import threading
 import time
 import jwt
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from typing import Optional
 
 JWT_SECRET = os.environ.get("JWT_SECRET", "change_this_secret")
 JWT_ALGORITHM = "HS256"
+# Verified token payloads kept in memory (each until its exp)
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "4096"))
+# Processes running PBKDF2 for /login and /register
+AUTH_HASH_WORKERS = int(os.getenv("AUTH_HASH_WORKERS", str(min(os.cpu_count() or 1, 4))))
 
 router = APIRouter()
 
@@ -32,6 +40,85 @@ def verify_password(password: str, salt: str, expected_hash: str) -> bool:
     return hmac.compare_digest(pwd_hash, expected_hash)
 
 
+_hash_executor = None
+_hash_executor_lock = threading.Lock()
+
+
+def _hash_pool():
+    # Created on first login/register so importing the router stays cheap
+    global _hash_executor
+    with _hash_executor_lock:
+        if _hash_executor is None:
+            _hash_executor = ProcessPoolExecutor(max_workers=AUTH_HASH_WORKERS)
+        return _hash_executor
+
+
+def shutdown_hash_pool():
+    global _hash_executor
+    with _hash_executor_lock:
+        if _hash_executor is not None:
+            _hash_executor.shutdown(wait=False, cancel_futures=True)
+            _hash_executor = None
+
+
+async def hash_password_async(password: str, salt: Optional[str] = None):
+    """hash_password in the hashing process pool, so PBKDF2 never holds up the API workers"""
+    if salt is None:
+        salt = os.urandom(16).hex()
+    return await asyncio.wrap_future(_hash_pool().submit(hash_password, password, salt))
+
+
+async def verify_password_async(password: str, salt: str, expected_hash: str) -> bool:
+    pwd_hash, _ = await hash_password_async(password, salt)
+    return hmac.compare_digest(pwd_hash, expected_hash)
+
+
+class TokenCache:
+    """LRU cache of verified token payloads; an entry is dropped once its token expires"""
+
+    def __init__(self, max_entries=TOKEN_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token):
+        with self._lock:
+            payload = self._entries.get(token)
+            if payload is not None and payload.get("exp", 0) <= time.time():
+                del self._entries[token]
+                payload = None
+            if payload is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return payload
+
+    def put(self, token, payload):
+        # Tokens without exp would never be re-checked, so they are not cached
+        if not isinstance(payload.get("exp"), (int, float)):
+            return
+        with self._lock:
+            self._entries[token] = payload
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "max_entries": self.max_entries,
+                    "hits": self.hits, "misses": self.misses}
+
+
+token_cache = TokenCache()
+
+
 def create_token(payload: dict, expires_in: int = 60 * 60 * 24):
     to_encode = payload.copy()
     to_encode.update({"exp": int(time.time()) + expires_in})
@@ -39,10 +126,15 @@ def create_token(payload: dict, expires_in: int = 60 * 60 * 24):
 
 
 def decode_token(token: str):
-    try:
-        return jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-    except jwt.PyJWTError:
-        return None
+    payload = token_cache.get(token)
+    if payload is None:
+        try:
+            payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+        except jwt.PyJWTError:
+            return None
+        token_cache.put(token, payload)
+    # Callers get their own copy so the cached payload can't be mutated
+    return dict(payload)
 
 
 class RegisterIn(BaseModel):
@@ -62,38 +154,42 @@ def startup():
     init_db()
 
 
-@router.post("/register")
-def register(data: RegisterIn):
-    pwd_hash, salt = hash_password(data.password)
-    conn = get_conn()
-    cur = conn.cursor()
-    try:
+@router.on_event("shutdown")
+def shutdown():
+    shutdown_hash_pool()
+
+
+def _insert_user(data: RegisterIn, pwd_hash: str, salt: str):
+    with connection() as conn, conn.cursor() as cur:
         cur.execute(
             "INSERT INTO users (username, password_hash, salt, role) VALUES (%s, %s, %s, %s) RETURNING id",
             (data.username, pwd_hash, salt, data.role),
         )
-        user_id = cur.fetchone()[0]
-        conn.commit()
+        return cur.fetchone()[0]
+
+
+def _find_user(username: str):
+    with connection() as conn, conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+        cur.execute("SELECT * FROM users WHERE username = %s", (username,))
+        return cur.fetchone()
+
+
+@router.post("/register")
+async def register(data: RegisterIn):
+    pwd_hash, salt = await hash_password_async(data.password)
+    try:
+        user_id = await asyncio.to_thread(_insert_user, data, pwd_hash, salt)
     except psycopg2.IntegrityError:
-        conn.rollback()
         raise HTTPException(status_code=400, detail="Username already exists")
-    finally:
-        cur.close()
-        conn.close()
     return {"id": user_id, "username": data.username, "role": data.role}
 
 
 @router.post("/login")
-def login(data: LoginIn):
-    conn = get_conn()
-    cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-    cur.execute("SELECT * FROM users WHERE username = %s", (data.username,))
-    row = cur.fetchone()
-    cur.close()
-    conn.close()
+async def login(data: LoginIn):
+    row = await asyncio.to_thread(_find_user, data.username)
     if not row:
         raise HTTPException(status_code=401, detail="Invalid credentials")
-    if not verify_password(data.password, row["salt"], row["password_hash"]):
+    if not await verify_password_async(data.password, row["salt"], row["password_hash"]):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     token = create_token({"sub": row["username"], "role": row["role"], "uid": row["id"]})
     return {"access_token": token, "token_type": "bearer"}
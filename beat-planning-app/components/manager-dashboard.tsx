@@ -71,7 +71,7 @@ function RecentEvents() {
         const token = typeof window !== "undefined" ? localStorage.getItem("bp_token") : null
         const headers: any = {}
         if (token) headers.Authorization = `Bearer ${token}`
-        const res = await fetch("http://localhost:8000/visit/events", { headers })
+        const res = await fetch("http://localhost:8000/visit/events?limit=10", { headers })
         if (!res.ok) return
         const data = await res.json()
         const list = Array.isArray(data) ? data : data.events || []
@@ -20,11 +20,18 @@ export default function SalespersonDashboard() {
         const me = await meRes.json()
         const sales_id = me.uid
 
-        // load events for this salesperson
-        const evRes = await fetch(`http://localhost:8000/visit/events?sales_id=${sales_id}`, { headers })
-        if (!evRes.ok) return
-        const evData = await evRes.json()
-        const evList = Array.isArray(evData) ? evData : evData.events || []
+        // load events for this salesperson, following next_cursor through every page
+        const evList: any[] = []
+        let cursor: string | null = null
+        do {
+          const params = new URLSearchParams({ sales_id: String(sales_id), limit: "1000" })
+          if (cursor) params.set("cursor", cursor)
+          const evRes = await fetch(`http://localhost:8000/visit/events?${params}`, { headers })
+          if (!evRes.ok) return
+          const evData = await evRes.json()
+          evList.push(...(Array.isArray(evData) ? evData : evData.events || []))
+          cursor = Array.isArray(evData) ? null : evData.next_cursor
+        } while (cursor)
         setEvents(evList.slice(0, 20))
 
         // compute simple metrics
@@ -0,0 +1,83 @@
+# Benchmark: login hashing and auth checks under concurrency
+# Compares PBKDF2 on API threads vs the hashing process pool (throughput and how
+# long the event loop stalls meanwhile), and token checks with vs without the cache.
+import asyncio
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+import authapi
+
+
+async def _loop_lag(stop):
+    """Largest delay seen by a 10 ms ticker on the event loop"""
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.01)
+        worst = max(worst, time.perf_counter() - start - 0.01)
+    return worst
+
+
+async def _logins(num_logins, pooled):
+    _, salt = authapi.hash_password("warmup")
+    expected, _ = authapi.hash_password("secret", salt)
+    if pooled:
+        # Start the worker processes outside the timed section
+        await authapi.verify_password_async("secret", salt, expected)
+
+    async def one():
+        if pooled:
+            return await authapi.verify_password_async("secret", salt, expected)
+        return await asyncio.to_thread(authapi.verify_password, "secret", salt, expected)
+
+    stop = asyncio.Event()
+    lag = asyncio.create_task(_loop_lag(stop))
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(num_logins)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    return {
+        'benchmark': 'login',
+        'mode': 'process pool' if pooled else 'api threads',
+        'calls': num_logins,
+        'seconds': round(elapsed, 3),
+        'calls_per_second': round(num_logins / elapsed, 1),
+        'max_loop_lag_ms': round(await lag * 1000, 1)
+    }
+
+
+def _auth_checks(num_checks, num_threads, num_tokens, cached):
+    tokens = [authapi.create_token({"sub": f"user_{i}", "role": "sales", "uid": i}) for i in range(num_tokens)]
+    headers = [f"Bearer {token}" for token in tokens]
+    authapi.token_cache.clear()
+    max_entries = authapi.token_cache.max_entries
+    authapi.token_cache.max_entries = max_entries if cached else 0
+
+    def check(i):
+        return authapi.get_current_user(headers[i % num_tokens])
+
+    try:
+        with ThreadPoolExecutor(max_workers=num_threads) as executor:
+            start = time.perf_counter()
+            list(executor.map(check, range(num_checks)))
+            elapsed = time.perf_counter() - start
+    finally:
+        authapi.token_cache.max_entries = max_entries
+    return {
+        'benchmark': 'auth check',
+        'mode': 'token cache' if cached else 'decode every call',
+        'calls': num_checks,
+        'seconds': round(elapsed, 3),
+        'calls_per_second': round(num_checks / elapsed, 1),
+        'max_loop_lag_ms': None
+    }
+
+
+if __name__ == "__main__":
+    num_logins = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    num_checks = int(sys.argv[2]) if len(sys.argv) > 2 else 50000
+    results = [asyncio.run(_logins(num_logins, pooled)) for pooled in (False, True)]
+    results += [_auth_checks(num_checks, 16, 200, cached) for cached in (False, True)]
+    authapi.shutdown_hash_pool()
+    print(pd.DataFrame(results).to_string(index=False))
@@ -0,0 +1,49 @@
+# Benchmark: Python transit callbacks vs native transit matrices
+# Same model, same time budget; compares how much search work fits in it.
+import sys
+import time
+import numpy as np
+import pandas as pd
+from planner import BeatPlanningOptimizer
+
+
+def make_locations(num_stores=300, num_depots=3, seed=0):
+    """Synthetic territory around Delhi"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'node': [f'depot_{i}' for i in range(num_depots)] + [f'store_{i:05d}' for i in range(num_stores)],
+        'lat': np.r_[rng.uniform(28.5, 28.7, num_depots), rng.uniform(28.4, 28.8, num_stores)],
+        'long': np.r_[rng.uniform(77.1, 77.3, num_depots), rng.uniform(77.0, 77.4, num_stores)],
+        'node_type': ['starting_point'] * num_depots + ['store'] * num_stores
+    })
+
+
+def run(optimizer, data, native_transits, time_limit_seconds):
+    manager, routing = optimizer._build_routing_model(data, native_transits=native_transits)
+    params = optimizer._search_parameters(time_limit_seconds)
+    start = time.time()
+    solution = routing.SolveWithParameters(params)
+    elapsed = time.time() - start
+    solver = routing.solver()
+    return {
+        'transits': 'native' if native_transits else 'python',
+        'branches': solver.Branches(),
+        'solutions': solver.Solutions(),
+        'objective': solution.ObjectiveValue() if solution else None,
+        'seconds': round(elapsed, 2)
+    }
+
+
+if __name__ == "__main__":
+    num_stores = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    time_limit_seconds = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    optimizer = BeatPlanningOptimizer(make_locations(num_stores), distance_mode='haversine')
+    data = optimizer.create_data_model(10, daily_working_hours=8, max_daily_distance_km=200,
+                                       as_lists=False)
+
+    results = [run(optimizer, data, native, time_limit_seconds) for native in (False, True)]
+    print(pd.DataFrame(results).to_string(index=False))
+    python_branches, native_branches = results[0]['branches'], results[1]['branches']
+    if python_branches:
+        print(f"Native transits explored {native_branches / python_branches:.1f}x the search "
+              f"branches within {time_limit_seconds}s")
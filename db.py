@@ -22,50 +22,310 @@ except Exception:
             pass
 
 load_dotenv()
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
 import psycopg2
+import psycopg2.extensions
 import psycopg2.extras
 
 DATABASE_URL = os.getenv("DATABASE_URL")
+# Connections opened up front on first use / hard cap on open connections
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+# Seconds a request waits for a free connection before failing
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+# Connections idle longer than this (seconds) are pinged with SELECT 1 before reuse
+DB_POOL_HEALTHCHECK_IDLE = float(os.getenv("DB_POOL_HEALTHCHECK_IDLE", "30"))
+
+
+class PoolTimeout(RuntimeError):
+    pass
 
 
 def get_conn():
+    """Unpooled connection for scripts and one-off jobs; request handlers use connection()"""
     if not DATABASE_URL:
         raise RuntimeError("DATABASE_URL is not set in environment")
     conn = psycopg2.connect(DATABASE_URL)
     return conn
 
 
+class ConnectionPool:
+    """
+    Thread-safe pool of psycopg2 connections. Connections are opened lazily up
+    to max_size; when all are checked out, callers wait up to `timeout` seconds
+    for one to come back. Idle connections are health-checked before reuse and
+    broken ones are replaced. Wait and checkout (hold) times are recorded so the
+    pool can be sized from stats().
+    """
+
+    def __init__(self, connect=get_conn, min_size=DB_POOL_MIN_SIZE, max_size=DB_POOL_MAX_SIZE,
+                 timeout=DB_POOL_TIMEOUT, healthcheck_idle=DB_POOL_HEALTHCHECK_IDLE):
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max(max_size, 1)
+        self.timeout = timeout
+        self.healthcheck_idle = healthcheck_idle
+        # (connection, returned_at) pairs, most recently returned last
+        self._idle = deque()
+        self._size = 0
+        self._filled = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self._checked_out = {}
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.opened = 0
+        self.discarded = 0
+        self.failed_health_checks = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.checkout_seconds_total = 0.0
+        self.checkout_seconds_max = 0.0
+        self.returns = 0
+
+    def _open(self):
+        # Called with a slot already reserved in _size
+        try:
+            conn = self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self.opened += 1
+        return conn
+
+    def _fill(self):
+        """Open min_size connections the first time the pool is used"""
+        with self._cond:
+            if self._filled:
+                return
+            self._filled = True
+        try:
+            # One slot reserved and opened at a time, so a failure leaves no slot held
+            while True:
+                with self._cond:
+                    if self._size >= min(self.min_size, self.max_size):
+                        return
+                    self._size += 1
+                conn = self._open()
+                with self._cond:
+                    self._idle.append((conn, time.monotonic()))
+                    self._cond.notify()
+        except Exception:
+            # Retried by the next checkout
+            with self._cond:
+                self._filled = False
+            raise
+
+    def _healthy(self, conn, returned_at):
+        if conn.closed:
+            return False
+        if time.monotonic() - returned_at < self.healthcheck_idle:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._size -= 1
+            self.discarded += 1
+            self._cond.notify()
+
+    def getconn(self):
+        if self._closed:
+            raise RuntimeError("Connection pool is closed")
+        self._fill()
+        start = time.monotonic()
+        deadline = start + self.timeout
+        while True:
+            with self._cond:
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.timeouts += 1
+                        raise PoolTimeout(
+                            f"No database connection free within {self.timeout}s "
+                            f"({self.max_size} in use)")
+                    self._cond.wait(remaining)
+                if self._idle:
+                    conn, returned_at = self._idle.pop()
+                else:
+                    conn, returned_at = None, None
+                    self._size += 1
+            if conn is None:
+                conn = self._open()
+            elif not self._healthy(conn, returned_at):
+                with self._cond:
+                    self.failed_health_checks += 1
+                self._discard(conn)
+                continue
+            break
+        now = time.monotonic()
+        waited = now - start
+        with self._cond:
+            self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+            self._checked_out[id(conn)] = now
+        return conn
+
+    def putconn(self, conn):
+        with self._cond:
+            checked_out_at = self._checked_out.pop(id(conn), None)
+            if checked_out_at is not None:
+                held = time.monotonic() - checked_out_at
+                self.returns += 1
+                self.checkout_seconds_total += held
+                self.checkout_seconds_max = max(self.checkout_seconds_max, held)
+        if not conn.closed and conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            # Never hand out a connection with a transaction left open
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                pass
+        if self._closed or conn.closed or \
+                conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            self._discard(conn)
+            return
+        with self._cond:
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Checked-out connection: committed on success, rolled back on error, then returned"""
+        conn = self.getconn()
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            if not conn.closed:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    pass
+            raise
+        finally:
+            self.putconn(conn)
+
+    def close(self):
+        """Close idle connections; checked-out ones are closed when they come back"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = list(self._idle), deque()
+        for conn, _ in idle:
+            self._discard(conn)
+
+    def stats(self):
+        with self._cond:
+            in_use = len(self._checked_out)
+            return {
+                "size": self._size,
+                "in_use": in_use,
+                "idle": len(self._idle),
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "timeout_seconds": self.timeout,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "opened": self.opened,
+                "discarded": self.discarded,
+                "failed_health_checks": self.failed_health_checks,
+                "wait_seconds_avg": round(self.wait_seconds_total / self.checkouts, 6) if self.checkouts else 0.0,
+                "wait_seconds_max": round(self.wait_seconds_max, 6),
+                "checkout_seconds_avg": round(self.checkout_seconds_total / self.returns, 6) if self.returns else 0.0,
+                "checkout_seconds_max": round(self.checkout_seconds_max, 6),
+            }
+
+
+pool = ConnectionPool()
+
+
+def connection():
+    """Pooled connection context manager shared by the API routers"""
+    return pool.connection()
+
+
+def pool_stats():
+    return pool.stats()
+
+
+def close_pool():
+    pool.close()
+
+
 def init_db():
     """Create tables if they do not exist."""
-    conn = get_conn()
-    cur = conn.cursor()
-    # users table
-    cur.execute(
-        """
-        CREATE TABLE IF NOT EXISTS users (
-            id SERIAL PRIMARY KEY,
-            username TEXT UNIQUE NOT NULL,
-            password_hash TEXT NOT NULL,
-            salt TEXT NOT NULL,
-            role TEXT NOT NULL
+    with connection() as conn, conn.cursor() as cur:
+        # users table
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS users (
+                id SERIAL PRIMARY KEY,
+                username TEXT UNIQUE NOT NULL,
+                password_hash TEXT NOT NULL,
+                salt TEXT NOT NULL,
+                role TEXT NOT NULL
+            )
+            """
+        )
+        # events table for visits
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS events (
+                event_id SERIAL PRIMARY KEY,
+                timestamp TIMESTAMP WITH TIME ZONE NOT NULL,
+                sales_id INTEGER NOT NULL,
+                assignment_id INTEGER,
+                lat DOUBLE PRECISION,
+                long DOUBLE PRECISION,
+                notes TEXT,
+                photo_path TEXT
+            )
+            """
+        )
+        # keyset pagination of /visit/events: newest first, optionally per salesperson or assignment
+        cur.execute("CREATE INDEX IF NOT EXISTS events_timestamp_idx ON events (timestamp, event_id)")
+        cur.execute("CREATE INDEX IF NOT EXISTS events_sales_timestamp_idx ON events (sales_id, timestamp, event_id)")
+        cur.execute(
+            "CREATE INDEX IF NOT EXISTS events_assignment_timestamp_idx ON events (assignment_id, timestamp, event_id)"
+        )
+        # dashboard rollups kept current by check-ins (see rollups.py)
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS events_daily_sales_rollup (
+                day DATE NOT NULL,
+                sales_id INTEGER NOT NULL,
+                events BIGINT NOT NULL,
+                PRIMARY KEY (day, sales_id)
+            )
+            """
         )
-        """
-    )
-    # events table for visits
-    cur.execute(
-        """
-        CREATE TABLE IF NOT EXISTS events (
-            event_id SERIAL PRIMARY KEY,
-            timestamp TIMESTAMP WITH TIME ZONE NOT NULL,
-            sales_id INTEGER NOT NULL,
-            assignment_id INTEGER,
-            lat DOUBLE PRECISION,
-            long DOUBLE PRECISION,
-            notes TEXT,
-            photo_path TEXT
+        # superseded by events_daily_sales_rollup (one row per day serialized every check-in)
+        cur.execute("DROP TABLE IF EXISTS events_daily_rollup")
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS events_sales_rollup (
+                sales_id INTEGER PRIMARY KEY,
+                events BIGINT NOT NULL,
+                last_event_at TIMESTAMP WITH TIME ZONE
+            )
+            """
         )
-        """
-    )
-    conn.commit()
-    cur.close()
-    conn.close()
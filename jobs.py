@@ -0,0 +1,169 @@
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+
+PLANNER_MAX_WORKERS = int(os.getenv("PLANNER_MAX_WORKERS", str(os.cpu_count() or 1)))
+# Finished jobs are kept this long (seconds) for clients to fetch results
+JOB_RESULT_TTL = int(os.getenv("JOB_RESULT_TTL", "3600"))
+
+
+class JobNotFound(KeyError):
+    pass
+
+
+class Job:
+    def __init__(self, job_id, kind, future, cancel_event, progress=None):
+        self.job_id = job_id
+        self.kind = kind
+        self.future = future
+        self.cancel_event = cancel_event
+        self.progress = progress
+        self.cancel_requested = False
+        self.stop_requested = False
+        # True when the result was served from a cache instead of a worker
+        self.cached = False
+        # Newest progress update and its sequence number, so readers can spot new ones
+        self.latest_update = None
+        self.update_count = 0
+        self._poll_lock = threading.Lock()
+        self.submitted_at = time.time()
+        self.finished_at = None
+
+    @property
+    def status(self):
+        if self.future.cancelled():
+            return "cancelled"
+        if self.future.done():
+            if self.cancel_requested:
+                return "cancelled"
+            return "failed" if self.future.exception() is not None else "done"
+        if self.cancel_requested:
+            return "cancelling"
+        return "running" if self.future.running() else "queued"
+
+    def poll_updates(self):
+        """Pick up the worker's newest progress update; returns how many it has published"""
+        if self.progress is None:
+            return self.update_count
+        with self._poll_lock:
+            try:
+                latest = self.progress.get("latest")
+            except (EOFError, OSError):
+                return self.update_count
+            if latest is not None and latest[0] > self.update_count:
+                self.update_count, self.latest_update = latest
+            return self.update_count
+
+    def to_dict(self):
+        info = {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "status": self.status,
+            "submitted_at": self.submitted_at,
+            "finished_at": self.finished_at,
+            "updates": self.poll_updates(),
+            "cached": self.cached,
+        }
+        if info["status"] == "failed":
+            info["error"] = str(self.future.exception())
+        return info
+
+
+class JobManager:
+    """
+    Runs blocking work (e.g. OR-Tools solves) in a bounded process pool so the
+    API event loop never waits on it. Jobs get an id immediately; callers poll
+    status, fetch results or cancel. Every job function receives a
+    `cancel_event` keyword (multiprocessing Event) it should poll to stop early;
+    jobs submitted with_progress=True also get a `progress` dict whose "latest"
+    slot they overwrite with (sequence, update), so only the newest
+    intermediate result is ever held however fast they arrive.
+    """
+
+    def __init__(self, max_workers=PLANNER_MAX_WORKERS, result_ttl=JOB_RESULT_TTL):
+        self.max_workers = max_workers
+        self.result_ttl = result_ttl
+        self._executor = None
+        self._mp_manager = None
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        # Pool and event manager are created lazily so importing the API stays cheap
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            self._mp_manager = multiprocessing.Manager()
+
+    def submit(self, kind, fn, *args, with_progress=False, **kwargs):
+        with self._lock:
+            self._ensure_started()
+            self._prune()
+            job_id = uuid.uuid4().hex
+            cancel_event = self._mp_manager.Event()
+            progress = None
+            if with_progress:
+                progress = self._mp_manager.dict()
+                kwargs["progress"] = progress
+            future = self._executor.submit(fn, *args, cancel_event=cancel_event, **kwargs)
+            job = Job(job_id, kind, future, cancel_event, progress)
+            self._jobs[job_id] = job
+        future.add_done_callback(lambda _: setattr(job, "finished_at", time.time()))
+        return job
+
+    def completed(self, kind, result):
+        """Register an already-finished job (e.g. a cache hit) so clients can poll it as usual"""
+        future = Future()
+        future.set_result(result)
+        job = Job(uuid.uuid4().hex, kind, future, cancel_event=None)
+        job.cached = True
+        job.finished_at = time.time()
+        with self._lock:
+            self._prune()
+            self._jobs[job.job_id] = job
+        return job
+
+    def get(self, job_id):
+        job = self._jobs.get(job_id)
+        if job is None:
+            raise JobNotFound(job_id)
+        return job
+
+    def cancel(self, job_id):
+        """Cancel a queued job outright; ask a running one to stop at its next solution"""
+        job = self.get(job_id)
+        if job.future.done():
+            return job
+        job.cancel_requested = True
+        if not job.future.cancel():
+            job.cancel_event.set()
+        return job
+
+    def stop(self, job_id):
+        """Ask a running job to finish early and keep its best result so far"""
+        job = self.get(job_id)
+        if not job.future.done():
+            job.stop_requested = True
+            job.cancel_event.set()
+        return job
+
+    def list(self):
+        return [job.to_dict() for job in list(self._jobs.values())]
+
+    def _prune(self):
+        now = time.time()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished_at is not None and now - job.finished_at > self.result_ttl
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._mp_manager.shutdown()
+            self._executor = None
+            self._mp_manager = None
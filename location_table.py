@@ -0,0 +1,87 @@
+import sys
+import numpy as np
+import pandas as pd
+
+# node_type values and their codes in LocationTable.type_codes
+NODE_TYPES = ('starting_point', 'store')
+STARTING_POINT = 0
+STORE = 1
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class LocationTable:
+    """
+    Columnar location store in solver order: starting points first, then stores
+    (input order kept within each). lat/long are contiguous float64 arrays,
+    node_type is an int8 code into NODE_TYPES and node names are interned, so a
+    location index maps to its fields in O(1) without going through pandas.
+    Other input columns (e.g. visit_frequency) are kept as arrays in `attributes`.
+    """
+
+    def __init__(self, frame):
+        codes = frame['node_type'].map({node_type: code for code, node_type in enumerate(NODE_TYPES)})
+        # Rows with any other node_type are not part of the model
+        rows = np.flatnonzero(codes.notna().to_numpy())
+        codes = codes.to_numpy()[rows].astype(np.int8)
+        order = np.argsort(codes, kind='stable')
+        rows = rows[order]
+
+        self.type_codes = np.ascontiguousarray(codes[order])
+        self.nodes = np.array([_intern(node) for node in frame['node'].to_numpy()[rows].tolist()], dtype=object)
+        self.lat = np.ascontiguousarray(frame['lat'].to_numpy(dtype=np.float64)[rows])
+        self.long = np.ascontiguousarray(frame['long'].to_numpy(dtype=np.float64)[rows])
+        self.attributes = {
+            column: frame[column].to_numpy()[rows]
+            for column in frame.columns if column not in ('node', 'lat', 'long', 'node_type')
+        }
+        self.num_starting_points = int(np.count_nonzero(self.type_codes == STARTING_POINT))
+        self.num_stores = len(self.type_codes) - self.num_starting_points
+        self._positions = None
+
+    def __len__(self):
+        return len(self.type_codes)
+
+    @property
+    def store_nodes(self):
+        return self.nodes[self.num_starting_points:]
+
+    def _position_index(self):
+        # Built on first name lookup; keyed by str so '12' and 12 match as in the CSVs
+        if self._positions is None:
+            self._positions = {str(node): i for i, node in enumerate(self.nodes.tolist())}
+        return self._positions
+
+    def position(self, node, default=None):
+        """Location index of a node name, or default if unknown"""
+        return self._position_index().get(str(node), default)
+
+    def positions(self, nodes, missing=-1):
+        """Location indices for a sequence of node names (missing for unknown names)"""
+        index = self._position_index()
+        return np.array([index.get(str(node), missing) for node in nodes], dtype=np.int64)
+
+    def info(self, i):
+        """Route stop entry for a location index"""
+        return {
+            'node': self.nodes[i],
+            'lat': float(self.lat[i]),
+            'long': float(self.long[i]),
+            'type': NODE_TYPES[self.type_codes[i]]
+        }
+
+    def frame(self, positions=None):
+        """DataFrame view (node, lat, long, node_type and extra columns), built on demand"""
+        if positions is None:
+            positions = slice(None)
+        columns = {
+            'node': self.nodes[positions],
+            'lat': self.lat[positions],
+            'long': self.long[positions],
+            'node_type': np.asarray(NODE_TYPES, dtype=object)[self.type_codes[positions]]
+        }
+        for column, values in self.attributes.items():
+            columns[column] = values[positions]
+        return pd.DataFrame(columns)
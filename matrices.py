@@ -0,0 +1,152 @@
+import numpy as np
+
+# WGS-84 ellipsoid (same model geopy's geodesic uses)
+WGS84_A = 6378137.0
+WGS84_F = 1 / 298.257223563
+WGS84_B = WGS84_A * (1 - WGS84_F)
+EARTH_RADIUS_M = 6371008.8  # mean earth radius for haversine
+
+DISTANCE_MODES = ('geodesic', 'haversine')
+
+# Rows processed per block so temporaries stay bounded for large n
+ROW_BLOCK = 512
+
+
+def haversine_matrix(lat, lon):
+    """Great-circle distance matrix (meters, float) on a spherical earth"""
+    lat = np.radians(np.asarray(lat, dtype=float))
+    lon = np.radians(np.asarray(lon, dtype=float))
+    n = len(lat)
+    matrix = np.empty((n, n))
+    cos_lat = np.cos(lat)
+
+    for start in range(0, n, ROW_BLOCK):
+        stop = min(start + ROW_BLOCK, n)
+        dlat = lat[None, :] - lat[start:stop, None]
+        dlon = lon[None, :] - lon[start:stop, None]
+        a = (np.sin(dlat / 2) ** 2
+             + cos_lat[start:stop, None] * cos_lat[None, :] * np.sin(dlon / 2) ** 2)
+        matrix[start:stop] = 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+    return matrix
+
+
+def _vincenty_block(lat1, lon1, lat2, lon2, max_iter=200, tol=1e-12):
+    """Vectorized Vincenty inverse formula on the WGS-84 ellipsoid (flat arrays)"""
+    f, a, b = WGS84_F, WGS84_A, WGS84_B
+    L = lon2 - lon1
+    U1 = np.arctan((1 - f) * np.tan(lat1))
+    U2 = np.arctan((1 - f) * np.tan(lat2))
+    sinU1, cosU1 = np.sin(U1), np.cos(U1)
+    sinU2, cosU2 = np.sin(U2), np.cos(U2)
+
+    size = len(L)
+    lam = L.copy()
+    sin_sigma = np.zeros(size)
+    cos_sigma = np.ones(size)
+    sigma = np.zeros(size)
+    cos_sq_alpha = np.ones(size)
+    cos2_sigma_m = np.zeros(size)
+    # Only pairs that have not converged yet are iterated
+    idx = np.arange(size)
+
+    for _ in range(max_iter):
+        s1, c1, s2, c2 = sinU1[idx], cosU1[idx], sinU2[idx], cosU2[idx]
+        lam_i = lam[idx]
+        sin_lam, cos_lam = np.sin(lam_i), np.cos(lam_i)
+        ss = np.hypot(c2 * sin_lam, c1 * s2 - s1 * c2 * cos_lam)
+        cs = s1 * s2 + c1 * c2 * cos_lam
+        sg = np.arctan2(ss, cs)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            sin_alpha = np.where(ss == 0, 0.0, c1 * c2 * sin_lam / ss)
+            csa = 1 - sin_alpha ** 2
+            # Equatorial lines have cos_sq_alpha == 0
+            c2sm = np.where(csa == 0, 0.0, cs - 2 * s1 * s2 / csa)
+        C = f / 16 * csa * (4 + f * (4 - 3 * csa))
+        lam_new = L[idx] + (1 - C) * f * sin_alpha * (
+            sg + C * ss * (c2sm + C * cs * (-1 + 2 * c2sm ** 2))
+        )
+        sin_sigma[idx], cos_sigma[idx], sigma[idx] = ss, cs, sg
+        cos_sq_alpha[idx], cos2_sigma_m[idx] = csa, c2sm
+        lam[idx] = lam_new
+        idx = idx[np.abs(lam_new - lam_i) > tol]
+        if not len(idx):
+            break
+
+    u_sq = cos_sq_alpha * (a ** 2 - b ** 2) / b ** 2
+    A = 1 + u_sq / 16384 * (4096 + u_sq * (-768 + u_sq * (320 - 175 * u_sq)))
+    B = u_sq / 1024 * (256 + u_sq * (-128 + u_sq * (74 - 47 * u_sq)))
+    delta_sigma = B * sin_sigma * (
+        cos2_sigma_m + B / 4 * (
+            cos_sigma * (-1 + 2 * cos2_sigma_m ** 2)
+            - B / 6 * cos2_sigma_m * (-3 + 4 * sin_sigma ** 2) * (-3 + 4 * cos2_sigma_m ** 2)
+        )
+    )
+    distance = b * A * (sigma - delta_sigma)
+    # Nearly antipodal pairs may not converge; return NaN so caller can fall back
+    distance[idx] = np.nan
+    return distance
+
+
+def geodesic_matrix(lat, lon):
+    """Ellipsoidal (WGS-84) distance matrix (meters, float)"""
+    lat = np.radians(np.asarray(lat, dtype=float))
+    lon = np.radians(np.asarray(lon, dtype=float))
+    n = len(lat)
+    matrix = np.empty((n, n))
+
+    for start in range(0, n, ROW_BLOCK):
+        stop = min(start + ROW_BLOCK, n)
+        shape = (stop - start, n)
+        lat1 = np.broadcast_to(lat[start:stop, None], shape).ravel()
+        lon1 = np.broadcast_to(lon[start:stop, None], shape).ravel()
+        lat2 = np.broadcast_to(lat[None, :], shape).ravel()
+        lon2 = np.broadcast_to(lon[None, :], shape).ravel()
+        matrix[start:stop] = _vincenty_block(lat1, lon1, lat2, lon2).reshape(shape)
+
+    unresolved = np.argwhere(np.isnan(matrix))
+    if len(unresolved):
+        from geopy.distance import geodesic
+        deg_lat, deg_lon = np.degrees(lat), np.degrees(lon)
+        for i, j in unresolved:
+            matrix[i, j] = geodesic((deg_lat[i], deg_lon[i]), (deg_lat[j], deg_lon[j])).meters
+
+    return matrix
+
+
+def pairwise_distances(lat1, lon1, lat2, lon2, mode='geodesic'):
+    """Element-wise distances (meters, float) between two broadcastable coordinate arrays"""
+    lat1, lon1, lat2, lon2 = np.broadcast_arrays(
+        *(np.radians(np.asarray(x, dtype=float)) for x in (lat1, lon1, lat2, lon2))
+    )
+    shape = lat1.shape
+    if mode == 'haversine':
+        a = (np.sin((lat2 - lat1) / 2) ** 2
+             + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+        return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+    if mode != 'geodesic':
+        raise ValueError(f"Unknown distance_mode '{mode}', expected one of {DISTANCE_MODES}")
+
+    distance = _vincenty_block(lat1.ravel(), lon1.ravel(), lat2.ravel(), lon2.ravel())
+    unresolved = np.flatnonzero(np.isnan(distance))
+    if len(unresolved):
+        from geopy.distance import geodesic
+        flat = [np.degrees(x.ravel()) for x in (lat1, lon1, lat2, lon2)]
+        for i in unresolved:
+            distance[i] = geodesic((flat[0][i], flat[1][i]), (flat[2][i], flat[3][i])).meters
+    return distance.reshape(shape)
+
+
+def build_distance_matrix(lat, lon, mode='geodesic'):
+    """
+    Build an n x n integer distance matrix in meters from coordinate arrays.
+    mode: 'geodesic' (WGS-84 ellipsoid) or 'haversine' (spherical, faster)
+    """
+    if mode == 'geodesic':
+        matrix = geodesic_matrix(lat, lon)
+    elif mode == 'haversine':
+        matrix = haversine_matrix(lat, lon)
+    else:
+        raise ValueError(f"Unknown distance_mode '{mode}', expected one of {DISTANCE_MODES}")
+    np.fill_diagonal(matrix, 0)
+    return matrix.astype(int)
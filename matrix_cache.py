@@ -0,0 +1,97 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import numpy as np
+
+MATRIX_CACHE_DIR = os.getenv("MATRIX_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".matrix_cache"))
+MATRIX_CACHE_MAX_MB = float(os.getenv("MATRIX_CACHE_MAX_MB", "2048"))
+
+
+def matrix_fingerprint(nodes, lat, lon, distance_mode, avg_speed_kmh):
+    """Hash of everything the distance/time matrices depend on (order-sensitive)"""
+    h = hashlib.sha256()
+    h.update("\x1f".join(str(n) for n in nodes).encode("utf-8"))
+    h.update(np.ascontiguousarray(lat, dtype=np.float64).tobytes())
+    h.update(np.ascontiguousarray(lon, dtype=np.float64).tobytes())
+    h.update(f"{distance_mode}|{float(avg_speed_kmh)}".encode("utf-8"))
+    return h.hexdigest()
+
+
+class MatrixCache:
+    """
+    On-disk cache of distance/time matrices stored as .npy files.
+    Entries are opened with memory mapping (read-only) so a hit does not copy
+    the n x n data into the process heap. Eviction is LRU by total size on disk.
+    """
+
+    def __init__(self, cache_dir=MATRIX_CACHE_DIR, max_bytes=int(MATRIX_CACHE_MAX_MB * 1024 * 1024)):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _entry_dir(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def get(self, key):
+        """Return (distance_matrix, time_matrix) memmaps, or None on a miss"""
+        entry = self._entry_dir(key)
+        try:
+            distance = np.load(os.path.join(entry, "distance.npy"), mmap_mode="r")
+            time_matrix = np.load(os.path.join(entry, "time.npy"), mmap_mode="r")
+        except (FileNotFoundError, ValueError, OSError):
+            return None
+        # Mark as recently used for LRU eviction
+        try:
+            os.utime(entry)
+        except OSError:
+            pass
+        return distance, time_matrix
+
+    def put(self, key, distance_matrix, time_matrix):
+        """Store matrices and return them re-opened as memmaps"""
+        entry = self._entry_dir(key)
+        if not os.path.isdir(entry):
+            # Write into a temp dir and rename so readers never see a partial entry
+            tmp = tempfile.mkdtemp(prefix=".tmp_", dir=self.cache_dir)
+            try:
+                np.save(os.path.join(tmp, "distance.npy"), np.asarray(distance_matrix))
+                np.save(os.path.join(tmp, "time.npy"), np.asarray(time_matrix))
+                os.rename(tmp, entry)
+            except OSError:
+                # Another process stored the same key first
+                shutil.rmtree(tmp, ignore_errors=True)
+        self.evict()
+        return self.get(key) or (distance_matrix, time_matrix)
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name.startswith(".") or not os.path.isdir(path):
+                continue
+            try:
+                size = sum(e.stat().st_size for e in os.scandir(path))
+                entries.append((os.stat(path).st_mtime, size, path))
+            except FileNotFoundError:
+                continue
+        return entries
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes"""
+        with self._lock:
+            entries = sorted(self._entries())
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                # Already-open memmaps stay valid after unlink on POSIX
+                shutil.rmtree(path, ignore_errors=True)
+                total -= size
+
+    def clear(self):
+        with self._lock:
+            for _, _, path in self._entries():
+                shutil.rmtree(path, ignore_errors=True)
@@ -1,5 +1,107 @@
 import math
+import os
+import threading
+import time
+from bisect import bisect_left, insort
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any
+import numpy as np
+
+# optional OR-Tools import: CP-SAT packing falls back to the best-fit heuristic without it
+try:
+    from ortools.sat.python import cp_model  # type: ignore
+except Exception:
+    cp_model = None
+
+# Default CP-SAT time limit for worker packing (seconds); constraints['packing_time_limit_seconds'] overrides
+PACKING_TIME_LIMIT_SECONDS = float(os.getenv("PACKING_TIME_LIMIT_SECONDS", "2"))
+# Above this many route x worker variables only the best-fit heuristic is used
+PACKING_MAX_CP_VARIABLES = int(os.getenv("PACKING_MAX_CP_VARIABLES", "200000"))
+# Threads evaluating algorithms / constraint sets concurrently (CP-SAT releases the GIL)
+OPTIMIZER_MAX_WORKERS = int(os.getenv("OPTIMIZER_MAX_WORKERS", str(min(8, os.cpu_count() or 1))))
+# Best-fit looks at this many of the tightest bins on the key dimension for one that fits the other
+BEST_FIT_SCAN = 256
+
+
+def _route_metrics(routes: List[Dict]):
+    """Weekly distance (km) and hours per route as float arrays, from each route's metrics block (0 if missing)"""
+    distance_km = np.fromiter(
+        (r.get('metrics', {}).get('distance_km', 0) or 0 for r in routes),
+        dtype=float, count=len(routes)
+    )
+    hours = np.fromiter(
+        ((r.get('metrics', {}).get('eta_minutes', 0) or 0) / 60 for r in routes),
+        dtype=float, count=len(routes)
+    )
+    return distance_km, hours
+
+
+def _first_fit_decreasing(sizes, capacity):
+    """
+    First-fit decreasing bin loads in O(n log n): a max segment tree over each bin's
+    remaining capacity finds the leftmost bin an item fits in. Items larger than the
+    capacity open a bin of their own, as before.
+    """
+    items = sorted(sizes, reverse=True)
+    leaves = 1
+    while leaves < len(items):
+        leaves *= 2
+    tree = [capacity] * (2 * leaves)
+    loads = []
+    for item in items:
+        if tree[1] >= item:
+            node = 1
+            while node < leaves:
+                node = 2 * node if tree[2 * node] >= item else 2 * node + 1
+            b = node - leaves
+        else:
+            b = len(loads)
+            node = b + leaves
+        if b == len(loads):
+            loads.append(0)
+        loads[b] += item
+        tree[node] = capacity - loads[b]
+        node //= 2
+        while node:
+            tree[node] = max(tree[2 * node], tree[2 * node + 1])
+            node //= 2
+    return loads
+
+
+def _route_id(route: Dict, index: int):
+    return route.get('route_id', route.get('id', index))
+
+
+class RouteMetrics:
+    """
+    Route totals as columns, extracted from the route dicts once and shared by every
+    algorithm and constraint set. Algorithms accept this in place of the routes list.
+    """
+
+    def __init__(self, routes: List[Dict]):
+        self.routes = routes
+        self.distance_km, self.hours = _route_metrics(routes)
+        self.total_distance_km = float(self.distance_km.sum())
+        self.total_time_hours = float(self.hours.sum())
+        self._first_fit = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.routes)
+
+    def first_fit_loads(self, capacity_km):
+        """First-fit decreasing distance loads, computed once per capacity"""
+        with self._lock:
+            loads = self._first_fit.get(capacity_km)
+        if loads is None:
+            loads = _first_fit_decreasing(self.distance_km.tolist(), capacity_km)
+            with self._lock:
+                self._first_fit[capacity_km] = loads
+        return list(loads)
+
+
+def _as_metrics(routes):
+    return routes if isinstance(routes, RouteMetrics) else RouteMetrics(routes)
 
 # ---- Basic Optimizer ----
 class BeatPlanningOptimizer:
@@ -30,10 +132,25 @@ class BeatPlanningOptimizer:
 # ---- Advanced Multi-Algorithm Optimizer ----
 class AdvancedBeatPlanningOptimizer:
     """
-    Multiple algorithms: basic, greedy bin-packing, constraint satisfaction, LP, bin packing.
+    Multiple algorithms: basic, greedy bin-packing, constraint satisfaction, LP, bin packing,
+    two-dimensional packing (CP-SAT / best fit). Every algorithm takes the routes list or
+    a RouteMetrics built from it.
     """
-    def basic_algorithm(self, routes: List[Dict], constraints: Dict) -> Dict:
-        total_distance_km = sum(r.get('metrics', {}).get('distance_km', 0) for r in routes)
+    ALGORITHMS = {
+        'basic': 'basic_algorithm',
+        'greedy': 'greedy_algorithm',
+        'constraint_satisfaction': 'constraint_satisfaction_algorithm',
+        'linear_programming': 'linear_programming_approach',
+        'bin_packing': 'bin_packing_algorithm',
+        'best_fit_packing': 'best_fit_packing_algorithm',
+        'cp_sat_packing': 'cp_sat_packing_algorithm'
+    }
+    # Run when no algorithms are named; cp_sat_packing is opt-in as it may use its whole time limit
+    DEFAULT_ALGORITHMS = ('basic', 'greedy', 'constraint_satisfaction', 'linear_programming',
+                          'bin_packing', 'best_fit_packing')
+
+    def basic_algorithm(self, routes, constraints: Dict) -> Dict:
+        total_distance_km = _as_metrics(routes).total_distance_km
         max_weekly_distance_km = constraints['max_daily_distance_km'] * constraints['working_days_per_week']
         min_workers = math.ceil(total_distance_km / max_weekly_distance_km)
         return {
@@ -44,21 +161,11 @@ class AdvancedBeatPlanningOptimizer:
             'utilization': (total_distance_km / (max_weekly_distance_km * min_workers)) * 100 if min_workers else 0,
         }
 
-    def greedy_algorithm(self, routes: List[Dict], constraints: Dict) -> Dict:
-        sorted_routes = sorted(routes, key=lambda x: x.get('metrics', {}).get('distance_km', 0), reverse=True)
+    def greedy_algorithm(self, routes, constraints: Dict) -> Dict:
+        metrics = _as_metrics(routes)
         max_weekly_capacity_km = constraints['max_daily_distance_km'] * constraints['working_days_per_week']
-        workers = []
-        for route in sorted_routes:
-            route_distance = route.get('metrics', {}).get('distance_km', 0)
-            assigned = False
-            for i, worker_load in enumerate(workers):
-                if worker_load + route_distance <= max_weekly_capacity_km:
-                    workers[i] += route_distance
-                    assigned = True
-                    break
-            if not assigned:
-                workers.append(route_distance)
-        total_distance_km = sum(r.get('metrics', {}).get('distance_km', 0) for r in routes)
+        workers = metrics.first_fit_loads(max_weekly_capacity_km)
+        total_distance_km = metrics.total_distance_km
         total_capacity_km = len(workers) * max_weekly_capacity_km
         return {
             'algorithm': 'greedy',
@@ -69,11 +176,12 @@ class AdvancedBeatPlanningOptimizer:
             'utilization': (total_distance_km / total_capacity_km) * 100 if total_capacity_km else 0
         }
 
-    def constraint_satisfaction_algorithm(self, routes: List[Dict], constraints: Dict) -> Dict:
+    def constraint_satisfaction_algorithm(self, routes, constraints: Dict) -> Dict:
+        metrics = _as_metrics(routes)
         max_weekly_distance_km = constraints['max_daily_distance_km'] * constraints['working_days_per_week']
         max_weekly_hours = constraints['working_hours_per_day'] * constraints['working_days_per_week']
-        total_distance_km = sum(r.get('metrics', {}).get('distance_km', 0) for r in routes)
-        total_time_hours = sum(r.get('metrics', {}).get('eta_minutes', 0) / 60 for r in routes)
+        total_distance_km = metrics.total_distance_km
+        total_time_hours = metrics.total_time_hours
         workers_by_distance = math.ceil(total_distance_km / max_weekly_distance_km)
         workers_by_time = math.ceil(total_time_hours / max_weekly_hours) if total_time_hours > 0 else 0
         min_workers = max(workers_by_distance, workers_by_time)
@@ -89,9 +197,10 @@ class AdvancedBeatPlanningOptimizer:
             'utilization': (total_distance_km / (max_weekly_distance_km * min_workers)) * 100 if min_workers else 0
         }
 
-    def linear_programming_approach(self, routes: List[Dict], constraints: Dict) -> Dict:
-        total_distance_km = sum(r.get('metrics', {}).get('distance_km', 0) for r in routes)
-        total_time_hours = sum(r.get('metrics', {}).get('eta_minutes', 0) / 60 for r in routes)
+    def linear_programming_approach(self, routes, constraints: Dict) -> Dict:
+        metrics = _as_metrics(routes)
+        total_distance_km = metrics.total_distance_km
+        total_time_hours = metrics.total_time_hours
         max_weekly_distance_km = constraints['max_daily_distance_km'] * constraints['working_days_per_week']
         max_weekly_hours = constraints['working_hours_per_day'] * constraints['working_days_per_week']
         min_workers_distance = math.ceil(total_distance_km / max_weekly_distance_km)
@@ -107,20 +216,11 @@ class AdvancedBeatPlanningOptimizer:
             'utilization': (total_distance_km / (max_weekly_distance_km * optimal_workers)) * 100 if optimal_workers else 0
         }
 
-    def bin_packing_algorithm(self, routes: List[Dict], constraints: Dict) -> Dict:
+    def bin_packing_algorithm(self, routes, constraints: Dict) -> Dict:
+        metrics = _as_metrics(routes)
         max_weekly_capacity_km = constraints['max_daily_distance_km'] * constraints['working_days_per_week']
-        items = sorted([r.get('metrics', {}).get('distance_km', 0) for r in routes], reverse=True)
-        bins = []
-        for item in items:
-            placed = False
-            for i, bin_load in enumerate(bins):
-                if bin_load + item <= max_weekly_capacity_km:
-                    bins[i] += item
-                    placed = True
-                    break
-            if not placed:
-                bins.append(item)
-        total_distance_km = sum(items)
+        bins = metrics.first_fit_loads(max_weekly_capacity_km)
+        total_distance_km = metrics.total_distance_km
         total_capacity_km = len(bins) * max_weekly_capacity_km
         return {
             'algorithm': 'bin_packing',
@@ -131,21 +231,268 @@ class AdvancedBeatPlanningOptimizer:
             'utilization': (total_distance_km / total_capacity_km) * 100 if total_capacity_km else 0
         }
 
-    def compare_algorithms(self, routes: List[Dict], constraints: Dict) -> Dict:
-        results = {}
-        results['basic'] = self.basic_algorithm(routes, constraints)
-        results['greedy'] = self.greedy_algorithm(routes, constraints)
-        results['constraint_satisfaction'] = self.constraint_satisfaction_algorithm(routes, constraints)
-        results['linear_programming'] = self.linear_programming_approach(routes, constraints)
-        results['bin_packing'] = self.bin_packing_algorithm(routes, constraints)
+    @staticmethod
+    def _best_fit(distance_km, hours, max_distance_km, max_hours, order=None):
+        """
+        Best-fit decreasing over both dimensions. Bins are kept in a sorted list by
+        remaining capacity on the tighter dimension; each route goes to the tightest bin
+        that fits it there (bisect) among the next BEST_FIT_SCAN that also fit the other
+        dimension. Searches are O(log bins), but re-sorting a bin (list del + insort)
+        shifts the list, so a placement is O(bins) and the worst case O(n * bins); the
+        shifts are a memmove, fast in practice. Bins with no room left for any remaining
+        route on the other dimension are dropped from the search. Routes that alone
+        exceed a weekly limit get a worker of their own.
+        Returns (bin index per route, bin distance loads, bin hour loads).
+        """
+        n = len(distance_km)
+        if order is None:
+            order = np.argsort(-np.maximum(distance_km / max_distance_km, hours / max_hours), kind='stable')
+        key_is_distance = distance_km.sum() / max_distance_km >= hours.sum() / max_hours
+        key_size, key_capacity = (distance_km, max_distance_km) if key_is_distance else (hours, max_hours)
+        other_size, other_capacity = (hours, max_hours) if key_is_distance else (distance_km, max_distance_km)
+        
+        assignment = np.empty(n, dtype=np.int64)
+        key_load, other_load = [], []
+        residuals = []  # sorted (remaining key capacity, bin)
+        # Smallest other-dimension size still to come: bins with less room than that are closed
+        remaining_other_min = np.minimum.accumulate(other_size[order][::-1])[::-1].tolist()
+        for position, i in enumerate(order.tolist()):
+            size, other = key_size[i], other_size[i]
+            chosen = None
+            if size <= key_capacity + 1e-9 and other <= other_capacity + 1e-9:
+                j = bisect_left(residuals, (size - 1e-9,))
+                scanned = 0
+                while j < len(residuals) and scanned < BEST_FIT_SCAN:
+                    b = residuals[j][1]
+                    room = other_capacity - other_load[b]
+                    if other <= room + 1e-9:
+                        chosen = b
+                        del residuals[j]
+                        break
+                    if room + 1e-9 < remaining_other_min[position]:
+                        del residuals[j]
+                        continue
+                    j += 1
+                    scanned += 1
+            if chosen is None:
+                chosen = len(key_load)
+                key_load.append(0.0)
+                other_load.append(0.0)
+                oversized = size > key_capacity + 1e-9 or other > other_capacity + 1e-9
+            else:
+                oversized = False
+            key_load[chosen] += size
+            other_load[chosen] += other
+            assignment[i] = chosen
+            if not oversized:
+                insort(residuals, (key_capacity - key_load[chosen], chosen))
+        
+        if key_is_distance:
+            return assignment, key_load, other_load
+        return assignment, other_load, key_load
+    
+    def _packing_result(self, algorithm, metrics, max_distance_km, max_hours,
+                        assignment, status, lower_bound, started):
+        routes, distance_km, hours = metrics.routes, metrics.distance_km, metrics.hours
+        num_workers = int(assignment.max()) + 1 if len(assignment) else 0
+        loads_km = np.bincount(assignment, weights=distance_km, minlength=num_workers)
+        loads_hours = np.bincount(assignment, weights=hours, minlength=num_workers)
+        worker_routes = [[] for _ in range(num_workers)]
+        for index, worker in enumerate(assignment.tolist()):
+            worker_routes[worker].append(_route_id(routes[index], index))
+        oversized = (distance_km > max_distance_km + 1e-9) | (hours > max_hours + 1e-9)
+        total_distance_km = metrics.total_distance_km
+        total_capacity_km = num_workers * max_distance_km
+        return {
+            'algorithm': algorithm,
+            'min_workers': num_workers,
+            'status': status,
+            'lower_bound': lower_bound,
+            'optimality_gap': round((num_workers - lower_bound) / num_workers, 4) if num_workers else 0.0,
+            'worker_loads_km': loads_km.tolist(),
+            'worker_loads_hours': loads_hours.tolist(),
+            'worker_routes': worker_routes,
+            'oversized_routes': [_route_id(routes[i], int(i)) for i in np.flatnonzero(oversized)],
+            'total_distance_km': total_distance_km,
+            'total_time_hours': metrics.total_time_hours,
+            'total_capacity_km': total_capacity_km,
+            'utilization': (total_distance_km / total_capacity_km) * 100 if total_capacity_km else 0,
+            'solve_seconds': round(time.time() - started, 3)
+        }
+    
+    @staticmethod
+    def _packing_lower_bound(distance_km, hours, max_distance_km, max_hours):
+        """Oversized routes need a worker each; the rest need at least the summed load per dimension"""
+        oversized = (distance_km > max_distance_km + 1e-9) | (hours > max_hours + 1e-9)
+        rest = ~oversized
+        return int(oversized.sum()) + max(
+            math.ceil(distance_km[rest].sum() / max_distance_km - 1e-9),
+            math.ceil(hours[rest].sum() / max_hours - 1e-9),
+            0
+        )
+    
+    @staticmethod
+    def _packing_limits(constraints: Dict):
+        """Weekly distance and hour limits of one worker; both must be positive"""
+        max_distance_km = constraints['max_daily_distance_km'] * constraints['working_days_per_week']
+        max_hours = constraints['working_hours_per_day'] * constraints['working_days_per_week']
+        if not max_distance_km > 0 or not max_hours > 0:
+            raise ValueError(
+                "max_daily_distance_km, working_hours_per_day and working_days_per_week must be > 0 for packing"
+            )
+        return max_distance_km, max_hours
+    
+    def best_fit_packing_algorithm(self, routes, constraints: Dict) -> Dict:
+        """Pack routes into workers on weekly distance and weekly hours with the best-fit heuristic"""
+        started = time.time()
+        max_distance_km, max_hours = self._packing_limits(constraints)
+        metrics = _as_metrics(routes)
+        distance_km, hours = metrics.distance_km, metrics.hours
+        assignment, _, _ = self._best_fit(distance_km, hours, max_distance_km, max_hours)
+        lower_bound = self._packing_lower_bound(distance_km, hours, max_distance_km, max_hours)
+        num_workers = int(assignment.max()) + 1 if len(assignment) else 0
+        return self._packing_result('best_fit', metrics, max_distance_km, max_hours, assignment,
+                                    'OPTIMAL' if num_workers == lower_bound else 'HEURISTIC', lower_bound, started)
+    
+    def cp_sat_packing_algorithm(self, routes, constraints: Dict, num_search_workers=None) -> Dict:
+        """
+        Exact two-dimensional packing (weekly distance and weekly hours) with CP-SAT,
+        warm-started from best fit and stopped at the time limit; optimality_gap is
+        (workers - best proven bound) / workers. Returns best fit directly when it
+        already meets the lower bound, and falls back to it when CP-SAT is unavailable,
+        the model would be too large or no solution comes back.
+        num_search_workers: CP-SAT threads (default: all cores).
+        """
+        started = time.time()
+        max_distance_km, max_hours = self._packing_limits(constraints)
+        time_limit = float(constraints.get('packing_time_limit_seconds', PACKING_TIME_LIMIT_SECONDS))
+        metrics = _as_metrics(routes)
+        distance_km, hours = metrics.distance_km, metrics.hours
+        # Integer sizes (meters, seconds): items rounded up, capacities down, so packings stay valid.
+        # Best fit runs on these too, so its packing is a feasible hint for the model.
+        item_distance = np.ceil(distance_km * 1000)
+        item_time = np.ceil(hours * 3600)
+        capacity_distance = int(math.floor(max_distance_km * 1000))
+        capacity_time = int(math.floor(max_hours * 3600))
+        order = np.argsort(-np.maximum(item_distance / capacity_distance, item_time / capacity_time), kind='stable')
+        assignment, _, _ = self._best_fit(item_distance, item_time, capacity_distance, capacity_time, order)
+        lower_bound = self._packing_lower_bound(distance_km, hours, max_distance_km, max_hours)
+        upper_bound = int(assignment.max()) + 1 if len(assignment) else 0
+        
+        if upper_bound <= lower_bound:
+            return self._packing_result('best_fit', metrics, max_distance_km, max_hours,
+                                        assignment, 'OPTIMAL', lower_bound, started)
+        if cp_model is None or time_limit <= 0 or len(metrics) * upper_bound > PACKING_MAX_CP_VARIABLES:
+            return self._packing_result('best_fit', metrics, max_distance_km, max_hours,
+                                        assignment, 'HEURISTIC', lower_bound, started)
+        
+        # Oversized routes keep a worker each; only the rest go into the model, largest first
+        oversized = (item_distance > capacity_distance) | (item_time > capacity_time)
+        packable = [i for i in order.tolist() if not oversized[i]]
+        num_oversized = len(metrics) - len(packable)
+        max_bins = upper_bound - num_oversized
+        hint_bin = {}
+        for i in packable:
+            hint_bin.setdefault(int(assignment[i]), len(hint_bin))
+        item_distance = item_distance.astype(int).tolist()
+        item_time = item_time.astype(int).tolist()
+        
+        model = cp_model.CpModel()
+        used = [model.NewBoolVar(f"used_{b}") for b in range(max_bins)]
+        place = {}
+        bin_members = [[] for _ in range(max_bins)]
+        # Symmetry breaking: the r-th largest route may only open one of the first r + 1 workers
+        for rank, i in enumerate(packable):
+            place[i] = {b: model.NewBoolVar(f"x_{i}_{b}") for b in range(min(rank + 1, max_bins))}
+            model.AddExactlyOne(place[i].values())
+            for b, var in place[i].items():
+                bin_members[b].append((i, var))
+                model.AddImplication(var, used[b])
+                model.AddHint(var, hint_bin[int(assignment[i])] == b)
+        for b, members in enumerate(bin_members):
+            model.Add(sum(item_distance[i] * var for i, var in members) <= capacity_distance * used[b])
+            model.Add(sum(item_time[i] * var for i, var in members) <= capacity_time * used[b])
+            model.AddHint(used[b], b < len(hint_bin))
+        for b in range(max_bins - 1):
+            model.AddImplication(used[b + 1], used[b])
+        model.Add(sum(used) >= lower_bound - num_oversized)
+        model.Minimize(sum(used))
+        
+        solver = cp_model.CpSolver()
+        solver.parameters.max_time_in_seconds = time_limit
+        # Presolve of this model can take seconds and gains little; without it the complete
+        # best-fit hint is the first solution, so the result is never worse than best fit
+        solver.parameters.cp_model_presolve = False
+        if num_search_workers:
+            solver.parameters.num_workers = num_search_workers
+        status = solver.Solve(model)
+        if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            return self._packing_result('best_fit', metrics, max_distance_km, max_hours,
+                                        assignment, 'HEURISTIC', lower_bound, started)
+        
+        bins = {}
+        exact = np.empty(len(metrics), dtype=np.int64)
+        for i, vars_ in place.items():
+            b = next(b for b, var in vars_.items() if solver.Value(var))
+            exact[i] = bins.setdefault(b, len(bins))
+        for i in np.flatnonzero(oversized).tolist():
+            exact[i] = len(bins)
+            bins[('oversized', i)] = exact[i]
+        proven_bound = max(lower_bound, num_oversized + int(math.ceil(solver.BestObjectiveBound() - 1e-9)))
+        return self._packing_result('cp_sat', metrics, max_distance_km, max_hours, exact,
+                                    solver.StatusName(status), proven_bound, started)
+    
+    @staticmethod
+    def _summarize(results: Dict) -> Dict:
         worker_counts = {k: v.get('min_workers', v.get('optimal_workers', float('inf'))) for k, v in results.items()}
         best_algo = min(worker_counts, key=worker_counts.get)
-        results['comparison_summary'] = {
+        summary = {
             'best_algorithm': best_algo,
             'worker_counts': worker_counts
         }
+        packing = results.get('cp_sat_packing') or results.get('best_fit_packing')
+        if packing:
+            # Smallest assignment found that respects both weekly distance and weekly hours
+            summary['recommended_workers'] = packing['min_workers']
+            summary['packing_optimality_gap'] = packing['optimality_gap']
+        return summary
+
+    def compare_constraint_sets(self, routes, constraint_sets: List[Dict], algorithms=None,
+                                max_workers=OPTIMIZER_MAX_WORKERS) -> List[Dict]:
+        """
+        Run the algorithms for every constraint set on one shared RouteMetrics, each
+        (constraint set, algorithm) pair concurrently in a thread pool. Concurrent
+        CP-SAT packings split the cores between them instead of each using all of them.
+        Returns one compare_algorithms-style result per constraint set, in order.
+        """
+        metrics = _as_metrics(routes)
+        algorithms = list(algorithms or self.DEFAULT_ALGORITHMS)
+        unknown = [name for name in algorithms if name not in self.ALGORITHMS]
+        if unknown:
+            raise ValueError(f"Unknown algorithms: {unknown}")
+        max_workers = max(1, max_workers)
+        concurrent_cp_sat = min(len(constraint_sets), max_workers) if 'cp_sat_packing' in algorithms else 0
+        cp_sat_threads = max(1, (os.cpu_count() or 1) // max(concurrent_cp_sat, 1))
+        results = [{} for _ in constraint_sets]
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {}
+            for i, constraints in enumerate(constraint_sets):
+                for name in algorithms:
+                    algorithm = getattr(self, self.ALGORITHMS[name])
+                    if name == 'cp_sat_packing':
+                        futures[(i, name)] = pool.submit(algorithm, metrics, constraints,
+                                                         num_search_workers=cp_sat_threads)
+                    else:
+                        futures[(i, name)] = pool.submit(algorithm, metrics, constraints)
+            for (i, name), future in futures.items():
+                results[i][name] = future.result()
+        for result in results:
+            result['comparison_summary'] = self._summarize(result)
         return results
 
+    def compare_algorithms(self, routes, constraints: Dict, algorithms=None) -> Dict:
+        return self.compare_constraint_sets(routes, [constraints], algorithms)[0]
+
 # ---- Example Usage ----
 if __name__ == "__main__":
     # Sample constraints
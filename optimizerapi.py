@@ -1,8 +1,10 @@
 
+import time
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
-from typing import List, Dict, Any
-from optimizer import BeatPlanningOptimizer, AdvancedBeatPlanningOptimizer
+from typing import List, Dict, Any, Optional
+from optimizer import BeatPlanningOptimizer, AdvancedBeatPlanningOptimizer, RouteMetrics
 from middleware import add_cors_middleware
 
 
@@ -18,7 +20,11 @@ class BasicOptimizeRequest(BaseModel):
 
 class AdvancedOptimizeRequest(BaseModel):
     routes: List[Dict[str, Any]]
-    constraints: Dict[str, Any]
+    constraints: Optional[Dict[str, Any]] = None
+    # Several what-if constraint sets evaluated against the same routes in one call
+    constraint_sets: Optional[List[Dict[str, Any]]] = None
+    # Algorithms to run (default: all but the opt-in cp_sat_packing)
+    algorithms: Optional[List[str]] = None
 
 @app.post("/optimize_workers_basic")
 def optimize_workers_basic(req: BasicOptimizeRequest):
@@ -39,15 +45,20 @@ def optimize_workers_basic(req: BasicOptimizeRequest):
 
 @app.post("/optimize_workers_advanced")
 def optimize_workers_advanced(req: AdvancedOptimizeRequest):
-    print(f"[Optimizer] Starting advanced optimization...")
-    print(f"Number of routes: {len(req.routes)}")
-    print(f"Constraints: {req.constraints}")
-    for idx, route in enumerate(req.routes):
-        print(f"Route {idx+1}: Salesperson {route.get('salespersonName', '')} (ID: {route.get('salespersonId', '')}), Stops: {len(route.get('stops', []))}")
+    if req.constraints is None and not req.constraint_sets:
+        return JSONResponse(content={"error": "Provide constraints or constraint_sets"}, status_code=400)
+    constraint_sets = req.constraint_sets or [req.constraints]
+    print(f"[Optimizer] Starting advanced optimization: {len(req.routes)} routes, {len(constraint_sets)} constraint set(s)")
+    started = time.time()
     optimizer = AdvancedBeatPlanningOptimizer()
-    result = optimizer.compare_algorithms(req.routes, req.constraints)
-    print(f"Best algorithm: {result['comparison_summary']['best_algorithm']}")
-    print(f"Worker counts by algorithm: {result['comparison_summary']['worker_counts']}")
-    print(f"Full results for best algorithm: {result[result['comparison_summary']['best_algorithm']]}")
-    print(f"[Optimizer] Advanced optimization complete.\n")
-    return result
+    try:
+        results = optimizer.compare_constraint_sets(RouteMetrics(req.routes), constraint_sets, req.algorithms)
+    except (KeyError, ValueError, ZeroDivisionError) as e:
+        return JSONResponse(content={"error": f"Invalid constraints or algorithms: {e}"}, status_code=400)
+    for constraints, result in zip(constraint_sets, results):
+        summary = result['comparison_summary']
+        print(f"Constraints {constraints}: best algorithm {summary['best_algorithm']}, worker counts {summary['worker_counts']}")
+    print(f"[Optimizer] Advanced optimization complete in {time.time() - started:.3f}s.\n")
+    if req.constraint_sets:
+        return {'results': [dict(result, constraints=constraints) for constraints, result in zip(constraint_sets, results)]}
+    return results[0]
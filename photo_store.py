@@ -0,0 +1,130 @@
+import hashlib
+import os
+import re
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# optional Pillow import: thumbnails are generated only when installed
+try:
+    from PIL import Image, ImageOps  # type: ignore
+except Exception:
+    Image = None
+    ImageOps = None
+
+# Largest photo accepted (bytes)
+PHOTO_MAX_BYTES = int(os.getenv("PHOTO_MAX_BYTES", str(20 * 1024 * 1024)))
+# Bytes read and written per step while streaming an upload to disk
+PHOTO_CHUNK_BYTES = 1024 * 1024
+# Downscaled copies made for each new photo: name -> longest side in pixels
+PHOTO_VARIANTS = {"thumb": 256, "medium": 1280}
+PHOTO_WORKERS = int(os.getenv("PHOTO_WORKERS", "1"))
+
+_EXTENSION = re.compile(r"^\.[a-z0-9]{1,5}$")
+
+
+class PhotoTooLarge(ValueError):
+    pass
+
+
+def _extension(filename):
+    ext = os.path.splitext(filename or "")[1].lower()
+    return ext if _EXTENSION.match(ext) else ""
+
+
+def variant_path(upload_dir, name, variant):
+    return os.path.join(upload_dir, "variants", f"{os.path.splitext(name)[0]}_{variant}.jpg")
+
+
+def make_variants(upload_dir, name):
+    """Write the downscaled JPEG copies of a stored photo (existing ones are kept)"""
+    if Image is None:
+        return []
+    written = []
+    os.makedirs(os.path.join(upload_dir, "variants"), exist_ok=True)
+    with Image.open(os.path.join(upload_dir, name)) as image:
+        image = ImageOps.exif_transpose(image).convert("RGB")
+        for variant, longest_side in PHOTO_VARIANTS.items():
+            path = variant_path(upload_dir, name, variant)
+            if os.path.exists(path):
+                continue
+            copy = image.copy()
+            copy.thumbnail((longest_side, longest_side))
+            # Write then rename so readers never see a half-written file
+            tmp_path = path + ".tmp"
+            copy.save(tmp_path, "JPEG", quality=85)
+            os.replace(tmp_path, path)
+            written.append(path)
+    return written
+
+
+class PhotoStore:
+    """
+    Content-addressed photo storage: an upload is streamed to disk in chunks
+    (never held whole in memory) while being hashed, then stored as
+    <sha256><ext>, so the same photo uploaded twice is kept once. Thumbnails
+    of new photos are made by a background thread pool, off the request path.
+    """
+
+    def __init__(self, upload_dir, max_bytes=PHOTO_MAX_BYTES, workers=PHOTO_WORKERS):
+        self.upload_dir = upload_dir
+        self.max_bytes = max_bytes
+        self.workers = workers
+        self._executor = None
+        self._lock = threading.Lock()
+        os.makedirs(upload_dir, exist_ok=True)
+
+    def save(self, stream, filename=None):
+        """
+        Store a readable binary stream; returns (name, path, created).
+        Raises PhotoTooLarge (nothing is kept) once more than max_bytes arrive.
+        Blocking: call it from a worker thread.
+        """
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.upload_dir, prefix=".upload_")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                while True:
+                    chunk = stream.read(PHOTO_CHUNK_BYTES)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise PhotoTooLarge(f"Photo exceeds the {self.max_bytes} byte limit")
+                    digest.update(chunk)
+                    f.write(chunk)
+            name = digest.hexdigest() + _extension(filename)
+            path = os.path.join(self.upload_dir, name)
+            created = not os.path.exists(path)
+            if created:
+                os.replace(tmp_path, path)
+            else:
+                os.remove(tmp_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        if created:
+            self._schedule_variants(name)
+        return name, path, created
+
+    def _schedule_variants(self, name):
+        if Image is None:
+            return
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="photo")
+            future = self._executor.submit(make_variants, self.upload_dir, name)
+
+        def report(done):
+            if done.exception() is not None:
+                print(f"Thumbnail generation failed for {name}: {done.exception()}")
+
+        future.add_done_callback(report)
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
@@ -2,51 +2,163 @@ import pandas as pd
 import numpy as np
 from ortools.constraint_solver import routing_enums_pb2
 from ortools.constraint_solver import pywrapcp
-from geopy.distance import geodesic
+import itertools
 import math
+import os
+import io
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from matrices import build_distance_matrix, pairwise_distances
+from matrix_cache import MatrixCache, matrix_fingerprint
+from sparse_arcs import SparseArcModel
+from location_table import LocationTable
+
+# Transit returned for arcs pruned out of the sparse model (never fits a dimension)
+FORBIDDEN_ARC_COST = 10**9
+# Processes a job-pool worker (run_*_job) may start for its own sub-solves; the
+# job pool already runs PLANNER_MAX_WORKERS jobs side by side
+PLANNER_JOB_INNER_WORKERS = int(os.getenv("PLANNER_JOB_INNER_WORKERS", "1"))
+
+
+class _SearchState:
+    """Assignment-like view of the solver's current solution inside an at-solution callback"""
+    def Value(self, var):
+        # Next vars are bound; dimension cumuls report their earliest feasible value
+        return var.Min()
+
+
+def _read_table(source):
+    """Load a CSV from a path, raw bytes or file-like buffer, or copy an already-parsed DataFrame"""
+    if isinstance(source, pd.DataFrame):
+        return source.copy()
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+    return pd.read_csv(source)
+
+def write_solution_report(solution, num_stores, file=None):
+    """Formatted solution report written to file (default: stdout)"""
+    if not solution:
+        print("No solution to display", file=file)
+        return
+    
+    print("\n" + "="*60, file=file)
+    print("BEAT PLANNING OPTIMIZATION RESULTS", file=file)
+    print("="*60, file=file)
+    
+    # Print summary
+    summary = solution['summary']
+    print(f"\nSUMMARY:", file=file)
+    print(f"Total Stores Covered: {summary['total_stores_covered']}/{num_stores} ({summary['coverage_percentage']:.1f}%)", file=file)
+    print(f"Total Distance: {summary['total_distance_km']:.2f} km", file=file)
+    print(f"Total Time: {summary['total_time_hours']:.2f} hours", file=file)
+    print(f"Avg Distance per Salesperson: {summary['avg_distance_per_salesperson']:.2f} km", file=file)
+    print(f"Avg Time per Salesperson: {summary['avg_time_per_salesperson']:.2f} hours", file=file)
+    
+    # Print individual routes
+    print(f"\nROUTE DETAILS:", file=file)
+    for route in solution['routes']:
+        if len(route['route']) > 2:  # Only show routes with actual visits
+            print(f"\nSalesperson {route['vehicle_id'] + 1}:", file=file)
+            print(f"  Distance: {route['distance']/1000:.2f} km", file=file)
+            print(f"  Time: {route['time']/60:.2f} hours", file=file)
+            print(f"  Stores Visited: {route['stores_visited']}", file=file)
+            print(f"  Route: ", end="", file=file)
+            route_nodes = [loc['node'] for loc in route['route']]
+            print(" -> ".join(map(str, route_nodes)), file=file)
+
 
 class BeatPlanningOptimizer:
-    def __init__(self, csv_file_path, assignments_csv_path=None):
+    def __init__(self, csv_file_path, assignments_csv_path=None, distance_mode='geodesic',
+                 avg_speed_kmh=40, matrix_cache=None, sparse_neighbors=None):
         """
-        Initialize with CSV containing: node, lat, long, node_type
-        And optional assignments CSV: salesperson_id, starting_point
+        Initialize with CSV (path, bytes, buffer or DataFrame) containing: node, lat, long, node_type
+        And optional assignments CSV (path, bytes, buffer or DataFrame): salesperson_id, starting_point
+        distance_mode: 'geodesic' (WGS-84 ellipsoid) or 'haversine' (faster, spherical)
+        matrix_cache: optional MatrixCache; on a hit the matrices are memory-mapped from disk
+        sparse_neighbors: if set (k), skip the dense matrices and only allow arcs to each
+            store's k nearest stores plus all depot arcs (memory O(n*k) for very large sets)
         """
-        self.data = pd.read_csv(csv_file_path)
-        self.stores = self.data[self.data['node_type'] == 'store'].copy()
-        self.starting_points = self.data[self.data['node_type'] == 'starting_point'].copy()
-        
-        # Create combined location list (starting points first, then stores)
-        self.locations = pd.concat([self.starting_points, self.stores], ignore_index=True)
-        self.num_starting_points = len(self.starting_points)
-        self.num_stores = len(self.stores)
-        self.total_locations = len(self.locations)
+        self.distance_mode = distance_mode
+        self.avg_speed_kmh = avg_speed_kmh
+        self.matrix_cache = matrix_cache
+        # Array-backed location list (starting points first, then stores)
+        self.table = LocationTable(_read_table(csv_file_path))
+        self.num_starting_points = self.table.num_starting_points
+        self.num_stores = self.table.num_stores
+        self.total_locations = len(self.table)
         
         # Load salesperson assignments if provided
         self.assignments = None
-        if assignments_csv_path:
-            self.assignments = pd.read_csv(assignments_csv_path)
+        if assignments_csv_path is not None:
+            self.assignments = _read_table(assignments_csv_path)
             print(f"Loaded assignments for {len(self.assignments)} salespeople")
         
-        # Create distance matrix
+        # Create distance and time matrices (or reuse cached ones)
+        self.arc_model = None
+        if sparse_neighbors:
+            self.distance_matrix = None
+            self.time_matrix = None
+            self.arc_model = SparseArcModel(
+                self.table.lat,
+                self.table.long,
+                self.num_starting_points,
+                sparse_neighbors,
+                distance_mode=distance_mode,
+                avg_speed_kmh=avg_speed_kmh
+            )
+            print(f"Sparse arc model: k={sparse_neighbors}, {self.arc_model.num_arcs} store arcs")
+        else:
+            self._load_matrices(matrix_cache)
+    
+    # DataFrame views of the location table, built on demand for pandas callers
+    @property
+    def locations(self):
+        return self.table.frame()
+    
+    @property
+    def stores(self):
+        return self.table.frame(slice(self.num_starting_points, None))
+    
+    @property
+    def starting_points(self):
+        return self.table.frame(slice(0, self.num_starting_points))
+    
+    def _load_matrices(self, matrix_cache):
+        """Build distance/time matrices, going through the on-disk cache when given"""
+        if matrix_cache is None:
+            self.distance_matrix = self._create_distance_matrix()
+            self.time_matrix = self._create_time_matrix(self.avg_speed_kmh)
+            return
+        
+        key = matrix_fingerprint(
+            self.table.nodes.tolist(),
+            self.table.lat,
+            self.table.long,
+            self.distance_mode,
+            self.avg_speed_kmh
+        )
+        cached = matrix_cache.get(key)
+        if cached is not None:
+            print(f"Using cached distance/time matrices ({key[:12]})")
+            self.distance_matrix, self.time_matrix = cached
+            return
+        
         self.distance_matrix = self._create_distance_matrix()
-        self.time_matrix = self._create_time_matrix()
+        self.time_matrix = self._create_time_matrix(self.avg_speed_kmh)
+        self.distance_matrix, self.time_matrix = matrix_cache.put(key, self.distance_matrix, self.time_matrix)
     
     def _create_distance_matrix(self):
-        """Create distance matrix using haversine distance (in meters)"""
-        matrix = np.zeros((self.total_locations, self.total_locations))
-        
-        for i in range(self.total_locations):
-            for j in range(self.total_locations):
-                if i != j:
-                    coord1 = (self.locations.iloc[i]['lat'], self.locations.iloc[i]['long'])
-                    coord2 = (self.locations.iloc[j]['lat'], self.locations.iloc[j]['long'])
-                    # Convert km to meters
-                    distance = geodesic(coord1, coord2).meters
-                    matrix[i][j] = int(distance)
-                else:
-                    matrix[i][j] = 0
-        
-        return matrix.astype(int)
+        """Create distance matrix (in meters) from the lat/long arrays in one vectorized pass"""
+        return build_distance_matrix(
+            self.table.lat,
+            self.table.long,
+            mode=self.distance_mode
+        )
+    
+    def _depot_distances(self):
+        """Distances (meters) from every starting point to every location"""
+        if self.arc_model is not None:
+            return self.arc_model.depot_distances
+        return self.distance_matrix[:self.num_starting_points]
     
     def _create_time_matrix(self, avg_speed_kmh=40):
         """Create time matrix based on distance and average speed (in minutes)"""
@@ -56,13 +168,23 @@ class BeatPlanningOptimizer:
         return time_matrix
     
     def create_data_model(self, num_salespeople, daily_working_hours=8, 
-                         max_daily_distance_km=200, store_visit_time_minutes=30):
+                         max_daily_distance_km=200, store_visit_time_minutes=30,
+                         as_lists=True):
         """Create data model for OR-Tools"""
         
         data = {}
-        # Convert numpy arrays to lists for JSON serialization
-        data['distance_matrix'] = self.distance_matrix.tolist()
-        data['time_matrix'] = self.time_matrix.tolist()
+        if self.arc_model is not None:
+            # Sparse mode: arc costs come from the k-nearest-neighbour model
+            data['distance_matrix'] = None
+            data['time_matrix'] = None
+        elif as_lists:
+            # Convert numpy arrays to lists for JSON serialization
+            data['distance_matrix'] = self.distance_matrix.tolist()
+            data['time_matrix'] = self.time_matrix.tolist()
+        else:
+            # Keep the (possibly memory-mapped) arrays to avoid an n^2 copy
+            data['distance_matrix'] = self.distance_matrix
+            data['time_matrix'] = self.time_matrix
         data['num_vehicles'] = num_salespeople
         
         # Convert constraints to appropriate units
@@ -82,11 +204,10 @@ class BeatPlanningOptimizer:
                 depot_name = row['starting_point']
                 
                 # Find depot index
-                depot_row = self.starting_points[self.starting_points['node'] == depot_name]
-                if depot_row.empty:
+                depot_idx = self.table.position(depot_name)
+                if depot_idx is None or depot_idx >= self.num_starting_points:
                     raise ValueError(f"Starting point '{depot_name}' not found for salesperson {sp_id}")
                 
-                depot_idx = int(depot_row.index[0])
                 data['starts'].append(depot_idx)
                 data['ends'].append(depot_idx)
                 
@@ -107,15 +228,23 @@ class BeatPlanningOptimizer:
                 data['ends'] = [i % self.num_starting_points for i in range(num_salespeople)]
             
             for i in range(num_salespeople):
-                depot_name = self.starting_points.iloc[data['starts'][i]]['node']
+                depot_name = self.table.nodes[data['starts'][i]]
                 print(f"  Salesperson {i+1} -> {depot_name}")
         
         return data
     
     def solve_beat_planning(self, num_salespeople, target_stores_per_day=None, 
-                          daily_working_hours=8, max_daily_distance_km=200):
+                          daily_working_hours=8, max_daily_distance_km=200,
+                          time_limit_seconds=30, should_stop=None, on_solution=None,
+                          initial_routes=None, store_visit_time_minutes=30):
         """
         Solve the beat planning optimization problem
+        should_stop: optional callable polled at each solution found; returning True
+            ends the search early with the best plan so far
+        on_solution: optional callable(solution, objective) called with every improving
+            solution during the search, in the same shape as the final result
+        initial_routes: optional prior solution 'routes' (as returned by _extract_solution)
+            to warm-start from; unknown nodes are dropped and new stores get inserted
         """
         
         print(f"Solving beat planning for {num_salespeople} salespeople...")
@@ -123,31 +252,74 @@ class BeatPlanningOptimizer:
         print(f"Starting points: {self.num_starting_points}")
         
         # Create the data model
-        data = self.create_data_model(num_salespeople, daily_working_hours, max_daily_distance_km)
+        data = self.create_data_model(num_salespeople, daily_working_hours, max_daily_distance_km,
+                                      store_visit_time_minutes, as_lists=False)
         
         print(f"Vehicles created: {data['num_vehicles']}")
         print(f"Starts: {data['starts']}")
         print(f"Ends: {data['ends']}")
         
-        # Create the routing index manager
+        manager, routing = self._build_routing_model(data)
+        search_parameters = self._search_parameters(time_limit_seconds)
+        
+        if on_solution is not None:
+            best_objective = [None]
+            def publish_improvement():
+                objective = routing.CostVar().Min()
+                if best_objective[0] is None or objective < best_objective[0]:
+                    best_objective[0] = objective
+                    on_solution(self._extract_solution(manager, routing, _SearchState(), data), objective)
+            routing.AddAtSolutionCallback(publish_improvement)
+        
+        if should_stop is not None:
+            def stop_when_requested():
+                if should_stop():
+                    routing.solver().FinishCurrentSearch()
+            routing.AddAtSolutionCallback(stop_when_requested)
+        
+        initial_assignment = None
+        if initial_routes:
+            initial_assignment = self._warm_start_assignment(
+                manager, routing, data, initial_routes, search_parameters
+            )
+        
+        # Solve the problem
+        if initial_assignment is not None:
+            solution = routing.SolveFromAssignmentWithParameters(initial_assignment, search_parameters)
+        else:
+            solution = routing.SolveWithParameters(search_parameters)
+        
+        if solution:
+            return self._extract_solution(manager, routing, solution, data)
+        else:
+            print("No solution found!")
+            return None
+    
+    def _create_index_manager(self, data):
+        """Routing index manager for the data model's vehicles and depots"""
         # OR-Tools Python API expects plain integer lists, not NodeIndex objects
-        manager = pywrapcp.RoutingIndexManager(
+        return pywrapcp.RoutingIndexManager(
             self.total_locations, 
             data['num_vehicles'], 
             data['starts'], 
             data['ends']
         )
+    
+    def _build_routing_model(self, data, native_transits=True, manager=None, transit_lists=None):
+        """
+        Create the routing model (and index manager unless one is shared) with Distance/Time dimensions.
+        transit_lists: prebuilt _transit_lists(data) to reuse across several models
+        """
+        # Create the routing index manager
+        if manager is None:
+            manager = self._create_index_manager(data)
         
         # Create Routing Model
         routing = pywrapcp.RoutingModel(manager)
         
-        # Create distance callback
-        def distance_callback(from_index, to_index):
-            from_node = manager.IndexToNode(from_index)
-            to_node = manager.IndexToNode(to_index)
-            return data['distance_matrix'][from_node][to_node]
-        
-        distance_callback_index = routing.RegisterTransitCallback(distance_callback)
+        distance_callback_index, time_callback_index = self._register_transits(
+            manager, routing, data, native_transits, transit_lists
+        )
         routing.SetArcCostEvaluatorOfAllVehicles(distance_callback_index)
         
         # Add distance constraint
@@ -159,15 +331,6 @@ class BeatPlanningOptimizer:
             'Distance'
         )
         
-        # Create time callback (including service time)
-        def time_callback(from_index, to_index):
-            from_node = manager.IndexToNode(from_index)
-            to_node = manager.IndexToNode(to_index)
-            service_time = data['service_time'] if to_node >= self.num_starting_points else 0
-            return data['time_matrix'][from_node][to_node] + service_time
-        
-        time_callback_index = routing.RegisterTransitCallback(time_callback)
-        
         # Add time constraint
         routing.AddDimension(
             time_callback_index,
@@ -182,7 +345,143 @@ class BeatPlanningOptimizer:
         for node in range(self.num_starting_points, self.total_locations):
             routing.AddDisjunction([manager.NodeToIndex(node)], penalty)
         
-        # Setting first solution heuristic
+        if self.arc_model is not None:
+            self._restrict_to_sparse_arcs(manager, routing, data['num_vehicles'])
+        
+        return manager, routing
+    
+    def _service_times(self, data):
+        # Arriving at a store costs service_time; folded into the time transit
+        service = np.zeros(self.total_locations, dtype=np.int64)
+        service[self.num_starting_points:] = data['service_time']
+        return service
+    
+    def _distance_list(self, data):
+        return np.asarray(data['distance_matrix'], dtype=np.int64).tolist()
+    
+    def _time_list(self, data):
+        return (np.asarray(data['time_matrix'], dtype=np.int64) + self._service_times(data)[None, :]).tolist()
+    
+    def _transit_lists(self, data):
+        """Distance and time (with service) matrices as nested int lists for RegisterTransitMatrix"""
+        return self._distance_list(data), self._time_list(data)
+    
+    def _register_transits(self, manager, routing, data, native_transits=True, transit_lists=None):
+        """
+        Register distance and time (travel + service) transits, returning their indices.
+        Dense matrices are handed to OR-Tools natively so no Python runs in the search loop;
+        the sparse arc model (or native_transits=False) falls back to Python callbacks.
+        """
+        arcs = self.arc_model
+        if arcs is None and native_transits:
+            if transit_lists is not None:
+                distance_lists, time_lists = transit_lists
+                return (routing.RegisterTransitMatrix(distance_lists),
+                        routing.RegisterTransitMatrix(time_lists))
+            # OR-Tools copies the matrix, so each list copy (n^2 Python ints) lives only
+            # until it is registered and one at a time
+            distance_index = routing.RegisterTransitMatrix(self._distance_list(data))
+            time_index = routing.RegisterTransitMatrix(self._time_list(data))
+            return distance_index, time_index
+        
+        # Create distance callback
+        if arcs is None:
+            def distance_callback(from_index, to_index):
+                from_node = manager.IndexToNode(from_index)
+                to_node = manager.IndexToNode(to_index)
+                return int(data['distance_matrix'][from_node, to_node])
+        else:
+            def distance_callback(from_index, to_index):
+                return arcs.distance(manager.IndexToNode(from_index),
+                                     manager.IndexToNode(to_index), FORBIDDEN_ARC_COST)
+        
+        # Create time callback (including service time)
+        if arcs is None:
+            def time_callback(from_index, to_index):
+                from_node = manager.IndexToNode(from_index)
+                to_node = manager.IndexToNode(to_index)
+                service_time = data['service_time'] if to_node >= self.num_starting_points else 0
+                return int(data['time_matrix'][from_node, to_node]) + service_time
+        else:
+            def time_callback(from_index, to_index):
+                from_node = manager.IndexToNode(from_index)
+                to_node = manager.IndexToNode(to_index)
+                service_time = data['service_time'] if to_node >= self.num_starting_points else 0
+                return arcs.travel_time(from_node, to_node, FORBIDDEN_ARC_COST) + service_time
+        
+        return (routing.RegisterTransitCallback(distance_callback),
+                routing.RegisterTransitCallback(time_callback))
+    
+    def _routes_from_solution(self, routes, num_vehicles):
+        """Per-vehicle store node indices from a prior solution, skipping nodes that no longer exist"""
+        vehicle_routes = [[] for _ in range(num_vehicles)]
+        seen = set()
+        for route in routes:
+            vehicle_id = route.get('vehicle_id')
+            if vehicle_id is None or not 0 <= vehicle_id < num_vehicles:
+                continue
+            for stop in route.get('route', []):
+                node = self.table.position(stop.get('node'))
+                # Depots are implied by the vehicle's start/end; each store appears once
+                if node is None or node < self.num_starting_points or node in seen:
+                    continue
+                seen.add(node)
+                vehicle_routes[vehicle_id].append(node)
+        return vehicle_routes
+    
+    def _warm_start_assignment(self, manager, routing, data, initial_routes, search_parameters):
+        """Initial assignment built from prior routes, or None if they no longer fit the model"""
+        vehicle_routes = self._routes_from_solution(initial_routes, data['num_vehicles'])
+        # Drop stops that no longer fit changed distance/time limits
+        vehicle_routes = [
+            self._fit_route_to_limits(data['starts'][vehicle_id], route, data)
+            for vehicle_id, route in enumerate(vehicle_routes)
+        ]
+        kept = sum(len(route) for route in vehicle_routes)
+        routing.CloseModelWithParameters(search_parameters)
+        assignment = routing.ReadAssignmentFromRoutes(
+            [[manager.NodeToIndex(node) for node in route] for route in vehicle_routes],
+            True  # ignore inactive indices
+        )
+        if assignment is None:
+            print("Previous routes are infeasible under current constraints; solving from scratch")
+            return None
+        print(f"Warm start: {kept} stores kept from previous plan, "
+              f"{self.num_stores - kept} left for the search to insert")
+        return assignment
+    
+    def _arc(self, from_node, to_node, data):
+        """(distance, time incl. service) for an arc, or None if the arc is forbidden"""
+        service_time = data['service_time'] if to_node >= self.num_starting_points else 0
+        if self.arc_model is None:
+            return (int(self.distance_matrix[from_node, to_node]),
+                    int(self.time_matrix[from_node, to_node]) + service_time)
+        distance = self.arc_model.distance(from_node, to_node)
+        if distance is None:
+            return None
+        return distance, self.arc_model.travel_time(from_node, to_node) + service_time
+    
+    def _fit_route_to_limits(self, depot, route, data):
+        """Greedily keep stops (in order) while the route can still return to its depot in limits"""
+        kept = []
+        distance = time_used = 0
+        previous = depot
+        for node in route:
+            leg = self._arc(previous, node, data)
+            back = self._arc(node, depot, data)
+            if leg is None or back is None:
+                continue
+            if (distance + leg[0] + back[0] > data['max_distance']
+                    or time_used + leg[1] + back[1] > data['max_time']):
+                continue
+            distance += leg[0]
+            time_used += leg[1]
+            kept.append(node)
+            previous = node
+        return kept
+    
+    def _search_parameters(self, time_limit_seconds=30):
+        """PATH_CHEAPEST_ARC first solution improved by guided local search"""
         search_parameters = pywrapcp.DefaultRoutingSearchParameters()
         search_parameters.first_solution_strategy = (
             routing_enums_pb2.FirstSolutionStrategy.PATH_CHEAPEST_ARC
@@ -190,16 +489,17 @@ class BeatPlanningOptimizer:
         search_parameters.local_search_metaheuristic = (
             routing_enums_pb2.LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH
         )
-        search_parameters.time_limit.FromSeconds(30)
-        
-        # Solve the problem
-        solution = routing.SolveWithParameters(search_parameters)
-        
-        if solution:
-            return self._extract_solution(manager, routing, solution, data)
-        else:
-            print("No solution found!")
-            return None
+        search_parameters.time_limit.FromSeconds(time_limit_seconds)
+        return search_parameters
+    
+    def _restrict_to_sparse_arcs(self, manager, routing, num_vehicles):
+        """Forbid store arcs outside the k-nearest-neighbour model by shrinking NextVar domains"""
+        end_indices = [routing.End(vehicle_id) for vehicle_id in range(num_vehicles)]
+        for node in range(self.num_starting_points, self.total_locations):
+            index = manager.NodeToIndex(node)
+            allowed = [manager.NodeToIndex(int(neighbor)) for neighbor in self.arc_model.neighbors(node)]
+            # Any depot end is allowed; an unperformed node points to itself
+            routing.NextVar(index).SetValues(allowed + end_indices + [index])
     
     def _extract_solution(self, manager, routing, solution, data):
         """Extract and format the solution"""
@@ -226,12 +526,7 @@ class BeatPlanningOptimizer:
             
             while not routing.IsEnd(index):
                 node_index = manager.IndexToNode(index)
-                location_info = {
-                    'node': self.locations.iloc[node_index]['node'],
-                    'lat': self.locations.iloc[node_index]['lat'],
-                    'long': self.locations.iloc[node_index]['long'],
-                    'type': self.locations.iloc[node_index]['node_type']
-                }
+                location_info = self._location_info(node_index)
                 route_info['route'].append(location_info)
                 
                 if location_info['type'] == 'store':
@@ -242,13 +537,7 @@ class BeatPlanningOptimizer:
             
             # Add final location (end depot)
             final_node = manager.IndexToNode(index)
-            final_location = {
-                'node': self.locations.iloc[final_node]['node'],
-                'lat': self.locations.iloc[final_node]['lat'],
-                'long': self.locations.iloc[final_node]['long'],
-                'type': self.locations.iloc[final_node]['node_type']
-            }
-            route_info['route'].append(final_location)
+            route_info['route'].append(self._location_info(final_node))
             
             # Get route distance and time
             route_info['distance'] = solution.Value(distance_dimension.CumulVar(index))
@@ -259,7 +548,17 @@ class BeatPlanningOptimizer:
             results['total_time'] += route_info['time']
         
         # Create summary
-        results['summary'] = {
+        results['summary'] = self._summarize(results)
+        
+        return results
+    
+    def _location_info(self, node_index):
+        """Route stop entry for a location index"""
+        return self.table.info(node_index)
+    
+    def _summarize(self, results):
+        """Summary block for a solution's routes and totals"""
+        return {
             'total_distance_km': results['total_distance'] / 1000,
             'total_time_hours': results['total_time'] / 60,
             'total_stores_covered': sum(route['stores_visited'] for route in results['routes']),
@@ -267,39 +566,547 @@ class BeatPlanningOptimizer:
             'avg_time_per_salesperson': (results['total_time'] / 60) / len(results['routes']),
             'coverage_percentage': (sum(route['stores_visited'] for route in results['routes']) / self.num_stores) * 100
         }
+    
+    def solve_beat_planning_decomposed(self, num_salespeople, daily_working_hours=8,
+                                       max_daily_distance_km=200, time_limit_seconds=30,
+                                       max_workers=None, store_visit_time_minutes=30):
+        """
+        Cluster-first, route-second: assign every store to its nearest staffed starting
+        point, solve each cluster's VRP (that depot's salespeople only) in its own worker
+        process, then merge into the same routes/summary structure as solve_beat_planning
+        """
+        data = self.create_data_model(num_salespeople, daily_working_hours, max_daily_distance_km,
+                                      store_visit_time_minutes, as_lists=False)
+        staffed = sorted(set(data['starts']))
+        
+        # Nearest staffed starting point for every store
+        depot_distances = np.asarray(self._depot_distances())[staffed, self.num_starting_points:]
+        store_cluster = np.asarray(staffed)[depot_distances.argmin(axis=0)]
+        
+        if self.assignments is not None:
+            salesperson_ids = self.assignments['salesperson_id'].tolist()
+        else:
+            salesperson_ids = list(range(1, num_salespeople + 1))
+        
+        tasks = []
+        task_vehicles = []
+        for depot_idx in staffed:
+            store_positions = self.num_starting_points + np.flatnonzero(store_cluster == depot_idx)
+            if len(store_positions) == 0:
+                continue
+            vehicles = [v for v, start in enumerate(data['starts']) if start == depot_idx]
+            depot_name = self.table.nodes[depot_idx]
+            locations = self.table.frame([depot_idx] + store_positions.tolist())
+            assignments = pd.DataFrame({
+                'salesperson_id': [salesperson_ids[v] for v in vehicles],
+                'starting_point': depot_name
+            })
+            print(f"Cluster {depot_name}: {len(store_positions)} stores, {len(vehicles)} salespeople")
+            tasks.append({
+                'locations': locations,
+                'assignments': assignments,
+                'distance_mode': self.distance_mode,
+                'avg_speed_kmh': self.avg_speed_kmh,
+                'sparse_neighbors': self.arc_model.k if self.arc_model is not None else None,
+                'daily_working_hours': daily_working_hours,
+                'max_daily_distance_km': max_daily_distance_km,
+                'store_visit_time_minutes': store_visit_time_minutes,
+                'time_limit_seconds': time_limit_seconds
+            })
+            task_vehicles.append(vehicles)
+        
+        cluster_solutions = []
+        if tasks:
+            workers = max_workers or min(len(tasks), os.cpu_count() or 1)
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                cluster_solutions = list(pool.map(_solve_cluster, tasks))
         
+        # Merge cluster routes back onto global vehicle ids
+        routes = [None] * data['num_vehicles']
+        for vehicles, cluster_solution in zip(task_vehicles, cluster_solutions):
+            if not cluster_solution:
+                continue
+            for route in cluster_solution['routes']:
+                vehicle_id = vehicles[route['vehicle_id']]
+                routes[vehicle_id] = dict(route, vehicle_id=vehicle_id)
+        
+        for vehicle_id, route in enumerate(routes):
+            if route is None:
+                depot = self._location_info(data['starts'][vehicle_id])
+                routes[vehicle_id] = {
+                    'vehicle_id': vehicle_id,
+                    'route': [depot, dict(depot)],
+                    'distance': 0,
+                    'time': 0,
+                    'stores_visited': 0
+                }
+        
+        results = {
+            'total_distance': sum(route['distance'] for route in routes),
+            'total_time': sum(route['time'] for route in routes),
+            'routes': routes,
+            'summary': {}
+        }
+        results['summary'] = self._summarize(results)
         return results
     
-    def print_solution(self, solution):
-        """Print formatted solution"""
-        if not solution:
-            print("No solution to display")
+    def _visit_frequencies(self, visit_frequencies, working_days_per_week):
+        """Weekly visits per store (location order), from a dict, the CSV column, or 1"""
+        if visit_frequencies is not None:
+            frequencies = np.array([
+                visit_frequencies.get(node, visit_frequencies.get(str(node), 1)) for node in self.table.store_nodes
+            ], dtype=int)
+        elif 'visit_frequency' in self.table.attributes:
+            frequencies = pd.Series(self.table.attributes['visit_frequency'][self.num_starting_points:]).fillna(1)
+            frequencies = frequencies.to_numpy(dtype=int)
+        else:
+            frequencies = np.ones(self.num_stores, dtype=int)
+        return np.clip(frequencies, 0, working_days_per_week)
+    
+    def _schedule_visits(self, frequencies, working_days_per_week):
+        """
+        Spread each store's weekly visits over the working days. Stores are swept by
+        angle around their centroid into day sectors so a day's stores are close together;
+        a store visited f times gets visits spaced working_days/f days apart.
+        """
+        lat = self.table.lat[self.num_starting_points:]
+        lon = self.table.long[self.num_starting_points:]
+        angle = np.arctan2(lat - lat.mean(), lon - lon.mean())
+        rank = np.empty(len(angle), dtype=int)
+        rank[np.argsort(angle, kind='stable')] = np.arange(len(angle))
+        base_day = (rank * working_days_per_week) // max(len(angle), 1)
+        
+        day_nodes = [[] for _ in range(working_days_per_week)]
+        for store_pos, (day, frequency) in enumerate(zip(base_day, frequencies)):
+            for visit in range(frequency):
+                day_nodes[(day + (visit * working_days_per_week) // frequency) % working_days_per_week].append(
+                    self.num_starting_points + store_pos
+                )
+        return day_nodes
+    
+    def _solve_days(self, data, day_nodes, days, time_limit_seconds, should_stop=None):
+        """
+        Solve several days on one index manager and one set of matrices.
+        should_stop: optional callable; once it returns True the current day's search
+            ends with its best plan so far and the remaining days are skipped
+        """
+        manager = self._create_index_manager(data)
+        search_parameters = self._search_parameters(time_limit_seconds)
+        # Converted once and registered into every day's model
+        transit_lists = self._transit_lists(data) if self.arc_model is None else None
+        solutions = {}
+        for day in days:
+            if should_stop is not None and should_stop():
+                print("Weekly solve stopped early")
+                break
+            scheduled = set(day_nodes[day])
+            print(f"Day {day + 1}: {len(scheduled)} store visits")
+            _, routing = self._build_routing_model(data, manager=manager, transit_lists=transit_lists)
+            # Stores not due today are switched off instead of building a smaller model
+            for node in range(self.num_starting_points, self.total_locations):
+                if node not in scheduled:
+                    routing.ActiveVar(manager.NodeToIndex(node)).SetValue(0)
+            if should_stop is not None:
+                def stop_when_requested():
+                    if should_stop():
+                        routing.solver().FinishCurrentSearch()
+                routing.AddAtSolutionCallback(stop_when_requested)
+            solution = routing.SolveWithParameters(search_parameters)
+            if not solution:
+                solutions[day] = None
+                continue
+            day_solution = self._extract_solution(manager, routing, solution, data)
+            day_solution['day'] = day
+            day_solution['scheduled_stores'] = len(scheduled)
+            covered = day_solution['summary']['total_stores_covered']
+            day_solution['summary']['coverage_percentage'] = (covered / len(scheduled)) * 100 if scheduled else 100.0
+            solutions[day] = day_solution
+        return solutions
+    
+    def solve_weekly(self, num_salespeople, working_days_per_week=5, visit_frequencies=None,
+                     daily_working_hours=8, max_daily_distance_km=200, time_limit_seconds=30,
+                     max_workers=1, store_visit_time_minutes=30, should_stop=None):
+        """
+        Weekly beat plan: working_days_per_week day-routes per salesperson.
+        visit_frequencies: optional {node: visits per week}; otherwise the locations
+            'visit_frequency' column is used when present, else one visit per store.
+        All days share one distance/time matrix; with max_workers > 1 days are solved in
+        a process pool whose workers memory-map the matrices from the on-disk cache.
+        should_stop: optional callable; once it returns True, days not yet solved are
+            left unsolved (with max_workers > 1 it is checked as each worker finishes)
+        """
+        frequencies = self._visit_frequencies(visit_frequencies, working_days_per_week)
+        day_nodes = self._schedule_visits(frequencies, working_days_per_week)
+        data = self.create_data_model(num_salespeople, daily_working_hours, max_daily_distance_km,
+                                      store_visit_time_minutes, as_lists=False)
+        
+        days = list(range(working_days_per_week))
+        workers = min(max_workers or os.cpu_count() or 1, working_days_per_week)
+        if workers <= 1:
+            day_solutions = self._solve_days(data, day_nodes, days, time_limit_seconds, should_stop)
+        else:
+            base_task = dict(
+                self._shared_worker_task(),
+                num_salespeople=num_salespeople,
+                daily_working_hours=daily_working_hours,
+                max_daily_distance_km=max_daily_distance_km,
+                store_visit_time_minutes=store_visit_time_minutes,
+                day_nodes=day_nodes,
+                time_limit_seconds=time_limit_seconds
+            )
+            tasks = [dict(base_task, days=days[i::workers]) for i in range(workers)]
+            day_solutions = {}
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(_solve_weekly_days, task) for task in tasks]
+                for future in as_completed(futures):
+                    if future.cancelled():
+                        continue
+                    day_solutions.update(future.result())
+                    if should_stop is not None and should_stop():
+                        print("Weekly solve stopped early")
+                        for pending in futures:
+                            pending.cancel()
+        
+        day_results = [day_solutions.get(day) for day in days]
+        routes_by_salesperson = []
+        for vehicle_id in range(data['num_vehicles']):
+            routes_by_salesperson.append({
+                'vehicle_id': vehicle_id,
+                'days': [
+                    dict(day_solution['routes'][vehicle_id], day=day)
+                    for day, day_solution in enumerate(day_results) if day_solution
+                ]
+            })
+        
+        required_visits = int(frequencies.sum())
+        visits_covered = sum(day['summary']['total_stores_covered'] for day in day_results if day)
+        total_distance = sum(day['total_distance'] for day in day_results if day)
+        total_time = sum(day['total_time'] for day in day_results if day)
+        return {
+            'days': day_results,
+            'routes_by_salesperson': routes_by_salesperson,
+            'total_distance': total_distance,
+            'total_time': total_time,
+            'summary': {
+                'working_days_per_week': working_days_per_week,
+                'required_visits': required_visits,
+                'visits_covered': visits_covered,
+                'coverage_percentage': (visits_covered / required_visits) * 100 if required_visits else 100.0,
+                'total_distance_km': total_distance / 1000,
+                'total_time_hours': total_time / 60,
+                'visits_per_day': [len(nodes) for nodes in day_nodes]
+            }
+        }
+    
+    def _shared_worker_task(self):
+        """
+        Everything a pool worker needs to rebuild this optimizer. The matrices are
+        stored in the on-disk cache first so workers memory-map them instead of
+        recomputing them.
+        """
+        cache = self.matrix_cache or MatrixCache()
+        if self.arc_model is None and self.matrix_cache is None:
+            self.distance_matrix, self.time_matrix = cache.put(
+                matrix_fingerprint(self.table.nodes.tolist(), self.table.lat, self.table.long,
+                                   self.distance_mode, self.avg_speed_kmh),
+                self.distance_matrix, self.time_matrix
+            )
+        return {
+            'locations': self.table.frame(),
+            'assignments': self.assignments,
+            'distance_mode': self.distance_mode,
+            'avg_speed_kmh': self.avg_speed_kmh,
+            'sparse_neighbors': self.arc_model.k if self.arc_model is not None else None,
+            'cache_dir': cache.cache_dir,
+            'cache_max_bytes': cache.max_bytes
+        }
+    
+    def sweep_scenarios(self, num_salespeople_values, daily_working_hours_values=(8,),
+                        max_daily_distance_km_values=(200,), time_limit_seconds=30,
+                        max_workers=None, store_visit_time_minutes=30, should_stop=None):
+        """
+        Solve every combination of the given constraint grids in a process pool, all
+        scenarios sharing one cached distance/time matrix.
+        Returns one row per scenario (coverage, distance, time) with the scenarios on the
+        coverage/distance/time Pareto front flagged, best coverage first.
+        should_stop: optional callable; once it returns True, queued scenarios are dropped
+        """
+        base_task = dict(
+            self._shared_worker_task(),
+            store_visit_time_minutes=store_visit_time_minutes,
+            time_limit_seconds=time_limit_seconds
+        )
+        tasks = [
+            dict(base_task, num_salespeople=int(num_salespeople), daily_working_hours=daily_working_hours,
+                 max_daily_distance_km=max_daily_distance_km)
+            for num_salespeople in num_salespeople_values
+            for daily_working_hours in daily_working_hours_values
+            for max_daily_distance_km in max_daily_distance_km_values
+        ]
+        print(f"Sweeping {len(tasks)} scenarios")
+        
+        rows = []
+        workers = min(max_workers or os.cpu_count() or 1, max(len(tasks), 1))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_solve_scenario, task) for task in tasks]
+            stopping = False
+            for future in as_completed(futures):
+                if future.cancelled():
+                    continue
+                rows.append(future.result())
+                if not stopping and should_stop is not None and should_stop():
+                    # Queued scenarios are dropped; running ones still report
+                    print("Sweep stopped early")
+                    stopping = True
+                    for pending in futures:
+                        pending.cancel()
+        
+        self._mark_pareto(rows)
+        rows.sort(key=lambda row: (-row['coverage_percentage'], row['total_distance_km'], row['total_time_hours'],
+                                   row['num_salespeople']))
+        return {
+            'scenarios': rows,
+            'pareto': [row for row in rows if row['pareto_optimal']],
+            'total_scenarios': len(tasks)
+        }
+    
+    def find_minimum_fleet(self, daily_working_hours=8, max_daily_distance_km=200, max_salespeople=None,
+                           probe_time_limit_seconds=5, time_limit_seconds=30, max_workers=None,
+                           store_visit_time_minutes=30, should_stop=None):
+        """
+        Smallest num_salespeople whose routing solution covers every store, searched
+        with real solves rather than distance-sum bounds. Each round probes up to
+        max_workers fleet sizes concurrently (plain bisection with one worker) using
+        probe_time_limit_seconds, then the answer is re-solved with time_limit_seconds.
+        A short probe can miss full coverage, so the result is an upper bound on the
+        true minimum.
+        """
+        if self.assignments is not None:
+            raise ValueError("Fleet search sizes the fleet itself; drop the assignments file (round-robin depots are used)")
+        if self.num_stores == 0:
+            raise ValueError("No stores to cover")
+        
+        # Nobody visits more stores than fit in a day of store visits alone
+        stores_per_person = max(1, (daily_working_hours * 60) // max(store_visit_time_minutes, 1))
+        lower_bound = max(1, math.ceil(self.num_stores / stores_per_person))
+        upper_bound = max(max_salespeople or self.num_stores, lower_bound)
+        workers = max(1, max_workers or os.cpu_count() or 1)
+        base_task = dict(
+            self._shared_worker_task(),
+            daily_working_hours=daily_working_hours,
+            max_daily_distance_km=max_daily_distance_km,
+            store_visit_time_minutes=store_visit_time_minutes,
+            time_limit_seconds=probe_time_limit_seconds
+        )
+        
+        probes = []
+        failed = lower_bound - 1  # largest fleet known not to cover everything
+        covering = None           # smallest fleet known to cover everything
+        best_probe = None
+        step = 1
+        print(f"Fleet search between {lower_bound} and {upper_bound} salespeople")
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            while covering is None or covering - failed > 1:
+                if should_stop is not None and should_stop():
+                    print("Fleet search stopped early")
+                    break
+                if covering is None:
+                    if failed >= upper_bound:
+                        print(f"No fleet up to {upper_bound} salespeople covers every store")
+                        break
+                    # Gallop upward from the lower bound until some fleet covers everything
+                    candidates = sorted({min(upper_bound, failed + step * 2 ** i) for i in range(workers)})
+                    step *= 2 ** workers
+                else:
+                    # Then narrow (failed, covering) with evenly spread concurrent probes
+                    candidates = _spread_candidates(failed + 1, covering - 1, workers)
+                
+                tasks = [dict(base_task, num_salespeople=n) for n in candidates]
+                for num_salespeople, solution in pool.map(_solve_fleet_probe, tasks):
+                    covered = bool(solution) and solution['summary']['total_stores_covered'] == self.num_stores
+                    probes.append({
+                        'num_salespeople': num_salespeople,
+                        'covered': covered,
+                        'coverage_percentage': solution['summary']['coverage_percentage'] if solution else 0.0,
+                        'time_limit_seconds': probe_time_limit_seconds
+                    })
+                    print(f"  {num_salespeople} salespeople: {'full coverage' if covered else 'incomplete'}")
+                    if covered and (covering is None or num_salespeople < covering):
+                        covering, best_probe = num_salespeople, solution
+                failed = max([failed] + [probe['num_salespeople'] for probe in probes[-len(tasks):]
+                                         if not probe['covered'] and (covering is None or probe['num_salespeople'] < covering)])
+        
+        solution = None
+        if covering is not None:
+            # Final plan with the full time budget; keep the probe's plan if that loses coverage
+            solution = self.solve_beat_planning(
+                covering, daily_working_hours=daily_working_hours, max_daily_distance_km=max_daily_distance_km,
+                time_limit_seconds=time_limit_seconds, store_visit_time_minutes=store_visit_time_minutes
+            )
+            if not solution or solution['summary']['total_stores_covered'] < self.num_stores:
+                solution = best_probe
+        return {
+            'min_salespeople': covering,
+            'lower_bound': lower_bound,
+            'probes': probes,
+            'solution': solution
+        }
+    
+    @staticmethod
+    def _mark_pareto(rows):
+        """Flag solved rows not dominated on (max coverage, min distance, min time)"""
+        solved = [row for row in rows if row['solved']]
+        for row in rows:
+            row['pareto_optimal'] = False
+        if not solved:
             return
+        costs = np.array([
+            [-row['coverage_percentage'], row['total_distance_km'], row['total_time_hours']] for row in solved
+        ])
+        # dominated[i]: some j is no worse on every objective and strictly better on one
+        no_worse = (costs[:, None, :] <= costs[None, :, :]).all(axis=2)
+        better = (costs[:, None, :] < costs[None, :, :]).any(axis=2)
+        dominated = (no_worse & better).any(axis=0)
+        for row, is_dominated in zip(solved, dominated):
+            row['pareto_optimal'] = not bool(is_dominated)
+    
+    def _leg_distances(self, from_stops, to_stops):
+        """Integer meter distances between paired route stops, from the matrix where possible"""
+        from_lat = np.array([stop['lat'] for stop in from_stops], dtype=float)
+        from_lon = np.array([stop['long'] for stop in from_stops], dtype=float)
+        to_lat = np.array([stop['lat'] for stop in to_stops], dtype=float)
+        to_lon = np.array([stop['long'] for stop in to_stops], dtype=float)
+        if self.distance_matrix is None:
+            return pairwise_distances(from_lat, from_lon, to_lat, to_lon, self.distance_mode).astype(int)
+        
+        from_idx = self.table.positions([stop['node'] for stop in from_stops])
+        to_idx = self.table.positions([stop['node'] for stop in to_stops])
+        known = (from_idx >= 0) & (to_idx >= 0)
+        distances = np.zeros(len(from_stops), dtype=int)
+        distances[known] = self.distance_matrix[from_idx[known], to_idx[known]]
+        if not known.all():
+            unknown = ~known
+            distances[unknown] = pairwise_distances(
+                from_lat[unknown], from_lon[unknown], to_lat[unknown], to_lon[unknown], self.distance_mode
+            ).astype(int)
+        return distances
+    
+    def insert_stores(self, solution, new_stores, daily_working_hours=8,
+                      max_daily_distance_km=200, store_visit_time_minutes=30):
+        """
+        Insert new stores into an existing solution by cheapest feasible insertion,
+        without re-solving. new_stores: DataFrame or list of dicts with node, lat, long.
+        Each store costs O(route stops); stores that fit no route within the Distance
+        and Time limits are reported in 'uncovered_stores', and stores already on a
+        route are left where they are and listed in 'skipped'.
+        """
+        max_distance = max_daily_distance_km * 1000
+        max_time = daily_working_hours * 60
+        speed_mpm = (self.avg_speed_kmh * 1000) / 60
         
-        print("\n" + "="*60)
-        print("BEAT PLANNING OPTIMIZATION RESULTS")
-        print("="*60)
+        def travel_time(distances):
+            return (np.asarray(distances) / speed_mpm).astype(int)
         
-        # Print summary
-        summary = solution['summary']
-        print(f"\nSUMMARY:")
-        print(f"Total Stores Covered: {summary['total_stores_covered']}/{self.num_stores} ({summary['coverage_percentage']:.1f}%)")
-        print(f"Total Distance: {summary['total_distance_km']:.2f} km")
-        print(f"Total Time: {summary['total_time_hours']:.2f} hours")
-        print(f"Avg Distance per Salesperson: {summary['avg_distance_per_salesperson']:.2f} km")
-        print(f"Avg Time per Salesperson: {summary['avg_time_per_salesperson']:.2f} hours")
-        
-        # Print individual routes
-        print(f"\nROUTE DETAILS:")
-        for route in solution['routes']:
-            if len(route['route']) > 2:  # Only show routes with actual visits
-                print(f"\nSalesperson {route['vehicle_id'] + 1}:")
-                print(f"  Distance: {route['distance']/1000:.2f} km")
-                print(f"  Time: {route['time']/60:.2f} hours")
-                print(f"  Stores Visited: {route['stores_visited']}")
-                print(f"  Route: ", end="")
-                route_nodes = [loc['node'] for loc in route['route']]
-                print(" -> ".join(map(str, route_nodes)))
+        routes = [dict(route, route=[dict(stop) for stop in route['route']]) for route in solution['routes']]
+        
+        # Current totals recomputed from legs so feasibility checks match the model
+        for route in routes:
+            stops = route['route']
+            legs = self._leg_distances(stops[:-1], stops[1:])
+            route['distance'] = int(legs.sum())
+            route['time'] = int(travel_time(legs).sum()) + store_visit_time_minutes * route['stores_visited']
+        
+        if isinstance(new_stores, pd.DataFrame):
+            new_stores = new_stores.to_dict(orient='records')
+        
+        # Stores already on a route are skipped; uncovered entries are keyed by node
+        routed = set(str(stop['node']) for route in routes for stop in route['route'] if stop['type'] == 'store')
+        uncovered = {str(store['node']): dict(store) for store in solution.get('uncovered_stores') or []}
+        inserted = []
+        skipped = []
+        for store in new_stores:
+            new_stop = {'node': store['node'], 'lat': float(store['lat']),
+                        'long': float(store['long']), 'type': 'store'}
+            key = str(new_stop['node'])
+            if key in routed:
+                skipped.append({'node': new_stop['node'], 'reason': "Already on a route"})
+                continue
+            
+            # Every insertion slot (between consecutive stops) across all routes
+            slot_route, slot_position, slot_from, slot_to = [], [], [], []
+            for route_pos, route in enumerate(routes):
+                stops = route['route']
+                for position in range(1, len(stops)):
+                    slot_route.append(route_pos)
+                    slot_position.append(position)
+                    slot_from.append(stops[position - 1])
+                    slot_to.append(stops[position])
+            if not slot_route:
+                uncovered[key] = dict(new_stop, reason="No routes to insert into")
+                continue
+            
+            slot_route = np.array(slot_route)
+            base = self._leg_distances(slot_from, slot_to)
+            to_new = self._leg_distances(slot_from, [new_stop] * len(slot_from))
+            from_new = self._leg_distances([new_stop] * len(slot_to), slot_to)
+            added_distance = to_new + from_new - base
+            added_time = (travel_time(to_new) + travel_time(from_new) - travel_time(base)
+                          + store_visit_time_minutes)
+            
+            route_distance = np.array([route['distance'] for route in routes])[slot_route]
+            route_time = np.array([route['time'] for route in routes])[slot_route]
+            fits_distance = route_distance + added_distance <= max_distance
+            fits_time = route_time + added_time <= max_time
+            feasible = fits_distance & fits_time
+            
+            if not feasible.any():
+                if not fits_distance.any():
+                    reason = f"Distance constraint exceeded (limit: {max_daily_distance_km} km)"
+                elif not fits_time.any():
+                    reason = f"Time constraint exceeded (limit: {daily_working_hours} hours)"
+                else:
+                    reason = "No route fits both Distance and Time limits"
+                uncovered[key] = dict(new_stop, reason=reason)
+                continue
+            
+            best = int(np.flatnonzero(feasible)[np.argmin(added_distance[feasible])])
+            route = routes[slot_route[best]]
+            route['route'].insert(slot_position[best], new_stop)
+            route['distance'] += int(added_distance[best])
+            route['time'] += int(added_time[best])
+            route['stores_visited'] += 1
+            routed.add(key)
+            uncovered.pop(key, None)
+            inserted.append({
+                'node': new_stop['node'],
+                'vehicle_id': route['vehicle_id'],
+                'position': slot_position[best],
+                'added_distance': int(added_distance[best]),
+                'added_time': int(added_time[best])
+            })
+        
+        results = dict(solution)
+        results['routes'] = routes
+        results['total_distance'] = sum(route['distance'] for route in routes)
+        results['total_time'] = sum(route['time'] for route in routes)
+        results['summary'] = self._summarize(results)
+        # Coverage over every store the plan knows of: the table's, the new ones and any uncovered
+        all_stores = set(str(node) for node in self.table.store_nodes)
+        all_stores.update(str(store['node']) for store in new_stores)
+        all_stores.update(uncovered)
+        all_stores.update(routed)
+        results['summary']['total_stores_covered'] = len(routed)
+        results['summary']['coverage_percentage'] = (len(routed) / len(all_stores)) * 100 if all_stores else 0.0
+        if 'uncovered_count' in solution.get('summary', {}):
+            results['summary']['uncovered_count'] = len(uncovered)
+        results['inserted'] = inserted
+        results['skipped'] = skipped
+        results['uncovered_stores'] = list(uncovered.values())
+        return results
+    
+    def print_solution(self, solution, file=None):
+        """Print formatted solution"""
+        write_solution_report(solution, self.num_stores, file)
 
     def create_sample_assignments(self, num_salespeople, output_file='assignments.csv'):
         """Create a sample assignments CSV file"""
@@ -308,7 +1115,7 @@ class BeatPlanningOptimizer:
         # Distribute salespeople across starting points
         for i in range(num_salespeople):
             depot_idx = i % self.num_starting_points
-            depot_name = self.starting_points.iloc[depot_idx]['node']
+            depot_name = self.table.nodes[depot_idx]
             
             assignments.append({
                 'salesperson_id': i + 1,
@@ -321,6 +1128,163 @@ class BeatPlanningOptimizer:
         print(assignments_df)
         return assignments_df
 
+def _solve_cluster(task):
+    """Process-pool worker: solve one starting point's cluster as an independent VRP"""
+    optimizer = BeatPlanningOptimizer(
+        task['locations'],
+        task['assignments'],
+        distance_mode=task['distance_mode'],
+        avg_speed_kmh=task['avg_speed_kmh'],
+        sparse_neighbors=task['sparse_neighbors']
+    )
+    return optimizer.solve_beat_planning(
+        num_salespeople=len(task['assignments']),
+        daily_working_hours=task['daily_working_hours'],
+        max_daily_distance_km=task['max_daily_distance_km'],
+        time_limit_seconds=task['time_limit_seconds'],
+        store_visit_time_minutes=task['store_visit_time_minutes']
+    )
+
+def _worker_optimizer(task):
+    """Rebuild an optimizer in a pool worker from BeatPlanningOptimizer._shared_worker_task()"""
+    return BeatPlanningOptimizer(
+        task['locations'],
+        task['assignments'],
+        distance_mode=task['distance_mode'],
+        avg_speed_kmh=task['avg_speed_kmh'],
+        matrix_cache=MatrixCache(task['cache_dir'], task['cache_max_bytes']),
+        sparse_neighbors=task['sparse_neighbors']
+    )
+
+def _solve_weekly_days(task):
+    """Process-pool worker: solve a subset of a weekly plan's days on one index manager"""
+    optimizer = _worker_optimizer(task)
+    data = optimizer.create_data_model(task['num_salespeople'], task['daily_working_hours'],
+                                       task['max_daily_distance_km'], task['store_visit_time_minutes'],
+                                       as_lists=False)
+    return optimizer._solve_days(data, task['day_nodes'], task['days'], task['time_limit_seconds'])
+
+def _solve_scenario(task):
+    """Process-pool worker: solve one sweep scenario and return its metrics row"""
+    row = {
+        'num_salespeople': task['num_salespeople'],
+        'daily_working_hours': task['daily_working_hours'],
+        'max_daily_distance_km': task['max_daily_distance_km'],
+        'solved': False,
+        'stores_covered': 0,
+        'coverage_percentage': 0.0,
+        'total_distance_km': 0.0,
+        'total_time_hours': 0.0
+    }
+    try:
+        optimizer = _worker_optimizer(task)
+        solution = optimizer.solve_beat_planning(
+            num_salespeople=task['num_salespeople'],
+            daily_working_hours=task['daily_working_hours'],
+            max_daily_distance_km=task['max_daily_distance_km'],
+            time_limit_seconds=task['time_limit_seconds'],
+            store_visit_time_minutes=task['store_visit_time_minutes']
+        )
+    except ValueError as e:
+        # e.g. assignments that do not match this scenario's fleet size
+        row['error'] = str(e)
+        return row
+    if solution:
+        summary = solution['summary']
+        row.update(
+            solved=True,
+            stores_covered=summary['total_stores_covered'],
+            coverage_percentage=summary['coverage_percentage'],
+            total_distance_km=summary['total_distance_km'],
+            total_time_hours=summary['total_time_hours']
+        )
+    return row
+
+def _spread_candidates(low, high, count):
+    """Up to count distinct fleet sizes spread evenly over [low, high] (the midpoint for one)"""
+    if high < low:
+        return []
+    if count == 1:
+        return [(low + high) // 2]
+    return sorted(set(np.linspace(low, high, min(count, high - low + 1)).round().astype(int).tolist()))
+
+def _solve_fleet_probe(task):
+    """Process-pool worker: solve one fleet size for find_minimum_fleet"""
+    optimizer = _worker_optimizer(task)
+    solution = optimizer.solve_beat_planning(
+        num_salespeople=task['num_salespeople'],
+        daily_working_hours=task['daily_working_hours'],
+        max_daily_distance_km=task['max_daily_distance_km'],
+        time_limit_seconds=task['time_limit_seconds'],
+        store_visit_time_minutes=task['store_visit_time_minutes']
+    )
+    return task['num_salespeople'], solution
+
+def run_solve_job(params, cancel_event=None, progress=None):
+    """
+    Job-pool worker for the planner API: parse the uploaded CSV bytes and solve.
+    params: locations/assignments bytes plus solve_beat_planning keyword arguments
+    progress: optional shared dict whose 'latest' slot is overwritten with
+        (sequence, update) for each improving solution during the search
+    """
+    params = dict(params)
+    locations = _read_table(params.pop('locations'))
+    assignments = params.pop('assignments', None)
+    if assignments is not None:
+        assignments = _read_table(assignments)
+    decompose = params.pop('decompose', False)
+    if isinstance(params.get('initial_routes'), dict):
+        # Accept a whole previous solution as well as its routes list
+        params['initial_routes'] = params['initial_routes'].get('routes')
+    
+    optimizer = BeatPlanningOptimizer(locations, assignments, matrix_cache=MatrixCache())
+    if decompose:
+        params.pop('target_stores_per_day', None)
+        params.pop('initial_routes', None)
+        params['max_workers'] = PLANNER_JOB_INNER_WORKERS
+        return optimizer.solve_beat_planning_decomposed(**params)
+    should_stop = cancel_event.is_set if cancel_event is not None else None
+    on_solution = None
+    if progress is not None:
+        sequence = itertools.count(1)
+
+        def on_solution(solution, objective):
+            # Replaces the previous update, so unread solutions never pile up
+            progress['latest'] = (next(sequence), {'objective': objective, 'solution': solution})
+    return optimizer.solve_beat_planning(should_stop=should_stop, on_solution=on_solution, **params)
+
+def run_weekly_job(params, cancel_event=None):
+    """Job-pool worker for weekly plans: parse the uploaded CSV bytes and solve all days"""
+    params = dict(params)
+    locations = _read_table(params.pop('locations'))
+    assignments = params.pop('assignments', None)
+    if assignments is not None:
+        assignments = _read_table(assignments)
+    optimizer = BeatPlanningOptimizer(locations, assignments, matrix_cache=MatrixCache())
+    params['max_workers'] = PLANNER_JOB_INNER_WORKERS
+    should_stop = cancel_event.is_set if cancel_event is not None else None
+    return optimizer.solve_weekly(should_stop=should_stop, **params)
+
+def run_sweep_job(params, cancel_event=None):
+    """Job-pool worker for scenario sweeps: parse the uploaded CSV bytes and sweep the grids"""
+    params = dict(params)
+    locations = _read_table(params.pop('locations'))
+    assignments = params.pop('assignments', None)
+    if assignments is not None:
+        assignments = _read_table(assignments)
+    optimizer = BeatPlanningOptimizer(locations, assignments, matrix_cache=MatrixCache())
+    params['max_workers'] = PLANNER_JOB_INNER_WORKERS
+    should_stop = cancel_event.is_set if cancel_event is not None else None
+    return optimizer.sweep_scenarios(should_stop=should_stop, **params)
+
+def run_fleet_job(params, cancel_event=None):
+    """Job-pool worker for minimum fleet searches: parse the uploaded CSV bytes and search"""
+    params = dict(params)
+    optimizer = BeatPlanningOptimizer(_read_table(params.pop('locations')), matrix_cache=MatrixCache())
+    params['max_workers'] = PLANNER_JOB_INNER_WORKERS
+    should_stop = cancel_event.is_set if cancel_event is not None else None
+    return optimizer.find_minimum_fleet(should_stop=should_stop, **params)
+
 # Example usage
 if __name__ == "__main__":
     # Method 1: Create assignments automatically
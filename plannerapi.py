@@ -5,10 +5,18 @@ from fastapi import FastAPI, UploadFile, File, Form, Depends, HTTPException
 from salespersonapi import router as salesperson_router
 from authapi import router as auth_router
 from visitapi import router as visit_router
-from fastapi.responses import JSONResponse, PlainTextResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from middleware import add_cors_middleware
 import pandas as pd
-from planner import BeatPlanningOptimizer
+from planner import BeatPlanningOptimizer, write_solution_report, run_solve_job, run_weekly_job, run_sweep_job, run_fleet_job
+from matrix_cache import MatrixCache
+from location_table import LocationTable
+from jobs import JobManager, JobNotFound
+from solution_cache import SolutionCache, solution_key
+from route_export import export_chunks, EXPORT_FORMATS
+import asyncio
+import io
+import json
 import os
 
 
@@ -19,9 +27,24 @@ app.include_router(salesperson_router)
 app.include_router(auth_router)
 app.include_router(visit_router)
 
+# Shared on-disk distance/time matrix cache (memory-mapped .npy files)
+matrix_cache = MatrixCache()
+
+# Bounded process pool for solves so the event loop never blocks on OR-Tools
+job_manager = JobManager()
+
+# Results of identical solve requests (same file bytes and parameters)
+solution_cache = SolutionCache()
+
+# How often the SSE stream checks a job for new solutions (seconds)
+SSE_POLL_SECONDS = float(os.getenv("SSE_POLL_SECONDS", "0.25"))
+# Largest scenario grid a single sweep request may ask for
+SWEEP_MAX_SCENARIOS = int(os.getenv("SWEEP_MAX_SCENARIOS", "200"))
+
 # Initialize DB on startup (if using Neon via DATABASE_URL)
 from db import DATABASE_URL, init_db as _init_db
-from db import get_conn
+from db import connection, pool_stats, close_pool
+from rollups import read_metrics
 from authapi import get_current_user
 
 
@@ -34,6 +57,11 @@ def _startup_init_db():
         # don't crash if DB not configured yet; errors will surface on use
         pass
 
+@app.on_event("shutdown")
+def _shutdown_jobs():
+    job_manager.shutdown()
+    close_pool()
+
 @app.get("/")
 def root():
     return {"message": "Beat Planning API is running"}
@@ -46,30 +74,31 @@ def admin_metrics(user=Depends(get_current_user)):
     if role not in ("manager", "admin"):
         raise HTTPException(status_code=403, detail="Requires manager role")
 
-    conn = get_conn()
-    cur = conn.cursor()
-    try:
-        cur.execute("SELECT COUNT(*) FROM events")
-        total_events = cur.fetchone()[0]
+    with connection() as conn, conn.cursor() as cur:
+        return read_metrics(cur)
 
-        cur.execute("SELECT COUNT(*) FROM events WHERE timestamp::date = current_date")
-        events_today = cur.fetchone()[0]
 
-        cur.execute("SELECT COUNT(DISTINCT sales_id) FROM events")
-        unique_sales = cur.fetchone()[0]
+@app.get("/admin/db_pool")
+def admin_db_pool(user=Depends(get_current_user)):
+    """Connection pool size, wait and checkout times. Manager or admin only."""
+    if user.get("role") not in ("manager", "admin"):
+        raise HTTPException(status_code=403, detail="Requires manager role")
+    return pool_stats()
 
-        cur.execute("SELECT COUNT(*) FROM events WHERE timestamp >= now() - interval '7 days'")
-        events_last_7_days = cur.fetchone()[0]
+def _parse_csv(data, filename):
+    try:
+        return pd.read_csv(io.BytesIO(data))
+    except (pd.errors.ParserError, pd.errors.EmptyDataError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=f"Could not parse {filename}: {e}")
 
-        return {
-            "total_events": total_events,
-            "events_today": events_today,
-            "unique_sales": unique_sales,
-            "events_last_7_days": events_last_7_days,
-        }
-    finally:
-        cur.close()
-        conn.close()
+async def _read_upload(upload):
+    """Parse an uploaded CSV in a worker thread, so large files never block the event loop"""
+    if upload is None:
+        return None
+    # Rewound because the solve endpoints may already have read the bytes for the job params
+    await upload.seek(0)
+    data = await upload.read()
+    return await asyncio.to_thread(_parse_csv, data, upload.filename)
 
 # Endpoint: create_data_model
 @app.post("/create_data_model")
@@ -81,26 +110,76 @@ async def create_data_model(
     max_daily_distance_km: int = Form(30),
     store_visit_time_minutes: int = Form(15)
 ):
-    locations_path = f"temp_{locations_file.filename}"
-    with open(locations_path, "wb") as f:
-        f.write(await locations_file.read())
-    assignments_path = None
-    if assignments_file:
-        assignments_path = f"temp_{assignments_file.filename}"
-        with open(assignments_path, "wb") as f:
-            f.write(await assignments_file.read())
-    optimizer = BeatPlanningOptimizer(locations_path, assignments_path)
-    data_model = optimizer.create_data_model(
-        num_salespeople=num_salespeople,
-        daily_working_hours=daily_working_hours,
-        max_daily_distance_km=max_daily_distance_km,
-        store_visit_time_minutes=store_visit_time_minutes
-    )
-    os.remove(locations_path)
-    if assignments_path:
-        os.remove(assignments_path)
+    locations = await _read_upload(locations_file)
+    assignments = await _read_upload(assignments_file)
+
+    def run():
+        optimizer = BeatPlanningOptimizer(locations, assignments, matrix_cache=matrix_cache)
+        return optimizer.create_data_model(
+            num_salespeople=num_salespeople,
+            daily_working_hours=daily_working_hours,
+            max_daily_distance_km=max_daily_distance_km,
+            store_visit_time_minutes=store_visit_time_minutes
+        )
+
+    # Matrix building runs in a thread so the event loop stays free
+    data_model = await asyncio.to_thread(run)
     return JSONResponse(content=data_model)
 
+async def _solve_job_params(locations_file, assignments_file, num_salespeople, daily_working_hours,
+                            max_daily_distance_km, target_stores_per_day, decompose, initial_routes=None,
+                            store_visit_time_minutes=30):
+    """Read uploads into bytes and bundle solve arguments for a pool worker"""
+    if initial_routes:
+        try:
+            initial_routes = json.loads(initial_routes)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="initial_routes must be JSON (a previous solution or its routes)")
+    return {
+        'locations': await locations_file.read(),
+        'assignments': await assignments_file.read() if assignments_file else None,
+        'num_salespeople': num_salespeople,
+        'daily_working_hours': daily_working_hours,
+        'max_daily_distance_km': max_daily_distance_km,
+        'target_stores_per_day': target_stores_per_day,
+        'decompose': decompose,
+        'initial_routes': initial_routes or None,
+        'store_visit_time_minutes': store_visit_time_minutes
+    }
+
+def _submit_cached(kind, fn, params, bypass_cache=False, **submit_kwargs):
+    """
+    Serve a repeated request (same file bytes and parameters) from the solution cache,
+    otherwise run it as a job and cache its result. bypass_cache skips the lookup but
+    still refreshes the entry with the new result.
+    """
+    key = solution_key(
+        kind,
+        (params['locations'], params.get('assignments')),
+        {k: v for k, v in params.items() if k not in ('locations', 'assignments')}
+    )
+    if not bypass_cache:
+        cached = solution_cache.get(key)
+        if cached is not None:
+            return job_manager.completed(kind, cached)
+
+    job = job_manager.submit(kind, fn, params, **submit_kwargs)
+
+    def store_result(future):
+        # Only complete, uninterrupted solves are worth reusing
+        if future.cancelled() or job.cancel_requested or job.stop_requested:
+            return
+        if future.exception() is None and future.result():
+            solution_cache.put(key, future.result())
+
+    job.future.add_done_callback(store_result)
+    return job
+
+def _job_error_response(exc):
+    if isinstance(exc, ValueError):
+        return JSONResponse(content={"error": str(exc)}, status_code=400)
+    return JSONResponse(content={"error": str(exc)}, status_code=500)
+
 # Endpoint: solve_beat_planning
 @app.post("/solve_beat_planning")
 async def solve_beat_planning(
@@ -109,38 +188,405 @@ async def solve_beat_planning(
     num_salespeople: int = Form(...),
     daily_working_hours: int = Form(8),
     max_daily_distance_km: int = Form(200),
-    target_stores_per_day: int = Form(None)
+    target_stores_per_day: int = Form(None),
+    decompose: bool = Form(False),
+    initial_routes: str = Form(None),
+    store_visit_time_minutes: int = Form(30),
+    bypass_cache: bool = Form(False)
 ):
-    locations_path = f"temp_{locations_file.filename}"
-    with open(locations_path, "wb") as f:
-        f.write(await locations_file.read())
-    assignments_path = None
-    if assignments_file:
-        assignments_path = f"temp_{assignments_file.filename}"
-        with open(assignments_path, "wb") as f:
-            f.write(await assignments_file.read())
-    optimizer = BeatPlanningOptimizer(locations_path, assignments_path)
-    try:
-        solution = optimizer.solve_beat_planning(
-            num_salespeople=num_salespeople,
-            target_stores_per_day=target_stores_per_day,
-            daily_working_hours=daily_working_hours,
-            max_daily_distance_km=max_daily_distance_km
-        )
-    except ValueError as ve:
-        os.remove(locations_path)
-        if assignments_path:
-            os.remove(assignments_path)
-        return JSONResponse(content={"error": str(ve)}, status_code=400)
-    os.remove(locations_path)
-    if assignments_path:
-        os.remove(assignments_path)
-    print("Returned to UI:", solution)
+    params = await _solve_job_params(locations_file, assignments_file, num_salespeople, daily_working_hours,
+                                     max_daily_distance_km, target_stores_per_day, decompose, initial_routes,
+                                     store_visit_time_minutes)
+    # Runs in the job pool; awaiting keeps the event loop free during the solve
+    job = _submit_cached("solve_beat_planning", run_solve_job, params, bypass_cache)
+    try:
+        solution = await asyncio.wrap_future(job.future)
+    except Exception as exc:
+        return _job_error_response(exc)
     if solution:
         return JSONResponse(content=solution)
     else:
         return JSONResponse(content={"error": "No solution found"}, status_code=400)
 
+# Endpoint: submit a solve job (returns immediately with a job id)
+@app.post("/jobs/solve_beat_planning", status_code=202)
+async def submit_solve_job(
+    locations_file: UploadFile = File(...),
+    assignments_file: UploadFile = File(None),
+    num_salespeople: int = Form(...),
+    daily_working_hours: int = Form(8),
+    max_daily_distance_km: int = Form(200),
+    target_stores_per_day: int = Form(None),
+    decompose: bool = Form(False),
+    initial_routes: str = Form(None),
+    store_visit_time_minutes: int = Form(30),
+    bypass_cache: bool = Form(False)
+):
+    params = await _solve_job_params(locations_file, assignments_file, num_salespeople, daily_working_hours,
+                                     max_daily_distance_km, target_stores_per_day, decompose, initial_routes,
+                                     store_visit_time_minutes)
+    job = _submit_cached("solve_beat_planning", run_solve_job, params, bypass_cache, with_progress=True)
+    return job.to_dict()
+
+async def _weekly_job_params(locations_file, assignments_file, num_salespeople, working_days_per_week,
+                             daily_working_hours, max_daily_distance_km, visit_frequencies,
+                             store_visit_time_minutes=30):
+    """Read uploads into bytes and bundle weekly-plan arguments for a pool worker"""
+    if visit_frequencies:
+        try:
+            visit_frequencies = json.loads(visit_frequencies)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="visit_frequencies must be a JSON object of node -> visits per week")
+    return {
+        'locations': await locations_file.read(),
+        'assignments': await assignments_file.read() if assignments_file else None,
+        'num_salespeople': num_salespeople,
+        'working_days_per_week': working_days_per_week,
+        'visit_frequencies': visit_frequencies or None,
+        'daily_working_hours': daily_working_hours,
+        'max_daily_distance_km': max_daily_distance_km,
+        'store_visit_time_minutes': store_visit_time_minutes,
+        'max_workers': None
+    }
+
+# Endpoint: weekly beat plan (one day-route per salesperson per working day)
+@app.post("/solve_weekly")
+async def solve_weekly(
+    locations_file: UploadFile = File(...),
+    assignments_file: UploadFile = File(None),
+    num_salespeople: int = Form(...),
+    working_days_per_week: int = Form(5),
+    daily_working_hours: int = Form(8),
+    max_daily_distance_km: int = Form(200),
+    visit_frequencies: str = Form(None),
+    store_visit_time_minutes: int = Form(30),
+    bypass_cache: bool = Form(False)
+):
+    params = await _weekly_job_params(locations_file, assignments_file, num_salespeople, working_days_per_week,
+                                      daily_working_hours, max_daily_distance_km, visit_frequencies,
+                                      store_visit_time_minutes)
+    job = _submit_cached("solve_weekly", run_weekly_job, params, bypass_cache)
+    try:
+        plan = await asyncio.wrap_future(job.future)
+    except Exception as exc:
+        return _job_error_response(exc)
+    return JSONResponse(content=plan)
+
+@app.post("/jobs/solve_weekly", status_code=202)
+async def submit_weekly_job(
+    locations_file: UploadFile = File(...),
+    assignments_file: UploadFile = File(None),
+    num_salespeople: int = Form(...),
+    working_days_per_week: int = Form(5),
+    daily_working_hours: int = Form(8),
+    max_daily_distance_km: int = Form(200),
+    visit_frequencies: str = Form(None),
+    store_visit_time_minutes: int = Form(30),
+    bypass_cache: bool = Form(False)
+):
+    params = await _weekly_job_params(locations_file, assignments_file, num_salespeople, working_days_per_week,
+                                      daily_working_hours, max_daily_distance_km, visit_frequencies,
+                                      store_visit_time_minutes)
+    job = _submit_cached("solve_weekly", run_weekly_job, params, bypass_cache)
+    return job.to_dict()
+
+def _parse_grid(value, name):
+    """Grid values from '2,3,4' or a JSON list"""
+    try:
+        values = json.loads(f"[{value.strip().strip('[]')}]")
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{name} must be comma-separated numbers or a JSON list")
+    if not values or not all(isinstance(v, (int, float)) and v > 0 for v in values):
+        raise HTTPException(status_code=400, detail=f"{name} must contain positive numbers")
+    return [int(v) if float(v).is_integer() else v for v in dict.fromkeys(values)]
+
+async def _sweep_job_params(locations_file, assignments_file, num_salespeople, daily_working_hours,
+                            max_daily_distance_km, time_limit_seconds, store_visit_time_minutes):
+    """Read uploads into bytes and bundle sweep grids for a pool worker"""
+    grids = {
+        'num_salespeople_values': _parse_grid(num_salespeople, 'num_salespeople'),
+        'daily_working_hours_values': _parse_grid(daily_working_hours, 'daily_working_hours'),
+        'max_daily_distance_km_values': _parse_grid(max_daily_distance_km, 'max_daily_distance_km')
+    }
+    scenarios = 1
+    for values in grids.values():
+        scenarios *= len(values)
+    if scenarios > SWEEP_MAX_SCENARIOS:
+        raise HTTPException(status_code=400, detail=f"{scenarios} scenarios requested, limit is {SWEEP_MAX_SCENARIOS}")
+    return dict(
+        grids,
+        locations=await locations_file.read(),
+        assignments=await assignments_file.read() if assignments_file else None,
+        time_limit_seconds=time_limit_seconds,
+        store_visit_time_minutes=store_visit_time_minutes
+    )
+
+# Endpoint: solve a grid of constraint scenarios on one shared matrix, return a Pareto table
+@app.post("/sweep_scenarios")
+async def sweep_scenarios(
+    locations_file: UploadFile = File(...),
+    assignments_file: UploadFile = File(None),
+    num_salespeople: str = Form(...),
+    daily_working_hours: str = Form("8"),
+    max_daily_distance_km: str = Form("200"),
+    time_limit_seconds: int = Form(30),
+    store_visit_time_minutes: int = Form(30),
+    bypass_cache: bool = Form(False)
+):
+    params = await _sweep_job_params(locations_file, assignments_file, num_salespeople, daily_working_hours,
+                                     max_daily_distance_km, time_limit_seconds, store_visit_time_minutes)
+    job = _submit_cached("sweep_scenarios", run_sweep_job, params, bypass_cache)
+    try:
+        table = await asyncio.wrap_future(job.future)
+    except Exception as exc:
+        return _job_error_response(exc)
+    return JSONResponse(content=table)
+
+@app.post("/jobs/sweep_scenarios", status_code=202)
+async def submit_sweep_job(
+    locations_file: UploadFile = File(...),
+    assignments_file: UploadFile = File(None),
+    num_salespeople: str = Form(...),
+    daily_working_hours: str = Form("8"),
+    max_daily_distance_km: str = Form("200"),
+    time_limit_seconds: int = Form(30),
+    store_visit_time_minutes: int = Form(30),
+    bypass_cache: bool = Form(False)
+):
+    params = await _sweep_job_params(locations_file, assignments_file, num_salespeople, daily_working_hours,
+                                     max_daily_distance_km, time_limit_seconds, store_visit_time_minutes)
+    job = _submit_cached("sweep_scenarios", run_sweep_job, params, bypass_cache)
+    return job.to_dict()
+
+async def _fleet_job_params(locations_file, daily_working_hours, max_daily_distance_km, max_salespeople,
+                            probe_time_limit_seconds, time_limit_seconds, store_visit_time_minutes):
+    """Read the locations upload into bytes and bundle fleet search arguments for a pool worker"""
+    return {
+        'locations': await locations_file.read(),
+        'daily_working_hours': daily_working_hours,
+        'max_daily_distance_km': max_daily_distance_km,
+        'max_salespeople': max_salespeople,
+        'probe_time_limit_seconds': probe_time_limit_seconds,
+        'time_limit_seconds': time_limit_seconds,
+        'store_visit_time_minutes': store_visit_time_minutes
+    }
+
+# Endpoint: smallest fleet whose routing plan covers every store
+@app.post("/min_fleet")
+async def min_fleet(
+    locations_file: UploadFile = File(...),
+    daily_working_hours: int = Form(8),
+    max_daily_distance_km: int = Form(200),
+    max_salespeople: int = Form(None),
+    probe_time_limit_seconds: int = Form(5),
+    time_limit_seconds: int = Form(30),
+    store_visit_time_minutes: int = Form(30),
+    bypass_cache: bool = Form(False)
+):
+    params = await _fleet_job_params(locations_file, daily_working_hours, max_daily_distance_km, max_salespeople,
+                                     probe_time_limit_seconds, time_limit_seconds, store_visit_time_minutes)
+    job = _submit_cached("min_fleet", run_fleet_job, params, bypass_cache)
+    try:
+        result = await asyncio.wrap_future(job.future)
+    except Exception as exc:
+        return _job_error_response(exc)
+    return JSONResponse(content=result)
+
+@app.post("/jobs/min_fleet", status_code=202)
+async def submit_min_fleet_job(
+    locations_file: UploadFile = File(...),
+    daily_working_hours: int = Form(8),
+    max_daily_distance_km: int = Form(200),
+    max_salespeople: int = Form(None),
+    probe_time_limit_seconds: int = Form(5),
+    time_limit_seconds: int = Form(30),
+    store_visit_time_minutes: int = Form(30),
+    bypass_cache: bool = Form(False)
+):
+    params = await _fleet_job_params(locations_file, daily_working_hours, max_daily_distance_km, max_salespeople,
+                                     probe_time_limit_seconds, time_limit_seconds, store_visit_time_minutes)
+    job = _submit_cached("min_fleet", run_fleet_job, params, bypass_cache)
+    return job.to_dict()
+
+@app.get("/cache/solutions")
+def solution_cache_stats():
+    return solution_cache.stats()
+
+@app.delete("/cache/solutions")
+def clear_solution_cache():
+    solution_cache.clear()
+    return solution_cache.stats()
+
+@app.get("/jobs")
+def list_jobs():
+    return {"jobs": job_manager.list()}
+
+@app.get("/jobs/{job_id}")
+def job_status(job_id: str):
+    try:
+        return job_manager.get(job_id).to_dict()
+    except JobNotFound:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+@app.get("/jobs/{job_id}/result")
+def job_result(job_id: str):
+    try:
+        job = job_manager.get(job_id)
+    except JobNotFound:
+        raise HTTPException(status_code=404, detail="Job not found")
+    status = job.status
+    if status in ("queued", "running", "cancelling"):
+        return JSONResponse(content=job.to_dict(), status_code=202)
+    if status == "cancelled":
+        return JSONResponse(content={"error": "Job was cancelled"}, status_code=409)
+    if status == "failed":
+        return _job_error_response(job.future.exception())
+    solution = job.future.result()
+    if solution:
+        return JSONResponse(content=solution)
+    return JSONResponse(content={"error": "No solution found"}, status_code=400)
+
+EXPORT_MEDIA_TYPES = {'csv': 'text/csv', 'parquet': 'application/vnd.apache.parquet'}
+
+def _export_response(solution, export_format, part, filename):
+    """Stream a solution's routes or uncovered stores without building the whole file"""
+    if export_format not in EXPORT_FORMATS:
+        return JSONResponse(content={"error": f"format must be one of {list(EXPORT_FORMATS)}"}, status_code=400)
+    if not isinstance(solution, dict) or 'routes' not in solution:
+        return JSONResponse(content={"error": "solution must contain 'routes'"}, status_code=400)
+    try:
+        chunks = export_chunks(solution, export_format, part)
+    except ValueError as e:
+        return JSONResponse(content={"error": str(e)}, status_code=400)
+    except RuntimeError as e:
+        return JSONResponse(content={"error": str(e)}, status_code=501)
+    suffix = '_uncovered' if part == 'uncovered' else ''
+    return StreamingResponse(
+        chunks,
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}{suffix}.{export_format}"'}
+    )
+
+@app.get("/jobs/{job_id}/export")
+def export_job_routes(job_id: str, format: str = 'csv', part: str = 'routes'):
+    """Export a finished job's plan; part=uncovered gives the _uncovered companion"""
+    try:
+        job = job_manager.get(job_id)
+    except JobNotFound:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status != "done":
+        return JSONResponse(content=job.to_dict(), status_code=202 if not job.future.done() else 409)
+    solution = job.future.result()
+    if not solution:
+        return JSONResponse(content={"error": "No solution found"}, status_code=400)
+    return _export_response(solution, format, part, f"beat_plan_{job_id}")
+
+# Endpoint: export a solution (JSON upload) as CSV or Parquet
+@app.post("/export_routes")
+async def export_routes(
+    solution_file: UploadFile = File(...),
+    format: str = Form('csv'),
+    part: str = Form('routes')
+):
+    solution_file.file.seek(0)
+    try:
+        solution = json.load(solution_file.file)
+    except ValueError:
+        return JSONResponse(content={"error": "solution_file must be JSON"}, status_code=400)
+    return _export_response(solution, format, part, "beat_planning_output")
+
+def _sse(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+async def _job_event_stream(job):
+    """Yield each improving solution as it arrives, then a final 'done' event"""
+    seen = 0
+    while True:
+        finished = job.future.done()
+        count = await asyncio.to_thread(job.poll_updates)
+        if count > seen and job.latest_update is not None:
+            seen = count
+            update = job.latest_update
+            yield _sse("solution", {
+                "job_id": job.job_id,
+                "sequence": seen,
+                "objective": update["objective"],
+                "solution": update["solution"]
+            })
+        if finished:
+            final = job.to_dict()
+            if final["status"] == "done":
+                final["solution"] = job.future.result()
+            yield _sse("done", final)
+            return
+        await asyncio.sleep(SSE_POLL_SECONDS)
+
+# Endpoint: Server-Sent Events stream of improving solutions for a job
+@app.get("/jobs/{job_id}/stream")
+async def stream_job(job_id: str):
+    try:
+        job = job_manager.get(job_id)
+    except JobNotFound:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return StreamingResponse(
+        _job_event_stream(job),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/jobs/{job_id}/stop")
+def stop_job(job_id: str):
+    """Finish the search early and keep the best plan found so far as the result"""
+    try:
+        return job_manager.stop(job_id).to_dict()
+    except JobNotFound:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+@app.delete("/jobs/{job_id}")
+def cancel_job(job_id: str):
+    try:
+        return job_manager.cancel(job_id).to_dict()
+    except JobNotFound:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+# Endpoint: insert new stores into an existing plan (cheapest feasible insertion, no re-solve)
+@app.post("/insert_stores")
+async def insert_stores(
+    locations_file: UploadFile = File(...),
+    new_stores_file: UploadFile = File(...),
+    solution: str = Form(...),
+    daily_working_hours: int = Form(8),
+    max_daily_distance_km: int = Form(200),
+    store_visit_time_minutes: int = Form(30)
+):
+    try:
+        current_solution = json.loads(solution)
+    except ValueError:
+        return JSONResponse(content={"error": "solution must be JSON"}, status_code=400)
+    if not isinstance(current_solution, dict) or 'routes' not in current_solution:
+        return JSONResponse(content={"error": "solution must contain 'routes'"}, status_code=400)
+    locations = await _read_upload(locations_file)
+    new_stores = await _read_upload(new_stores_file)
+    missing = {'node', 'lat', 'long'} - set(new_stores.columns)
+    if missing:
+        return JSONResponse(content={"error": f"new_stores_file missing columns: {sorted(missing)}"}, status_code=400)
+
+    def run():
+        optimizer = BeatPlanningOptimizer(locations, matrix_cache=matrix_cache)
+        return optimizer.insert_stores(
+            current_solution,
+            new_stores,
+            daily_working_hours=daily_working_hours,
+            max_daily_distance_km=max_daily_distance_km,
+            store_visit_time_minutes=store_visit_time_minutes
+        )
+
+    try:
+        updated = await asyncio.to_thread(run)
+    except (KeyError, ValueError) as e:
+        return JSONResponse(content={"error": str(e)}, status_code=400)
+    return JSONResponse(content=updated)
+
 # Endpoint: print_solution (returns plain text)
 @app.post("/print_solution")
 async def print_solution(
@@ -150,30 +596,20 @@ async def print_solution(
     daily_working_hours: int = Form(8),
     max_daily_distance_km: int = Form(200)
 ):
-    locations_path = f"temp_{locations_file.filename}"
-    with open(locations_path, "wb") as f:
-        f.write(await locations_file.read())
-    assignments_path = None
-    if assignments_file:
-        assignments_path = f"temp_{assignments_file.filename}"
-        with open(assignments_path, "wb") as f:
-            f.write(await assignments_file.read())
-    optimizer = BeatPlanningOptimizer(locations_path, assignments_path)
-    solution = optimizer.solve_beat_planning(
-        num_salespeople=num_salespeople,
-        daily_working_hours=daily_working_hours,
-        max_daily_distance_km=max_daily_distance_km
-    )
-    from io import StringIO
-    import sys
-    old_stdout = sys.stdout
-    sys.stdout = mystdout = StringIO()
-    optimizer.print_solution(solution)
-    sys.stdout = old_stdout
-    os.remove(locations_path)
-    if assignments_path:
-        os.remove(assignments_path)
-    return PlainTextResponse(mystdout.getvalue())
+    params = await _solve_job_params(locations_file, assignments_file, num_salespeople, daily_working_hours,
+                                     max_daily_distance_km, None, False)
+    locations = await _read_upload(locations_file)
+    # Solved in the job pool like /solve_beat_planning (and served from its cache)
+    job = _submit_cached("solve_beat_planning", run_solve_job, params)
+    try:
+        solution = await asyncio.wrap_future(job.future)
+    except Exception as exc:
+        return _job_error_response(exc)
+
+    # The report only needs the store count, not an optimizer and its matrices
+    output = io.StringIO()
+    write_solution_report(solution, LocationTable(locations).num_stores, output)
+    return PlainTextResponse(output.getvalue())
 
 # Endpoint: create_sample_assignments
 @app.post("/create_sample_assignments")
@@ -181,10 +617,11 @@ async def create_sample_assignments(
     locations_file: UploadFile = File(...),
     num_salespeople: int = Form(...)
 ):
-    locations_path = f"temp_{locations_file.filename}"
-    with open(locations_path, "wb") as f:
-        f.write(await locations_file.read())
-    optimizer = BeatPlanningOptimizer(locations_path)
-    assignments_df = optimizer.create_sample_assignments(num_salespeople)
-    os.remove(locations_path)
+    locations = await _read_upload(locations_file)
+
+    def run():
+        optimizer = BeatPlanningOptimizer(locations, matrix_cache=matrix_cache)
+        return optimizer.create_sample_assignments(num_salespeople)
+
+    assignments_df = await asyncio.to_thread(run)
     return JSONResponse(content=assignments_df.to_dict(orient="records"))
@@ -0,0 +1,138 @@
+# Dashboard rollups of the events table.
+# events_daily_sales_rollup and events_sales_rollup (created by db.init_db) hold
+# per-day-and-salesperson and per-salesperson event counts. Check-ins update them
+# in the same statement that inserts the events; `python rollups.py backfill`
+# rebuilds them from existing events. Days are UTC calendar days.
+import sys
+from datetime import timedelta
+from db import connection, init_db
+
+# First keys of the transaction-level advisory locks guarding one rollup day
+# (second key: days since 2000-01-01) or one salesperson (second key: sales_id).
+# Check-ins hold them shared, so they never wait on each other; backfill takes
+# one at a time exclusively while it recounts that day or salesperson.
+ROLLUP_DAY_LOCK = 2501
+ROLLUP_SALES_LOCK = 2502
+
+ROLLUP_LOCKS_QUERY = """
+SELECT pg_advisory_xact_lock_shared(kind, id) FROM (
+    SELECT %(day_lock)s, (t AT TIME ZONE 'UTC')::date - DATE '2000-01-01'
+    FROM unnest(%(timestamps)s::timestamptz[]) AS t
+    UNION
+    SELECT %(sales_lock)s, s FROM unnest(%(sales_ids)s::integer[]) AS s
+    ORDER BY 1, 2
+) AS locks(kind, id)
+"""
+
+# Data-modifying CTEs that add the rows of a relation named `inserted`
+# (with timestamp and sales_id columns) to both rollups. Rows are keyed per
+# salesperson, so concurrent check-ins by different salespeople update
+# different rows; groups are upserted in key order so lock order is fixed.
+ROLLUP_UPDATE_CTES = """
+daily_rollup AS (
+    INSERT INTO events_daily_sales_rollup AS r (day, sales_id, events)
+    SELECT (timestamp AT TIME ZONE 'UTC')::date, sales_id, COUNT(*) FROM inserted GROUP BY 1, 2 ORDER BY 1, 2
+    ON CONFLICT (day, sales_id) DO UPDATE SET events = r.events + EXCLUDED.events
+),
+sales_rollup AS (
+    INSERT INTO events_sales_rollup AS r (sales_id, events, last_event_at)
+    SELECT sales_id, COUNT(*), MAX(timestamp) FROM inserted GROUP BY 1 ORDER BY 1
+    ON CONFLICT (sales_id) DO UPDATE SET
+        events = r.events + EXCLUDED.events,
+        last_event_at = GREATEST(r.last_event_at, EXCLUDED.last_event_at)
+)
+"""
+
+METRICS_QUERY = """
+SELECT
+    COALESCE(SUM(events), 0),
+    COALESCE(SUM(events) FILTER (WHERE day = (now() AT TIME ZONE 'UTC')::date), 0),
+    (SELECT COUNT(*) FROM events_sales_rollup),
+    COALESCE(SUM(events) FILTER (WHERE day > (now() AT TIME ZONE 'UTC')::date - 7), 0)
+FROM events_daily_sales_rollup
+"""
+
+
+def lock_rollups(cur, timestamps, sales_ids):
+    """Take the shared rollup locks for the events about to be inserted; call before inserting"""
+    cur.execute(ROLLUP_LOCKS_QUERY, {
+        "day_lock": ROLLUP_DAY_LOCK,
+        "sales_lock": ROLLUP_SALES_LOCK,
+        "timestamps": list(timestamps),
+        "sales_ids": list(sales_ids),
+    })
+
+
+def read_metrics(cur):
+    """Dashboard counters from the rollups in one query"""
+    cur.execute(METRICS_QUERY)
+    total_events, events_today, unique_sales, events_last_7_days = cur.fetchone()
+    return {
+        "total_events": int(total_events),
+        "events_today": int(events_today),
+        "unique_sales": int(unique_sales),
+        "events_last_7_days": int(events_last_7_days),
+    }
+
+
+def _rebuild_day(day):
+    with connection() as conn, conn.cursor() as cur:
+        # Waits for in-flight check-ins of this day; later ones wait for this commit
+        cur.execute("SELECT pg_advisory_xact_lock(%s, %s - DATE '2000-01-01')", (ROLLUP_DAY_LOCK, day))
+        cur.execute("DELETE FROM events_daily_sales_rollup WHERE day = %s", (day,))
+        cur.execute(
+            "INSERT INTO events_daily_sales_rollup (day, sales_id, events) "
+            "SELECT %(day)s, sales_id, COUNT(*) FROM events "
+            "WHERE timestamp >= %(day)s::timestamp AT TIME ZONE 'UTC' "
+            "AND timestamp < (%(day)s + 1)::timestamp AT TIME ZONE 'UTC' "
+            "GROUP BY sales_id",
+            {"day": day},
+        )
+        return cur.rowcount
+
+
+def _rebuild_salesperson(sales_id):
+    with connection() as conn, conn.cursor() as cur:
+        cur.execute("SELECT pg_advisory_xact_lock(%s, %s)", (ROLLUP_SALES_LOCK, sales_id))
+        cur.execute("DELETE FROM events_sales_rollup WHERE sales_id = %s", (sales_id,))
+        cur.execute(
+            "INSERT INTO events_sales_rollup (sales_id, events, last_event_at) "
+            "SELECT sales_id, COUNT(*), MAX(timestamp) FROM events WHERE sales_id = %s GROUP BY sales_id",
+            (sales_id,),
+        )
+        return cur.rowcount
+
+
+def backfill():
+    """
+    Rebuild both rollups from the events table, one day and then one salesperson
+    per transaction. Check-ins only wait while their own day or salesperson is recounted.
+    """
+    with connection() as conn, conn.cursor() as cur:
+        cur.execute(
+            "SELECT (MIN(timestamp) AT TIME ZONE 'UTC')::date, (MAX(timestamp) AT TIME ZONE 'UTC')::date FROM events"
+        )
+        first, last = cur.fetchone()
+        # Rollup rows outside the events' range are stale and get cleared too
+        cur.execute("SELECT DISTINCT day FROM events_daily_sales_rollup")
+        days = {row[0] for row in cur.fetchall()}
+    if first is not None:
+        days.update(first + timedelta(days=i) for i in range((last - first).days + 1))
+    filled_days = sum(1 for day in sorted(days) if _rebuild_day(day))
+
+    with connection() as conn, conn.cursor() as cur:
+        cur.execute(
+            "SELECT sales_id FROM events_daily_sales_rollup UNION SELECT sales_id FROM events_sales_rollup"
+        )
+        sales_ids = sorted(row[0] for row in cur.fetchall())
+    salespeople = sum(_rebuild_salesperson(sales_id) for sales_id in sales_ids)
+    return {"days": filled_days, "salespeople": salespeople}
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["backfill"]:
+        print("usage: python rollups.py backfill")
+        sys.exit(2)
+    init_db()
+    counts = backfill()
+    print(f"Rebuilt rollups: {counts['days']} days, {counts['salespeople']} salespeople")
@@ -0,0 +1,165 @@
+import csv
+import io
+
+# optional pyarrow import: Parquet export is available only when installed
+try:
+    import pyarrow as pa  # type: ignore
+    import pyarrow.parquet as pq  # type: ignore
+except Exception:
+    pa = None
+    pq = None
+
+ROUTE_COLUMNS = ['salesperson_id', 'sequence', 'node', 'lat', 'long', 'type',
+                 'route_total_distance_km', 'route_total_time_hours']
+# Parquet column types; any other column is written as string
+INTEGER_COLUMNS = {'salesperson_id', 'sequence'}
+FLOAT_COLUMNS = {'lat', 'long', 'route_total_distance_km', 'route_total_time_hours',
+                 'round_trip_km', 'round_trip_hours', 'added_distance', 'added_time'}
+EXPORT_FORMATS = ('csv', 'parquet')
+# Rows per CSV chunk / Parquet row group
+EXPORT_CHUNK_ROWS = 5000
+
+
+def iter_route_rows(solution):
+    """One export row per route stop, produced lazily"""
+    for route in solution['routes']:
+        salesperson_id = route['vehicle_id'] + 1
+        route_distance = route['distance'] / 1000  # Convert to km
+        route_time = route['time'] / 60  # Convert to hours
+        for i, location in enumerate(route['route']):
+            yield {
+                'salesperson_id': salesperson_id,
+                'sequence': i + 1,
+                'node': location['node'],
+                'lat': location['lat'],
+                'long': location['long'],
+                'type': location['type'],
+                'route_total_distance_km': route_distance,
+                'route_total_time_hours': route_time
+            }
+
+
+def uncovered_columns(solution):
+    """Columns of the _uncovered companion: every key seen, in first-seen order"""
+    columns = {}
+    for store in solution.get('uncovered_stores') or []:
+        columns.update(dict.fromkeys(store))
+    return list(columns)
+
+
+def iter_uncovered_rows(solution):
+    yield from solution.get('uncovered_stores') or []
+
+
+def _chunks(rows, chunk_rows):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_rows:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def csv_chunks(rows, columns, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Encoded CSV (header first) in pieces of at most chunk_rows rows"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction='ignore', lineterminator='\n')
+    writer.writeheader()
+    for chunk in _chunks(rows, chunk_rows):
+        writer.writerows(chunk)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        # Header only (no rows)
+        yield buffer.getvalue().encode('utf-8')
+
+
+class _DrainableSink:
+    """Write-only file object whose written bytes can be taken out as they arrive"""
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data):
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self._parts)
+        self._parts = []
+        return data
+
+
+def _parquet_schema(columns):
+    fields = []
+    for column in columns:
+        if column in INTEGER_COLUMNS:
+            fields.append((column, pa.int64()))
+        elif column in FLOAT_COLUMNS:
+            fields.append((column, pa.float64()))
+        else:
+            fields.append((column, pa.string()))
+    return pa.schema(fields)
+
+
+def _parquet_value(column, value):
+    if value is None or column in INTEGER_COLUMNS or column in FLOAT_COLUMNS:
+        return value
+    return str(value)
+
+
+def parquet_chunks(rows, columns, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Parquet file bytes, one row group per chunk, emitted as each group is written"""
+    schema = _parquet_schema(columns)
+    sink = _DrainableSink()
+    writer = pq.ParquetWriter(sink, schema)
+    for chunk in _chunks(rows, chunk_rows):
+        writer.write_table(pa.Table.from_pydict(
+            {column: [_parquet_value(column, row.get(column)) for row in chunk] for column in columns},
+            schema=schema
+        ))
+        data = sink.drain()
+        if data:
+            yield data
+    writer.close()
+    yield sink.drain()
+
+
+def export_chunks(solution, export_format='csv', part='routes', chunk_rows=EXPORT_CHUNK_ROWS):
+    """Stream a solution's routes (or its uncovered stores, part='uncovered') as CSV or Parquet"""
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{export_format}', expected one of {EXPORT_FORMATS}")
+    if export_format == 'parquet' and pq is None:
+        raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow)")
+    if part == 'routes':
+        rows, columns = iter_route_rows(solution), ROUTE_COLUMNS
+    elif part == 'uncovered':
+        rows, columns = iter_uncovered_rows(solution), uncovered_columns(solution)
+    else:
+        raise ValueError(f"Unknown export part '{part}', expected 'routes' or 'uncovered'")
+    if export_format == 'csv':
+        return csv_chunks(rows, columns, chunk_rows)
+    return parquet_chunks(rows, columns, chunk_rows)
+
+
+def write_export(solution, filename, export_format='csv', part='routes', chunk_rows=EXPORT_CHUNK_ROWS):
+    """Write an export to a local file chunk by chunk"""
+    with open(filename, 'wb') as f:
+        for data in export_chunks(solution, export_format, part, chunk_rows):
+            f.write(data)
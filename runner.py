@@ -1,6 +1,6 @@
 # ENHANCED VERSION WITH UNCOVERED STORES HANDLING
 from planner import BeatPlanningOptimizer
-import pandas as pd
+from route_export import write_export
 import numpy as np
 import math
 
@@ -8,9 +8,11 @@ class EnhancedBeatPlanningOptimizer(BeatPlanningOptimizer):
     
     def solve_beat_planning(self, num_salespeople, target_stores_per_day=None, 
                           daily_working_hours=8, max_daily_distance_km=200,
-                          allow_partial_coverage=True):
+                          allow_partial_coverage=True, store_visit_time_minutes=30, **kwargs):
         """
         Enhanced version that handles uncovered stores
+        Other keywords (time_limit_seconds, should_stop, on_solution, initial_routes)
+        are passed through to BeatPlanningOptimizer.solve_beat_planning
         """
         
         print(f"Solving beat planning for {num_salespeople} salespeople...")
@@ -19,7 +21,8 @@ class EnhancedBeatPlanningOptimizer(BeatPlanningOptimizer):
         # Try to solve with current constraints
         solution = super().solve_beat_planning(
             num_salespeople, target_stores_per_day, 
-            daily_working_hours, max_daily_distance_km
+            daily_working_hours, max_daily_distance_km,
+            store_visit_time_minutes=store_visit_time_minutes, **kwargs
         )
         
         if solution:
@@ -30,19 +33,17 @@ class EnhancedBeatPlanningOptimizer(BeatPlanningOptimizer):
                     if location['type'] == 'store':
                         covered_stores.add(location['node'])
             
-            all_store_nodes = set(self.stores['node'].tolist())
+            all_store_nodes = set(self.table.store_nodes.tolist())
             uncovered_nodes = all_store_nodes - covered_stores
             
-            # Add uncovered stores info to solution
-            solution['uncovered_stores'] = []
-            for node in uncovered_nodes:
-                store_info = self.stores[self.stores['node'] == node].iloc[0]
-                solution['uncovered_stores'].append({
-                    'node': node,
-                    'lat': store_info['lat'],
-                    'long': store_info['long'],
-                    'reason': self._analyze_uncovered_reason(node, daily_working_hours, max_daily_distance_km)
-                })
+            # Diagnose all uncovered stores in one pass (location order)
+            uncovered_positions = [
+                position for position in range(self.num_starting_points, self.total_locations)
+                if self.table.nodes[position] in uncovered_nodes
+            ]
+            solution['uncovered_stores'] = self._diagnose_uncovered(
+                uncovered_positions, daily_working_hours, max_daily_distance_km, store_visit_time_minutes
+            )
             
             solution['summary']['uncovered_count'] = len(uncovered_nodes)
             solution['summary']['coverage_percentage'] = (len(covered_stores) / len(all_store_nodes)) * 100
@@ -53,28 +54,68 @@ class EnhancedBeatPlanningOptimizer(BeatPlanningOptimizer):
             
         return solution
     
-    def _analyze_uncovered_reason(self, store_node, daily_hours, max_distance_km):
+    def _diagnose_uncovered(self, store_positions, daily_hours, max_distance_km, store_visit_time_minutes=30):
+        """
+        Batch diagnostics for uncovered stores (location indices): round trip from the
+        nearest starting point, computed for all stores at once from the depot rows of
+        the distance/time matrices, and which dimension (Distance or Time) binds
+        """
+        store_positions = np.asarray(store_positions, dtype=int)
+        if len(store_positions) == 0:
+            return []
+        
+        depot_distances = np.asarray(self._depot_distances())
+        outbound = depot_distances[:, store_positions]
+        if self.time_matrix is not None:
+            depots = np.arange(self.num_starting_points)
+            inbound = np.asarray(self.distance_matrix)[np.ix_(store_positions, depots)].T
+            time_out = np.asarray(self.time_matrix)[np.ix_(depots, store_positions)]
+            time_back = np.asarray(self.time_matrix)[np.ix_(store_positions, depots)].T
+        else:
+            # Sparse mode: depot arcs are symmetric, times follow the dense rounding
+            inbound = outbound
+            speed_mpm = (self.avg_speed_kmh * 1000) / 60
+            time_out = time_back = (outbound / speed_mpm).astype(int)
+        
+        round_trip_distance = outbound + inbound  # meters, depots x stores
+        nearest = round_trip_distance.argmin(axis=0)
+        columns = np.arange(len(store_positions))
+        distance_needed = round_trip_distance[nearest, columns]
+        time_needed = (time_out + time_back)[nearest, columns] + store_visit_time_minutes  # minutes
+        
+        # Share of each limit the round trip alone uses; the larger excess binds
+        distance_load = distance_needed / (max_distance_km * 1000)
+        time_load = time_needed / (daily_hours * 60)
+        binding = np.where(
+            np.maximum(distance_load, time_load) <= 1, None,
+            np.where(distance_load >= time_load, 'Distance', 'Time')
+        )
+        
+        diagnostics = []
+        for i, position in enumerate(store_positions.tolist()):
+            store_info = self.table.info(position)
+            if binding[i] == 'Distance':
+                reason = f"Distance constraint exceeded (needs {distance_needed[i]/1000:.1f} km, limit: {max_distance_km} km)"
+            elif binding[i] == 'Time':
+                reason = f"Time constraint exceeded (needs {time_needed[i]/60:.1f} hours, limit: {daily_hours} hours)"
+            else:
+                reason = "Complex routing constraint (try increasing salespeople or relaxing constraints)"
+            diagnostics.append({
+                'node': store_info['node'],
+                'lat': store_info['lat'],
+                'long': store_info['long'],
+                'nearest_depot': self.table.nodes[nearest[i]],
+                'round_trip_km': float(distance_needed[i]) / 1000,
+                'round_trip_hours': float(time_needed[i]) / 60,
+                'binding_dimension': binding[i],
+                'reason': reason
+            })
+        return diagnostics
+    
+    def _analyze_uncovered_reason(self, store_node, daily_hours, max_distance_km, store_visit_time_minutes=30):
         """Analyze why a store couldn't be covered"""
-        store_idx = self.stores[self.stores['node'] == store_node].index[0]
-        store_location_idx = store_idx + self.num_starting_points  # Adjust for starting points
-        
-        # Find minimum distance to any starting point
-        min_distance_to_depot = float('inf')
-        for depot_idx in range(self.num_starting_points):
-            distance = self.distance_matrix[depot_idx][store_location_idx]
-            min_distance_to_depot = min(min_distance_to_depot, distance)
-        
-        # Check if round trip exceeds distance constraint
-        round_trip_distance = min_distance_to_depot * 2  # meters
-        if round_trip_distance > max_distance_km * 1000:
-            return f"Distance constraint exceeded (needs {round_trip_distance/1000:.1f} km, limit: {max_distance_km} km)"
-        
-        # Check if round trip exceeds time constraint
-        round_trip_time = (round_trip_distance / ((40 * 1000) / 60)) + 30  # 40 kmh + 30 min service
-        if round_trip_time > daily_hours * 60:
-            return f"Time constraint exceeded (needs {round_trip_time/60:.1f} hours, limit: {daily_hours} hours)"
-        
-        return "Complex routing constraint (try increasing salespeople or relaxing constraints)"
+        position = self.table.position(store_node)
+        return self._diagnose_uncovered([position], daily_hours, max_distance_km, store_visit_time_minutes)[0]['reason']
     
     def _suggest_constraint_adjustments(self, solution):
         """Suggest how to adjust constraints to cover all stores"""
@@ -88,9 +129,9 @@ class EnhancedBeatPlanningOptimizer(BeatPlanningOptimizer):
         
         # Analyze reasons for uncoverage
         distance_issues = sum(1 for store in solution['uncovered_stores'] 
-                            if 'Distance constraint' in store['reason'])
+                            if store['binding_dimension'] == 'Distance')
         time_issues = sum(1 for store in solution['uncovered_stores'] 
-                        if 'Time constraint' in store['reason'])
+                        if store['binding_dimension'] == 'Time')
         
         if distance_issues > 0:
             suggestions['suggestions'].append(
@@ -110,63 +151,43 @@ class EnhancedBeatPlanningOptimizer(BeatPlanningOptimizer):
         solution['improvement_suggestions'] = suggestions
         return solution
     
-    def print_solution(self, solution):
+    def print_solution(self, solution, file=None):
         """Enhanced solution printing with uncovered stores"""
         if not solution:
-            print("No solution to display")
+            print("No solution to display", file=file)
             return
         
         # Print basic solution
-        super().print_solution(solution)
+        super().print_solution(solution, file)
         
         # Print uncovered stores information
         if solution.get('uncovered_stores'):
-            print(f"\n⚠️  UNCOVERED STORES ({len(solution['uncovered_stores'])}):")
-            print("-" * 50)
+            print(f"\n⚠️  UNCOVERED STORES ({len(solution['uncovered_stores'])}):", file=file)
+            print("-" * 50, file=file)
             for store in solution['uncovered_stores']:
-                print(f"  {store['node']}: {store['reason']}")
+                print(f"  {store['node']}: {store['reason']}", file=file)
         
         # Print improvement suggestions
         if solution.get('improvement_suggestions'):
             suggestions = solution['improvement_suggestions']
-            print(f"\n💡 IMPROVEMENT SUGGESTIONS:")
-            print("-" * 50)
-            print(f"Current Coverage: {suggestions['current_coverage']:.1f}%")
+            print(f"\n💡 IMPROVEMENT SUGGESTIONS:", file=file)
+            print("-" * 50, file=file)
+            print(f"Current Coverage: {suggestions['current_coverage']:.1f}%", file=file)
             for suggestion in suggestions['suggestions']:
-                print(f"  • {suggestion}")
+                print(f"  • {suggestion}", file=file)
     
     def export_routes_to_csv(self, solution, filename='beat_planning_output.csv'):
-        """Export routes to CSV format"""
+        """Export routes to CSV format (streamed row by row, see route_export)"""
         if not solution:
             return
         
-        rows = []
-        for route in solution['routes']:
-            salesperson_id = route['vehicle_id'] + 1
-            route_distance = route['distance'] / 1000  # Convert to km
-            route_time = route['time'] / 60  # Convert to hours
-            
-            for i, location in enumerate(route['route']):
-                rows.append({
-                    'salesperson_id': salesperson_id,
-                    'sequence': i + 1,
-                    'node': location['node'],
-                    'lat': location['lat'],
-                    'long': location['long'],
-                    'type': location['type'],
-                    'route_total_distance_km': route_distance,
-                    'route_total_time_hours': route_time
-                })
-        
-        df = pd.DataFrame(rows)
-        df.to_csv(filename, index=False)
+        write_export(solution, filename)
         print(f"Routes exported to {filename}")
         
         # Also export uncovered stores
         if solution.get('uncovered_stores'):
-            uncovered_df = pd.DataFrame(solution['uncovered_stores'])
             uncovered_filename = filename.replace('.csv', '_uncovered.csv')
-            uncovered_df.to_csv(uncovered_filename, index=False)
+            write_export(solution, uncovered_filename, part='uncovered')
             print(f"Uncovered stores exported to {uncovered_filename}")
 
 # Example usage with constraint handling
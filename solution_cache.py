@@ -0,0 +1,70 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+SOLUTION_CACHE_SIZE = int(os.getenv("SOLUTION_CACHE_SIZE", "128"))
+SOLUTION_CACHE_TTL = int(os.getenv("SOLUTION_CACHE_TTL", "3600"))
+
+
+def solution_key(kind, files, params):
+    """Content hash of the uploaded file bytes plus every parameter that affects the result"""
+    h = hashlib.sha256(kind.encode("utf-8"))
+    for blob in files:
+        h.update(b"\x00" if blob is None else hashlib.sha256(blob).digest())
+    h.update(json.dumps(params, sort_keys=True, default=str).encode("utf-8"))
+    return h.hexdigest()
+
+
+class SolutionCache:
+    """In-memory LRU cache of solver results with per-entry TTL and hit/miss counters"""
+
+    def __init__(self, max_entries=SOLUTION_CACHE_SIZE, ttl_seconds=SOLUTION_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry[0] > self.ttl_seconds:
+                del self._entries[key]
+                self.evictions += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
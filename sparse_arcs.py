@@ -0,0 +1,114 @@
+import numpy as np
+from matrices import pairwise_distances
+
+# optional scipy import: use its KD-tree when installed,
+# otherwise fall back to a blocked NumPy nearest-neighbour search.
+try:
+    from scipy.spatial import cKDTree  # type: ignore
+except Exception:
+    cKDTree = None
+
+# Rows processed per block in the NumPy fallback search
+KNN_BLOCK = 1024
+
+
+def _unit_vectors(lat, lon):
+    """Lat/long to 3D unit vectors; chord length is monotonic in great-circle distance"""
+    lat = np.radians(np.asarray(lat, dtype=float))
+    lon = np.radians(np.asarray(lon, dtype=float))
+    cos_lat = np.cos(lat)
+    return np.column_stack((cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)))
+
+
+def nearest_neighbors(lat, lon, k):
+    """Indices (n x k) of each point's k nearest other points"""
+    points = _unit_vectors(lat, lon)
+    n = len(points)
+    k = min(k, n - 1)
+    if k <= 0:
+        return np.empty((n, 0), dtype=np.int64)
+
+    if cKDTree is not None:
+        _, idx = cKDTree(points).query(points, k=k + 1)
+        idx = np.asarray(idx, dtype=np.int64).reshape(n, k + 1)
+    else:
+        idx = np.empty((n, k + 1), dtype=np.int64)
+        for start in range(0, n, KNN_BLOCK):
+            stop = min(start + KNN_BLOCK, n)
+            # Squared chord distance = 2 - 2 * dot product
+            sq = 2.0 - 2.0 * (points[start:stop] @ points.T)
+            part = np.argpartition(sq, k, axis=1)[:, :k + 1]
+            order = np.take_along_axis(sq, part, axis=1).argsort(axis=1)
+            idx[start:stop] = np.take_along_axis(part, order, axis=1)
+
+    # Drop each point itself (normally column 0, but duplicates can reorder it)
+    is_self = idx == np.arange(n)[:, None]
+    order = np.argsort(is_self, axis=1, kind='stable')
+    return np.take_along_axis(idx, order, axis=1)[:, :k]
+
+
+class SparseArcModel:
+    """
+    Arc costs restricted to each store's k nearest stores (made symmetric) plus
+    every depot <-> node arc. Memory is O(n*k + n*depots) instead of O(n^2).
+    Node order matches BeatPlanningOptimizer.locations (depots first).
+    """
+
+    def __init__(self, lat, lon, num_depots, k, distance_mode='geodesic', avg_speed_kmh=40):
+        lat = np.asarray(lat, dtype=float)
+        lon = np.asarray(lon, dtype=float)
+        self.num_nodes = len(lat)
+        self.num_depots = num_depots
+        self.k = k
+        self.speed_mpm = (avg_speed_kmh * 1000) / 60  # meters per minute
+
+        # Depot rows: distance from every depot to every node (and back, distances are symmetric)
+        self.depot_distances = pairwise_distances(
+            lat[:num_depots, None], lon[:num_depots, None], lat[None, :], lon[None, :], distance_mode
+        ).astype(int)
+        self.depot_distances[np.arange(num_depots), np.arange(num_depots)] = 0
+
+        # Store-to-store kNN arcs, symmetrised so i -> j is allowed iff j -> i is
+        store_lat, store_lon = lat[num_depots:], lon[num_depots:]
+        knn = nearest_neighbors(store_lat, store_lon, k) + num_depots
+        src = np.repeat(np.arange(num_depots, self.num_nodes), knn.shape[1])
+        dst = knn.ravel()
+        pairs = np.unique(np.concatenate((
+            np.column_stack((src, dst)), np.column_stack((dst, src))
+        )), axis=0)
+        distances = pairwise_distances(
+            lat[pairs[:, 0]], lon[pairs[:, 0]], lat[pairs[:, 1]], lon[pairs[:, 1]], distance_mode
+        ).astype(int)
+
+        # CSR layout: neighbours of node i are indices[indptr[i]:indptr[i + 1]]
+        counts = np.bincount(pairs[:, 0], minlength=self.num_nodes)
+        self.indptr = np.concatenate(([0], np.cumsum(counts)))
+        self.indices = pairs[:, 1]
+        self.distances = distances
+        self._arc_lookup = dict(zip((pairs[:, 0] * self.num_nodes + pairs[:, 1]).tolist(),
+                                    distances.tolist()))
+
+    @property
+    def num_arcs(self):
+        return len(self.indices)
+
+    def neighbors(self, node):
+        """Store neighbours reachable from a store node"""
+        return self.indices[self.indptr[node]:self.indptr[node + 1]]
+
+    def distance(self, from_node, to_node, forbidden=None):
+        """Arc distance in meters; `forbidden` is returned for arcs outside the model"""
+        if from_node == to_node:
+            return 0
+        if from_node < self.num_depots:
+            return int(self.depot_distances[from_node, to_node])
+        if to_node < self.num_depots:
+            return int(self.depot_distances[to_node, from_node])
+        return self._arc_lookup.get(from_node * self.num_nodes + to_node, forbidden)
+
+    def travel_time(self, from_node, to_node, forbidden=None):
+        """Arc travel time in minutes (same rounding as the dense time matrix)"""
+        distance = self.distance(from_node, to_node)
+        if distance is None:
+            return forbidden
+        return int(distance / self.speed_mpm)
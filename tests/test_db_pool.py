@@ -0,0 +1,164 @@
+import os
+import sys
+import threading
+import time
+
+import psycopg2
+import psycopg2.extensions
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import ConnectionPool, PoolTimeout
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=None):
+        if self.conn.broken:
+            raise psycopg2.OperationalError("server closed the connection unexpectedly")
+        self.conn.status = psycopg2.extensions.TRANSACTION_STATUS_INTRANS
+
+
+class FakeConnection:
+    """Just enough of a psycopg2 connection for the pool"""
+
+    def __init__(self):
+        self.closed = 0
+        self.broken = False
+        self.status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+        self.commits = self.rollbacks = 0
+
+    def cursor(self, **kwargs):
+        return FakeCursor(self)
+
+    def get_transaction_status(self):
+        return self.status
+
+    def commit(self):
+        self.commits += 1
+        self.status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+class Connector:
+    """connect callable that records connections and fails on the listed attempts"""
+
+    def __init__(self, fail_on=()):
+        self.fail_on = set(fail_on)
+        self.attempts = 0
+        self.opened = []
+
+    def __call__(self):
+        self.attempts += 1
+        if self.attempts in self.fail_on:
+            raise psycopg2.OperationalError("could not connect to server")
+        conn = FakeConnection()
+        self.opened.append(conn)
+        return conn
+
+
+def test_connection_is_reused_and_committed():
+    connect = Connector()
+    pool = ConnectionPool(connect, min_size=1, max_size=2)
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        pass
+    assert first is second
+    assert first.commits == 2
+    stats = pool.stats()
+    assert (stats['opened'], stats['checkouts'], stats['in_use'], stats['idle']) == (1, 2, 0, 1)
+
+
+def test_error_rolls_back_and_returns_the_connection():
+    pool = ConnectionPool(Connector(), min_size=1, max_size=1)
+    with pytest.raises(ValueError):
+        with pool.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("INSERT ...")
+            raise ValueError("boom")
+    assert conn.rollbacks == 1 and conn.commits == 0
+    assert pool.stats()['idle'] == 1
+
+
+def test_checkout_times_out_when_every_connection_is_in_use():
+    pool = ConnectionPool(Connector(), min_size=1, max_size=1, timeout=0.05)
+    held = pool.getconn()
+    started = time.monotonic()
+    with pytest.raises(PoolTimeout):
+        pool.getconn()
+    assert time.monotonic() - started >= 0.05
+    assert pool.stats()['timeouts'] == 1
+    pool.putconn(held)
+    assert pool.getconn() is held
+
+
+def test_waiting_checkout_gets_the_returned_connection():
+    pool = ConnectionPool(Connector(), min_size=1, max_size=1, timeout=5)
+    held = pool.getconn()
+    returner = threading.Timer(0.05, pool.putconn, args=(held,))
+    returner.start()
+    assert pool.getconn() is held
+    returner.join()
+    assert pool.stats()['wait_seconds_max'] >= 0.04
+
+
+def test_failed_connect_releases_its_slot():
+    connect = Connector(fail_on={1})
+    pool = ConnectionPool(connect, min_size=0, max_size=1, timeout=0.05)
+    with pytest.raises(psycopg2.OperationalError):
+        pool.getconn()
+    assert pool.stats()['size'] == 0
+    assert pool.getconn() is connect.opened[0]
+
+
+def test_failed_initial_fill_is_retried_by_the_next_checkout():
+    connect = Connector(fail_on={2})
+    pool = ConnectionPool(connect, min_size=3, max_size=5)
+    with pytest.raises(psycopg2.OperationalError):
+        pool.getconn()
+    assert pool.stats()['size'] == 1
+    pool.getconn()
+    stats = pool.stats()
+    assert (stats['size'], stats['in_use'], stats['idle']) == (3, 1, 2)
+
+
+def test_broken_idle_connection_is_replaced():
+    connect = Connector()
+    pool = ConnectionPool(connect, min_size=1, max_size=1, healthcheck_idle=0)
+    with pool.connection() as conn:
+        pass
+    conn.broken = True
+    with pool.connection() as replacement:
+        pass
+    assert replacement is not conn and conn.closed
+    stats = pool.stats()
+    assert (stats['opened'], stats['discarded'], stats['failed_health_checks']) == (2, 1, 1)
+
+
+def test_closed_or_mid_transaction_connections_are_not_reused():
+    pool = ConnectionPool(Connector(), min_size=0, max_size=2)
+    left_open = pool.getconn()
+    left_open.status = psycopg2.extensions.TRANSACTION_STATUS_INTRANS
+    pool.putconn(left_open)
+    assert left_open.rollbacks == 1
+    assert pool.getconn() is left_open
+    closed = pool.getconn()
+    closed.close()
+    pool.putconn(closed)
+    assert pool.stats()['size'] == 1
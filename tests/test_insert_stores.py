@@ -0,0 +1,70 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from planner import BeatPlanningOptimizer
+from test_runner import make_locations
+
+
+@pytest.fixture(scope="module")
+def planned():
+    optimizer = BeatPlanningOptimizer(make_locations(), distance_mode='haversine')
+    solution = optimizer.solve_beat_planning(2, daily_working_hours=8, max_daily_distance_km=200,
+                                             time_limit_seconds=1)
+    return optimizer, solution
+
+
+def route_nodes(solution):
+    return [stop['node'] for route in solution['routes'] for stop in route['route'] if stop['type'] == 'store']
+
+
+def test_nearby_store_is_inserted_within_limits(planned):
+    optimizer, solution = planned
+    updated = optimizer.insert_stores(solution, [{'node': 'new_store', 'lat': 28.6, 'long': 77.2}],
+                                      daily_working_hours=8, max_daily_distance_km=200)
+    assert [entry['node'] for entry in updated['inserted']] == ['new_store']
+    assert route_nodes(updated).count('new_store') == 1
+    assert updated['summary']['total_stores_covered'] == optimizer.num_stores + 1
+    assert updated['summary']['coverage_percentage'] == 100.0
+    for route in updated['routes']:
+        assert route['distance'] <= 200 * 1000
+        assert route['time'] <= 8 * 60
+    # The input plan is left untouched
+    assert 'new_store' not in route_nodes(solution)
+
+
+def test_store_beyond_the_distance_limit_is_uncovered(planned):
+    optimizer, solution = planned
+    updated = optimizer.insert_stores(solution, [{'node': 'far_store', 'lat': 31.0, 'long': 77.2}],
+                                      daily_working_hours=24, max_daily_distance_km=200)
+    assert updated['inserted'] == []
+    assert updated['uncovered_stores'] == [{'node': 'far_store', 'lat': 31.0, 'long': 77.2, 'type': 'store',
+                                            'reason': "Distance constraint exceeded (limit: 200 km)"}]
+    assert updated['summary']['total_stores_covered'] == optimizer.num_stores
+    assert updated['summary']['coverage_percentage'] == pytest.approx(100 * optimizer.num_stores / (optimizer.num_stores + 1))
+
+
+def test_store_that_only_breaks_the_time_limit_reports_time(planned):
+    optimizer, solution = planned
+    updated = optimizer.insert_stores(solution, [{'node': 'new_store', 'lat': 28.6, 'long': 77.2}],
+                                      daily_working_hours=1, max_daily_distance_km=1000)
+    assert updated['inserted'] == []
+    assert updated['uncovered_stores'][0]['reason'] == "Time constraint exceeded (limit: 1 hours)"
+
+
+def test_routed_store_is_skipped_and_uncovered_store_is_cleared(planned):
+    optimizer, solution = planned
+    routed = route_nodes(solution)[0]
+    previous = dict(solution, uncovered_stores=[{'node': 'late_store', 'reason': "Time constraint exceeded"}])
+    updated = optimizer.insert_stores(previous, [
+        {'node': routed, 'lat': 28.6, 'long': 77.2},
+        {'node': 'late_store', 'lat': 28.6, 'long': 77.2},
+    ], daily_working_hours=8, max_daily_distance_km=200)
+    assert updated['skipped'] == [{'node': routed, 'reason': "Already on a route"}]
+    assert route_nodes(updated).count(routed) == 1
+    assert [entry['node'] for entry in updated['inserted']] == ['late_store']
+    assert updated['uncovered_stores'] == []
+    assert updated['summary']['coverage_percentage'] == 100.0
@@ -0,0 +1,55 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+from geopy.distance import geodesic, great_circle
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from matrices import build_distance_matrix, geodesic_matrix, haversine_matrix, pairwise_distances
+
+
+def make_points(n=25, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.uniform(-60, 60, n), rng.uniform(-180, 180, n)
+
+
+def test_geodesic_matrix_matches_geopy():
+    lat, lon = make_points()
+    matrix = geodesic_matrix(lat, lon)
+    expected = np.array([[geodesic((a, b), (c, d)).meters for c, d in zip(lat, lon)] for a, b in zip(lat, lon)])
+    np.testing.assert_allclose(matrix, expected, rtol=1e-9, atol=1e-3)
+
+
+def test_haversine_matrix_matches_great_circle():
+    lat, lon = make_points()
+    matrix = haversine_matrix(lat, lon)
+    expected = np.array([[great_circle((a, b), (c, d)).meters for c, d in zip(lat, lon)] for a, b in zip(lat, lon)])
+    np.testing.assert_allclose(matrix, expected, rtol=1e-6)
+
+
+def test_nearly_antipodal_pairs_fall_back_to_geopy():
+    # Vincenty does not converge here; geopy's geodesic fills the gap
+    lat, lon = np.array([0.0, 0.5]), np.array([0.0, 179.7])
+    matrix = geodesic_matrix(lat, lon)
+    assert np.isfinite(matrix).all()
+    assert matrix[0, 1] == pytest.approx(geodesic((0.0, 0.0), (0.5, 179.7)).meters, abs=1e-3)
+    assert pairwise_distances(lat[0], lon[0], lat[1], lon[1]) == pytest.approx(matrix[0, 1], abs=1e-3)
+
+
+def test_pairwise_distances_agree_with_matrices():
+    lat, lon = make_points(10)
+    for mode, full in (('geodesic', geodesic_matrix), ('haversine', haversine_matrix)):
+        pairs = pairwise_distances(lat[:, None], lon[:, None], lat[None, :], lon[None, :], mode=mode)
+        np.testing.assert_allclose(pairs, full(lat, lon), atol=1e-6)
+
+
+def test_build_distance_matrix_is_integer_meters_with_zero_diagonal():
+    lat, lon = make_points(8)
+    matrix = build_distance_matrix(lat, lon, mode='geodesic')
+    assert matrix.dtype.kind == 'i'
+    assert (np.diag(matrix) == 0).all()
+    np.testing.assert_array_equal(matrix, matrix.T)
+    with pytest.raises(ValueError):
+        build_distance_matrix(lat, lon, mode='manhattan')
@@ -0,0 +1,74 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from optimizer import AdvancedBeatPlanningOptimizer
+
+# Weekly limits of 10 km and 40 hours per worker
+CONSTRAINTS = {'max_daily_distance_km': 2, 'working_days_per_week': 5, 'working_hours_per_day': 8}
+
+
+def make_routes(distances_km, eta_minutes=None):
+    eta_minutes = eta_minutes if eta_minutes is not None else [60] * len(distances_km)
+    return [
+        {'route_id': f'R{i:03d}', 'metrics': {'distance_km': float(d), 'eta_minutes': float(t)}}
+        for i, (d, t) in enumerate(zip(distances_km, eta_minutes))
+    ]
+
+
+def assert_valid_packing(result, routes, max_km=10, max_hours=40):
+    assigned = [route_id for worker in result['worker_routes'] for route_id in worker]
+    assert sorted(assigned) == sorted(route['route_id'] for route in routes)
+    assert result['min_workers'] == len(result['worker_routes']) >= result['lower_bound']
+    for worker, km, hours in zip(result['worker_routes'], result['worker_loads_km'], result['worker_loads_hours']):
+        if len(worker) > 1 or worker[0] not in result['oversized_routes']:
+            assert km <= max_km + 1e-9
+            assert hours <= max_hours + 1e-9
+
+
+def test_best_fit_respects_both_limits():
+    rng = np.random.default_rng(0)
+    routes = make_routes(rng.uniform(0.5, 6, 300), rng.uniform(60, 1200, 300))
+    result = AdvancedBeatPlanningOptimizer().best_fit_packing_algorithm(routes, CONSTRAINTS)
+    assert_valid_packing(result, routes)
+    assert result['status'] == ('OPTIMAL' if result['min_workers'] == result['lower_bound'] else 'HEURISTIC')
+
+
+def test_oversized_routes_get_a_worker_of_their_own():
+    routes = make_routes([12, 3, 3])
+    result = AdvancedBeatPlanningOptimizer().best_fit_packing_algorithm(routes, CONSTRAINTS)
+    assert result['oversized_routes'] == ['R000']
+    assert ['R000'] in result['worker_routes']
+    assert result['lower_bound'] == 2
+    assert_valid_packing(result, routes)
+
+
+def test_cp_sat_closes_the_gap_best_fit_leaves():
+    # Best fit puts 4+4 together and needs three workers; 4+3+3 twice fills two exactly
+    routes = make_routes([4, 4, 3, 3, 3, 3])
+    optimizer = AdvancedBeatPlanningOptimizer()
+    best_fit = optimizer.best_fit_packing_algorithm(routes, CONSTRAINTS)
+    assert (best_fit['min_workers'], best_fit['lower_bound'], best_fit['status']) == (3, 2, 'HEURISTIC')
+    exact = optimizer.cp_sat_packing_algorithm(routes, dict(CONSTRAINTS, packing_time_limit_seconds=10),
+                                               num_search_workers=1)
+    assert (exact['algorithm'], exact['min_workers'], exact['status']) == ('cp_sat', 2, 'OPTIMAL')
+    assert exact['optimality_gap'] == 0.0
+    assert_valid_packing(exact, routes)
+
+
+def test_cp_sat_keeps_best_fit_when_it_meets_the_lower_bound():
+    routes = make_routes([5, 5, 5, 5])
+    result = AdvancedBeatPlanningOptimizer().cp_sat_packing_algorithm(routes, CONSTRAINTS)
+    assert (result['algorithm'], result['min_workers'], result['status']) == ('best_fit', 2, 'OPTIMAL')
+
+
+@pytest.mark.parametrize('field', ['max_daily_distance_km', 'working_hours_per_day', 'working_days_per_week'])
+def test_packing_rejects_non_positive_limits(field):
+    optimizer = AdvancedBeatPlanningOptimizer()
+    for algorithm in (optimizer.best_fit_packing_algorithm, optimizer.cp_sat_packing_algorithm):
+        with pytest.raises(ValueError, match="must be > 0"):
+            algorithm(make_routes([1, 2]), dict(CONSTRAINTS, **{field: 0}))
@@ -0,0 +1,46 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from runner import EnhancedBeatPlanningOptimizer
+
+
+def make_locations(num_stores=12, num_depots=2, seed=0):
+    """Small synthetic territory around Delhi"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'node': [f'depot_{i}' for i in range(num_depots)] + [f'store_{i:03d}' for i in range(num_stores)],
+        'lat': np.r_[rng.uniform(28.55, 28.65, num_depots), rng.uniform(28.5, 28.7, num_stores)],
+        'long': np.r_[rng.uniform(77.15, 77.25, num_depots), rng.uniform(77.1, 77.3, num_stores)],
+        'node_type': ['starting_point'] * num_depots + ['store'] * num_stores
+    })
+
+
+def test_find_minimum_fleet_on_enhanced_optimizer():
+    optimizer = EnhancedBeatPlanningOptimizer(make_locations(), distance_mode='haversine')
+    result = optimizer.find_minimum_fleet(
+        daily_working_hours=8, max_daily_distance_km=200, max_salespeople=4,
+        probe_time_limit_seconds=1, time_limit_seconds=1, max_workers=1
+    )
+    assert result['min_salespeople'] is not None
+    assert result['min_salespeople'] >= result['lower_bound']
+    solution = result['solution']
+    assert solution['summary']['total_stores_covered'] == optimizer.num_stores
+    assert len(solution['routes']) == result['min_salespeople']
+
+
+def test_enhanced_solve_passes_solver_keywords_through():
+    optimizer = EnhancedBeatPlanningOptimizer(make_locations(), distance_mode='haversine')
+    solutions = []
+    solution = optimizer.solve_beat_planning(
+        2, daily_working_hours=8, max_daily_distance_km=200,
+        time_limit_seconds=1, should_stop=lambda: False,
+        on_solution=lambda found, objective: solutions.append(objective)
+    )
+    assert solution is not None
+    assert solution['uncovered_stores'] == []
+    assert solutions
@@ -0,0 +1,51 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from matrices import build_distance_matrix, haversine_matrix
+from planner import BeatPlanningOptimizer
+from sparse_arcs import SparseArcModel, nearest_neighbors
+from test_runner import make_locations
+
+
+def test_nearest_neighbors_match_brute_force():
+    rng = np.random.default_rng(1)
+    lat, lon = rng.uniform(28.4, 28.8, 60), rng.uniform(77.0, 77.4, 60)
+    distances = haversine_matrix(lat, lon)
+    np.fill_diagonal(distances, np.inf)
+    expected = np.argsort(distances, axis=1)[:, :5]
+    np.testing.assert_array_equal(np.sort(nearest_neighbors(lat, lon, 5), axis=1), np.sort(expected, axis=1))
+
+
+def test_sparse_arcs_are_symmetric_and_match_the_dense_matrix():
+    locations = make_locations(num_stores=30)
+    lat, lon = locations['lat'].to_numpy(), locations['long'].to_numpy()
+    model = SparseArcModel(lat, lon, num_depots=2, k=4, distance_mode='haversine')
+    dense = build_distance_matrix(lat, lon, mode='haversine')
+    for node in range(2, len(lat)):
+        neighbors = model.neighbors(node)
+        assert len(neighbors) >= 4
+        for other in neighbors.tolist():
+            assert node in model.neighbors(other).tolist()
+            assert abs(model.distance(node, other) - dense[node, other]) <= 1
+        outside = next(other for other in range(2, len(lat)) if other != node and other not in neighbors)
+        assert model.distance(node, outside) is None
+        for depot in range(2):
+            assert abs(model.distance(depot, node) - dense[depot, node]) <= 1
+            assert model.distance(node, depot) == model.distance(depot, node)
+
+
+def test_sparse_solve_only_uses_model_arcs():
+    optimizer = BeatPlanningOptimizer(make_locations(num_stores=20), distance_mode='haversine', sparse_neighbors=5)
+    assert optimizer.distance_matrix is None
+    solution = optimizer.solve_beat_planning(2, daily_working_hours=10, max_daily_distance_km=300,
+                                             time_limit_seconds=1)
+    assert solution['summary']['total_stores_covered'] == optimizer.num_stores
+    positions = {node: i for i, node in enumerate(optimizer.table.nodes.tolist())}
+    for route in solution['routes']:
+        nodes = [positions[stop['node']] for stop in route['route']]
+        for from_node, to_node in zip(nodes, nodes[1:]):
+            assert optimizer.arc_model.distance(from_node, to_node) is not None
@@ -0,0 +1,105 @@
+import json
+import os
+import sqlite3
+import sys
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import visitapi
+from visitapi import decode_cursor, encode_cursor, list_events
+
+
+class SqliteCursor:
+    """The slice of a psycopg2 RealDictCursor that list_events uses, over sqlite"""
+
+    def __init__(self, conn):
+        self.cur = conn.cursor()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=()):
+        self.cur.execute(query.replace("%s", "?"), params)
+
+    def fetchall(self):
+        columns = [column[0] for column in self.cur.description]
+        return [dict(zip(columns, row)) for row in self.cur.fetchall()]
+
+
+class SqliteConnection:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def cursor(self, cursor_factory=None):
+        return SqliteCursor(self.conn)
+
+
+@pytest.fixture
+def events(monkeypatch):
+    """25 events over 5 timestamps (5 ties each), sales_id 1 or 2"""
+    db = sqlite3.connect(":memory:", detect_types=sqlite3.PARSE_DECLTYPES)
+    db.execute("CREATE TABLE events (event_id INTEGER PRIMARY KEY, timestamp TIMESTAMP, sales_id INTEGER, "
+               "assignment_id INTEGER, notes TEXT)")
+    start = datetime(2024, 5, 1, 9, 0, 0)
+    rows = [(event_id, start + timedelta(minutes=event_id % 5), 1 + event_id % 2, None, f"visit {event_id}")
+            for event_id in range(1, 26)]
+    db.executemany("INSERT INTO events VALUES (?, ?, ?, ?, ?)", rows)
+
+    @contextmanager
+    def connection():
+        yield SqliteConnection(db)
+
+    monkeypatch.setattr(visitapi, "connection", connection)
+    return sorted(rows, key=lambda row: (row[1], row[0]), reverse=True)
+
+
+def fetch_all_pages(limit, **filters):
+    seen, cursor, pages = [], None, 0
+    while True:
+        page = list_events(limit=limit, cursor=cursor, **filters)
+        seen.extend(event["event_id"] for event in page["events"])
+        pages += 1
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return seen, pages
+
+
+def test_pages_cover_every_event_once_across_timestamp_ties(events):
+    seen, pages = fetch_all_pages(limit=4)
+    assert seen == [row[0] for row in events]
+    assert pages == 7
+
+
+def test_exact_final_page_has_no_next_cursor(events):
+    page = list_events(limit=25)
+    assert len(page["events"]) == 25
+    assert page["next_cursor"] is None
+
+
+def test_filters_apply_on_every_page(events):
+    seen, _ = fetch_all_pages(limit=3, sales_id=2)
+    assert seen == [row[0] for row in events if row[2] == 2]
+
+
+def test_cursor_round_trips_aware_timestamps():
+    timestamp = datetime(2024, 5, 1, 9, 30, 15, 123456, tzinfo=timezone.utc)
+    assert decode_cursor(encode_cursor(timestamp, 42)) == (timestamp, 42)
+
+
+@pytest.mark.parametrize("cursor", ["not-base64!", encode_cursor(datetime(2024, 5, 1), 1)[:-4], "bm90IGEgY3Vyc29y"])
+def test_invalid_cursor_is_rejected(events, cursor):
+    response = list_events(cursor=cursor)
+    assert response.status_code == 400
+    assert json.loads(response.body) == {"error": "Invalid cursor"}
+
+
+@pytest.mark.parametrize("limit", [0, visitapi.EVENTS_MAX_PAGE_SIZE + 1])
+def test_limit_out_of_range_is_rejected(events, limit):
+    assert list_events(limit=limit).status_code == 400
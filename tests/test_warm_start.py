@@ -0,0 +1,61 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from planner import BeatPlanningOptimizer
+from test_runner import make_locations
+
+
+def test_prior_routes_skip_unknown_nodes_depots_and_repeats():
+    optimizer = BeatPlanningOptimizer(make_locations(), distance_mode='haversine')
+    routes = [
+        {'vehicle_id': 0, 'route': [{'node': 'depot_0'}, {'node': 'store_000'}, {'node': 'closed_store'},
+                                    {'node': 'store_001'}, {'node': 'store_000'}, {'node': 'depot_0'}]},
+        {'vehicle_id': 1, 'route': [{'node': 'store_001'}, {'node': 'store_002'}]},
+        {'vehicle_id': 7, 'route': [{'node': 'store_003'}]},
+    ]
+    position = optimizer.table.position
+    assert optimizer._routes_from_solution(routes, 2) == [
+        [position('store_000'), position('store_001')],
+        [position('store_002')],
+    ]
+
+
+def test_prior_routes_are_trimmed_to_tighter_limits():
+    optimizer = BeatPlanningOptimizer(make_locations(), distance_mode='haversine')
+    data = optimizer.create_data_model(2, 2, 15, 30, as_lists=False)
+    route = list(range(optimizer.num_starting_points, optimizer.total_locations))
+    depot = data['starts'][0]
+    kept = optimizer._fit_route_to_limits(depot, route, data)
+    assert 0 < len(kept) < len(route)
+    assert kept == [node for node in route if node in kept]
+    stops = [depot] + kept + [depot]
+    legs = [optimizer._arc(a, b, data) for a, b in zip(stops, stops[1:])]
+    assert sum(leg[0] for leg in legs) <= data['max_distance']
+    assert sum(leg[1] for leg in legs) <= data['max_time']
+
+
+def test_warm_start_keeps_the_plan_and_inserts_new_stores(capsys):
+    locations = make_locations(num_stores=14)
+    previous = BeatPlanningOptimizer(locations.iloc[:-3], distance_mode='haversine').solve_beat_planning(
+        2, daily_working_hours=8, max_daily_distance_km=200, time_limit_seconds=1
+    )
+    routes = previous['routes'] + [{'vehicle_id': 0, 'route': [{'node': 'closed_store'}]}]
+    optimizer = BeatPlanningOptimizer(locations, distance_mode='haversine')
+    capsys.readouterr()
+    solution = optimizer.solve_beat_planning(2, daily_working_hours=8, max_daily_distance_km=200,
+                                             time_limit_seconds=1, initial_routes=routes)
+    assert "Warm start: 11 stores kept from previous plan, 3 left for the search to insert" in capsys.readouterr().out
+    assert solution['summary']['total_stores_covered'] == optimizer.num_stores
+
+
+def test_warm_start_under_tighter_limits_stays_feasible():
+    optimizer = BeatPlanningOptimizer(make_locations(), distance_mode='haversine')
+    previous = optimizer.solve_beat_planning(2, daily_working_hours=8, max_daily_distance_km=200, time_limit_seconds=1)
+    solution = optimizer.solve_beat_planning(2, daily_working_hours=3, max_daily_distance_km=30,
+                                             time_limit_seconds=1, initial_routes=previous['routes'])
+    assert solution is not None
+    for route in solution['routes']:
+        assert route['distance'] <= 30 * 1000
+        assert route['time'] <= 3 * 60
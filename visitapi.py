@@ -1,9 +1,14 @@
 from fastapi import APIRouter, UploadFile, File, Form
 from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+import asyncio
+import base64
 import os
 from datetime import datetime
-from typing import Optional
-from db import get_conn, init_db
+from typing import List, Optional
+from db import connection, init_db
+from photo_store import PhotoStore, PhotoTooLarge
+from rollups import ROLLUP_UPDATE_CTES, lock_rollups
 import psycopg2
 import psycopg2.extras
 
@@ -12,6 +17,79 @@ router = APIRouter()
 UPLOAD_DIR = os.path.join(os.path.dirname(__file__), "uploads")
 if not os.path.isdir(UPLOAD_DIR):
     os.makedirs(UPLOAD_DIR, exist_ok=True)
+photo_store = PhotoStore(UPLOAD_DIR)
+# Most events one /visit/checkin/batch request may carry
+VISIT_BATCH_MAX_EVENTS = int(os.getenv("VISIT_BATCH_MAX_EVENTS", "1000"))
+# Default and largest page size of /visit/events
+EVENTS_PAGE_SIZE = int(os.getenv("EVENTS_PAGE_SIZE", "100"))
+EVENTS_MAX_PAGE_SIZE = int(os.getenv("EVENTS_MAX_PAGE_SIZE", "1000"))
+
+EVENT_COLUMNS = ("timestamp", "sales_id", "assignment_id", "lat", "long", "notes", "photo_path")
+
+
+class CheckinEvent(BaseModel):
+    sales_id: int
+    lat: float
+    long: float
+    notes: Optional[str] = None
+    assignment_id: Optional[int] = None
+    # When the visit happened (queued offline); defaults to the time of the sync
+    timestamp: Optional[datetime] = None
+    # Name returned by /visit/photos for a photo uploaded ahead of the sync
+    photo_ref: Optional[str] = None
+    # Echoed back so the client can match ids to its queued visits
+    client_id: Optional[str] = None
+
+
+class CheckinBatch(BaseModel):
+    events: List[CheckinEvent]
+
+
+async def _save_photo(photo: UploadFile):
+    # Streamed and hashed in a worker thread so large photos never block the event loop
+    _, path, _ = await asyncio.to_thread(photo_store.save, photo.file, photo.filename)
+    return path
+
+
+def _photo_too_large(e):
+    return JSONResponse(content={"error": str(e)}, status_code=413)
+
+
+def _photo_path(photo_ref):
+    """Stored path of an uploaded photo, or None if the reference is unknown"""
+    name = os.path.basename(photo_ref)
+    path = os.path.join(UPLOAD_DIR, name)
+    if name != photo_ref or not os.path.isfile(path):
+        return None
+    return path
+
+
+def insert_events(rows):
+    """
+    Insert event rows (EVENT_COLUMNS order) and add them to the dashboard
+    rollups, in one statement and transaction; returns ids in row order.
+    """
+    with connection() as conn, conn.cursor() as cur:
+        lock_rollups(cur, [row[0] for row in rows], [row[1] for row in rows])
+        # Rows are inserted in input order (ORDER BY n), so serial ids sorted ascending match the input
+        returned = psycopg2.extras.execute_values(
+            cur,
+            "WITH inserted AS ("
+            "INSERT INTO events (%s) SELECT %s FROM (VALUES %%s) AS v(n, %s) ORDER BY n "
+            "RETURNING event_id, timestamp, sales_id), %s"
+            "SELECT event_id FROM inserted ORDER BY event_id" % (
+                ", ".join(EVENT_COLUMNS),
+                ", ".join(EVENT_COLUMNS),
+                ", ".join(EVENT_COLUMNS),
+                ROLLUP_UPDATE_CTES,
+            ),
+            [(n,) + tuple(row) for n, row in enumerate(rows)],
+            template="(%s, %s::timestamptz, %s::integer, %s::integer, %s::double precision, "
+                     "%s::double precision, %s::text, %s::text)",
+            page_size=max(len(rows), 1),
+            fetch=True,
+        )
+    return [row[0] for row in returned]
 
 
 @router.on_event("startup")
@@ -20,6 +98,11 @@ def startup():
     init_db()
 
 
+@router.on_event("shutdown")
+def shutdown():
+    photo_store.shutdown(wait=False)
+
+
 @router.post("/visit/checkin")
 async def checkin(
     sales_id: int = Form(...),
@@ -33,40 +116,136 @@ async def checkin(
         timestamp = datetime.utcnow()
         photo_path = None
         if photo:
-            filename = f"{int(datetime.utcnow().timestamp())}_{photo.filename}"
-            path = os.path.join(UPLOAD_DIR, filename)
-            with open(path, "wb") as f:
-                f.write(await photo.read())
-            photo_path = path
-
-        conn = get_conn()
-        cur = conn.cursor()
-        cur.execute(
-            "INSERT INTO events (timestamp, sales_id, assignment_id, lat, long, notes, photo_path) VALUES (%s, %s, %s, %s, %s, %s, %s) RETURNING event_id",
-            (timestamp, sales_id, assignment_id, lat, long, notes, photo_path),
+            photo_path = await _save_photo(photo)
+
+        # Pool checkout may wait up to DB_POOL_TIMEOUT, so the insert runs off the event loop
+        event_ids = await asyncio.to_thread(
+            insert_events, [(timestamp, sales_id, assignment_id, lat, long, notes, photo_path)]
         )
-        event_id = cur.fetchone()[0]
-        conn.commit()
-        cur.close()
-        conn.close()
+        event_id = event_ids[0]
 
         return {"status": "ok", "event_id": event_id}
+    except PhotoTooLarge as e:
+        return _photo_too_large(e)
     except Exception as e:
         return JSONResponse(content={"error": str(e)}, status_code=500)
 
 
+@router.post("/visit/photos")
+async def upload_photo(photo: UploadFile = File(...)):
+    """Store a photo ahead of a batch sync; pass the returned photo_ref with its event"""
+    try:
+        path = await _save_photo(photo)
+        return {"photo_ref": os.path.basename(path)}
+    except PhotoTooLarge as e:
+        return _photo_too_large(e)
+    except Exception as e:
+        return JSONResponse(content={"error": str(e)}, status_code=500)
+
+
+@router.post("/visit/checkin/batch")
+def checkin_batch(batch: CheckinBatch):
+    """Check in many queued visits at once: one multi-row INSERT, one transaction, all or nothing"""
+    # Plain def on purpose: FastAPI runs it in its threadpool, so waiting on the pool never blocks the loop
+    if not batch.events:
+        return {"status": "ok", "count": 0, "events": []}
+    if len(batch.events) > VISIT_BATCH_MAX_EVENTS:
+        return JSONResponse(
+            content={"error": f"At most {VISIT_BATCH_MAX_EVENTS} events per batch, got {len(batch.events)}"},
+            status_code=400,
+        )
+    now = datetime.utcnow()
+    rows = []
+    for i, event in enumerate(batch.events):
+        photo_path = None
+        if event.photo_ref:
+            photo_path = _photo_path(event.photo_ref)
+            if photo_path is None:
+                return JSONResponse(
+                    content={"error": f"events[{i}]: unknown photo_ref '{event.photo_ref}'"},
+                    status_code=400,
+                )
+        rows.append((event.timestamp or now, event.sales_id, event.assignment_id,
+                     event.lat, event.long, event.notes, photo_path))
+    try:
+        event_ids = insert_events(rows)
+    except Exception as e:
+        return JSONResponse(content={"error": str(e)}, status_code=500)
+    return {
+        "status": "ok",
+        "count": len(event_ids),
+        "events": [
+            {"index": i, "client_id": event.client_id, "event_id": event_id}
+            for i, (event, event_id) in enumerate(zip(batch.events, event_ids))
+        ],
+    }
+
+
+def encode_cursor(timestamp, event_id):
+    """Opaque page cursor for the (timestamp, event_id) position of the last row returned"""
+    raw = f"{timestamp.isoformat()}|{event_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor):
+    try:
+        timestamp, event_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|")
+        return datetime.fromisoformat(timestamp), int(event_id)
+    except (ValueError, UnicodeError):
+        raise ValueError("Invalid cursor")
+
+
 @router.get("/visit/events")
-def list_events(sales_id: Optional[int] = None):
+def list_events(
+    sales_id: Optional[int] = None,
+    assignment_id: Optional[int] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = EVENTS_PAGE_SIZE,
+    cursor: Optional[str] = None,
+):
+    """
+    Newest events first, one page at a time. Pass the returned next_cursor to
+    get the following page; it is null on the last one. start is inclusive,
+    end exclusive. Pages seek on (timestamp, event_id) through the events
+    indexes, so every page costs the same however deep it is.
+    """
+    if not 1 <= limit <= EVENTS_MAX_PAGE_SIZE:
+        return JSONResponse(content={"error": f"limit must be between 1 and {EVENTS_MAX_PAGE_SIZE}"},
+                            status_code=400)
+    conditions, params = [], []
+    if sales_id is not None:
+        conditions.append("sales_id = %s")
+        params.append(sales_id)
+    if assignment_id is not None:
+        conditions.append("assignment_id = %s")
+        params.append(assignment_id)
+    if start is not None:
+        conditions.append("timestamp >= %s")
+        params.append(start)
+    if end is not None:
+        conditions.append("timestamp < %s")
+        params.append(end)
+    if cursor:
+        try:
+            after = decode_cursor(cursor)
+        except ValueError as e:
+            return JSONResponse(content={"error": str(e)}, status_code=400)
+        conditions.append("(timestamp, event_id) < (%s, %s)")
+        params.extend(after)
+    where = f"WHERE {' AND '.join(conditions)} " if conditions else ""
     try:
-        conn = get_conn()
-        cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-        if sales_id is None:
-            cur.execute("SELECT * FROM events ORDER BY timestamp DESC LIMIT 1000")
-        else:
-            cur.execute("SELECT * FROM events WHERE sales_id = %s ORDER BY timestamp DESC", (sales_id,))
-        rows = cur.fetchall()
-        cur.close()
-        conn.close()
-        return {"events": [dict(r) for r in rows]}
+        with connection() as conn, conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+            # One extra row tells whether another page follows
+            cur.execute(
+                f"SELECT * FROM events {where}ORDER BY timestamp DESC, event_id DESC LIMIT %s",
+                params + [limit + 1],
+            )
+            rows = cur.fetchall()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1]["timestamp"], rows[-1]["event_id"])
+        return {"events": [dict(r) for r in rows], "next_cursor": next_cursor}
     except Exception as e:
         return JSONResponse(content={"error": str(e)}, status_code=500)